@@ -0,0 +1,81 @@
+"""
+Chunking benchmark: form 10-K files to chunk records.
+
+Compares the notebook's original per-file loop (json.load, then a splitter
+call per item with progress printing) with `form10k_chunker.iter_chunks`
+on one process and on a process pool, and reports peak Python memory.
+
+    python benchmarks/bench_chunker.py --data-dir data/all
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tracemalloc
+
+from harness import DATA_DIR, timer
+
+from form10k_chunker import FORM10K_ITEMS, form10k_files, iter_chunks, text_splitter
+
+
+def notebook_loop(files):
+    """The original `split_form10k_data_from_file` loop, collecting every chunk in a list"""
+    splitter = text_splitter(2000, 200)
+    all_chunks = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for file in files:
+            file_as_object = json.load(open(file))
+            for item in FORM10K_ITEMS:
+                print(f'Processing {item} from {file}')
+                for chunk_seq_id, chunk in enumerate(splitter.split_text(file_as_object[item])[:20]):
+                    form_id = file[file.rindex('/') + 1:file.rindex('.')]
+                    all_chunks.append({
+                        'text': chunk,
+                        'item': item,
+                        'chunkSeqId': chunk_seq_id,
+                        'formId': f'{form_id}',
+                        'chunkId': f'{form_id}-{item}-chunk{chunk_seq_id:04d}',
+                        'names': file_as_object['names'],
+                        'cik': file_as_object['cik'],
+                        'cusip6': file_as_object['cusip6'],
+                        'source': file_as_object['source'],
+                    })
+    return len(all_chunks)
+
+
+def streamed(files, processes):
+    return sum(1 for _ in iter_chunks(files, processes=processes))
+
+
+def measure(label, fn, files):
+    with timer() as elapsed:
+        count = fn(files)
+    # a second, traced run for memory; tracing slows the run down too much to time it
+    tracemalloc.start()
+    fn(files)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\t{label:>22}: {count / elapsed['seconds']:8,.0f} chunks/s  "
+          f"peak {peak / 1e6:6.1f} MB  ({elapsed['seconds']:.2f}s)")
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--data-dir", default=str(DATA_DIR / "all"))
+    arg_parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = arg_parser.parse_args()
+
+    files = form10k_files(args.data_dir)
+    print(f"{len(files)} form 10-K files from {args.data_dir}")
+    measure("notebook loop", notebook_loop, files)
+    measure("iter_chunks, 1 process", lambda f: streamed(f, 1), files)
+    if args.processes and args.processes > 1:
+        # tracemalloc only sees this process; the workers' memory isn't counted
+        measure(f"iter_chunks, {args.processes} procs", lambda f: streamed(f, args.processes), files)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
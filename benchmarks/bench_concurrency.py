@@ -0,0 +1,96 @@
+"""
+Load benchmark: requests served per worker with sync vs async endpoints.
+
+Fires `--requests` calls with `--concurrency` in flight at a single
+in-process worker. The "threadpool" variant rebuilds the previous sync
+`def` endpoint over a blocking driver stub, so every in-flight query holds
+one of Starlette's threadpool workers; the "async" variant drives the
+real service endpoint over an async driver stub with the same latency.
+
+    python benchmarks/bench_concurrency.py --service neo4j-fastapi
+    python benchmarks/bench_concurrency.py --service graphvis --latency 0.05
+"""
+import argparse
+import asyncio
+import sys
+
+import httpx
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from harness import load_service, service_dir, timer
+from stub_driver import StubAsyncDriver, StubDriver
+
+
+def threadpool_app(service, name: str, driver: StubDriver) -> FastAPI:
+    app = FastAPI()
+
+    if name == "neo4j-fastapi":
+        @app.post("/cypher")
+        def run_cypher(body: dict):
+            with driver.session() as s:
+                rows = [service.record_to_dict(rec) for rec in s.run(body["query"])]
+            return {"rows": rows, "count": len(rows), "capped": False}
+    else:
+        @app.get("/graph")
+        def graph(mode: str = Query("filings"), limit: int = Query(800)):
+            cypher, params = service.build_query(mode, None, None, limit)
+            with driver.session() as s:
+                return JSONResponse(service.to_graph(s.run(cypher, **params)))
+
+    return app
+
+
+def install_async_driver(service, name: str, driver: StubAsyncDriver) -> FastAPI:
+    if name == "neo4j-fastapi":
+        service._driver = driver
+    else:
+        service.driver = driver
+    return service.app
+
+
+async def fire(app: FastAPI, name: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    gate = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with gate:
+                if name == "neo4j-fastapi":
+                    response = await client.post("/cypher", json={"query": "RETURN 1 AS ok"})
+                else:
+                    response = await client.get("/graph", params={"mode": "filings", "limit": 10})
+                response.raise_for_status()
+
+        with timer() as elapsed:
+            await asyncio.gather(*(one() for _ in range(requests)))
+    return elapsed["seconds"]
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--service", choices=["neo4j-fastapi", "graphvis"], default="neo4j-fastapi")
+    arg_parser.add_argument("--requests", type=int, default=2000)
+    arg_parser.add_argument("--concurrency", type=int, default=200)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="simulated query latency in seconds")
+    args = arg_parser.parse_args()
+
+    service = load_service(args.service)
+    variants = {
+        "threadpool": threadpool_app(service, args.service, StubDriver(args.latency)),
+        "async": install_async_driver(service, args.service, StubAsyncDriver(args.latency)),
+    }
+
+    print(f"{args.service}: {args.requests} requests, {args.concurrency} concurrent, "
+          f"{args.latency * 1000:.0f} ms per query")
+    with service_dir(args.service):
+        for label, app in variants.items():
+            seconds = asyncio.run(fire(app, args.service, args.requests, args.concurrency))
+            # Little's law: requests in flight = throughput x per-request latency
+            in_flight = args.requests / seconds * args.latency
+            print(f"\t{label:>10}: {args.requests / seconds:8.0f} req/s  "
+                  f"~{in_flight:5.0f} queries in flight  ({seconds:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
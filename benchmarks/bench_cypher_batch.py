@@ -0,0 +1,81 @@
+"""
+Load benchmark: a dashboard's small reads as separate /cypher requests vs one /cypher/batch.
+
+Each "page load" issues `--statements` small queries the way a dashboard
+with one tile per company would. They are sent as separate `/cypher`
+requests (`--browser-connections` at a time, like a browser), then as one
+`/cypher/batch` in each mode. `--rtt` simulates the client-server round
+trip every HTTP request pays; `--latency` is the simulated query time.
+
+    python benchmarks/bench_cypher_batch.py --statements 20
+    python benchmarks/bench_cypher_batch.py --rtt 0.05 --latency 0.005
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+
+import httpx
+
+from harness import load_service, timer
+from stub_driver import StubAsyncDriver
+
+QUERY = "MATCH (com:Company {cusip6: $cusip6})-[:FILED]->(f:Form) RETURN f.formId AS formId"
+
+
+async def page_load(client: httpx.AsyncClient, variant: str, statements: int, connections: int,
+                    rtt: float) -> None:
+    params = [{"cusip6": f"{100000 + i:06d}"} for i in range(statements)]
+    if variant == "requests":
+        gate = asyncio.Semaphore(connections)
+
+        async def one(p):
+            async with gate:
+                await asyncio.sleep(rtt)
+                response = await client.post("/cypher", json={"query": QUERY.replace("$cusip6", repr(p["cusip6"]))})
+                response.raise_for_status()
+
+        await asyncio.gather(*(one(p) for p in params))
+    else:
+        await asyncio.sleep(rtt)
+        response = await client.post("/cypher/batch", json={
+            "statements": [{"query": QUERY, "params": p} for p in params],
+            "mode": variant,
+        })
+        response.raise_for_status()
+        assert response.json()["errors"] == 0
+
+
+async def run(service, variant: str, args) -> tuple:
+    driver = StubAsyncDriver(args.latency)
+    service._driver = driver
+    transport = httpx.ASGITransport(app=service.app)
+    times = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(args.repeat):
+            with timer() as elapsed:
+                await page_load(client, variant, args.statements, args.browser_connections, args.rtt)
+            times.append(elapsed["seconds"])
+    return statistics.median(times), driver.sessions / args.repeat
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--statements", type=int, default=20, help="queries per page load")
+    arg_parser.add_argument("--repeat", type=int, default=10, help="page loads to time")
+    arg_parser.add_argument("--browser-connections", type=int, default=6)
+    arg_parser.add_argument("--rtt", type=float, default=0.03, help="simulated HTTP round trip in seconds")
+    arg_parser.add_argument("--latency", type=float, default=0.005, help="simulated query latency in seconds")
+    args = arg_parser.parse_args()
+
+    service = load_service("neo4j-fastapi")
+    print(f"{args.statements} statements per page load, {args.rtt * 1000:.0f} ms round trip, "
+          f"{args.latency * 1000:.0f} ms per query, median of {args.repeat}")
+    for variant in ("requests", "transaction", "concurrent"):
+        seconds, sessions = asyncio.run(run(service, variant, args))
+        print(f"\t{variant:>12}: {seconds * 1000:7.1f} ms per page load, {sessions:4.0f} sessions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
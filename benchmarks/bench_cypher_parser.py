@@ -0,0 +1,89 @@
+"""
+Parser benchmark: splitting Cypher modules into statements.
+
+Compares the original regex `cypher_parser` (strip comments, then split on
+every `;`) with the streaming tokenizer. First it checks both against the
+modules in `notebooks/kg-construction/test`, then times them on a generated
+load script of `--mb` megabytes whose strings contain `;` and `//`, with
+peak Python memory.
+
+    python benchmarks/bench_cypher_parser.py --mb 20
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from harness import KG_CONSTRUCTION_DIR, timer
+
+from cypher_parser import iter_cypher_file, parse_cypher_file
+
+TEST_DIR = KG_CONSTRUCTION_DIR / "test"
+
+
+def regex_parse_file(filename: str) -> list:
+    """The original `cypher_parser`: read the whole file, strip comments with regexes, split on `;`"""
+    with open(filename, 'r') as f:
+        cypher = f.read()
+    strip_single_comments = re.sub(r'//.*\n', '', cypher)
+    strip_multi_comments = re.sub(r'/\*\*.*?\*/', '', strip_single_comments, flags=re.DOTALL)
+    parsed = [x.strip() for x in strip_multi_comments.split(';')]
+    return [x for x in parsed if x != '']
+
+
+def tokenizer_count(filename: str) -> int:
+    return sum(1 for _ in iter_cypher_file(filename))
+
+
+def generate_script(path: Path, megabytes: float) -> int:
+    """A load script like an export or generated loader: one MERGE per row, 1 in 10 commented"""
+    statements = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while f.tell() < megabytes * 1e6:
+            if statements % 10 == 0:
+                f.write(f"// batch {statements // 10}; rows from https://www.sec.gov/Archives/\n")
+            f.write(f"MERGE (c:Chunk {{chunkId: 'form-{statements:08d}-item1-chunk0000'}})\n"
+                    f"  SET c.text = \"Revenue grew; see https://example.com/ir // investor site\",\n"
+                    f"      c.`source;url` = 'https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany';\n")
+            statements += 1
+    return statements
+
+
+def measure(label: str, fn, filename: str) -> None:
+    with timer() as elapsed:
+        count = fn(filename)
+    tracemalloc.start()
+    fn(filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = os.path.getsize(filename) / 1e6
+    print(f"\t{label:>10}: {count:9,} statements  {size / elapsed['seconds']:6.1f} MB/s  "
+          f"peak {peak / 1e6:7.1f} MB  ({elapsed['seconds']:.2f}s)")
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--mb", type=float, default=20, help="size of the generated script")
+    args = arg_parser.parse_args()
+
+    print(f"modules in {TEST_DIR} (statements: regex / tokenizer)")
+    for filename in sorted(TEST_DIR.glob("*.cypher")):
+        regex = regex_parse_file(str(filename))
+        tokenized = parse_cypher_file(str(filename))
+        verdict = "same" if regex == tokenized else "differ"
+        print(f"\t{filename.name:>52}: {len(regex)} / {len(tokenized)}  {verdict}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = Path(tmp) / "generated.cypher"
+        statements = generate_script(script, args.mb)
+        print(f"generated script: {script.stat().st_size / 1e6:.1f} MB, {statements:,} statements")
+        measure("regex", lambda f: len(regex_parse_file(f)), str(script))
+        measure("tokenizer", tokenizer_count, str(script))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
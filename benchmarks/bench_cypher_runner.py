@@ -0,0 +1,75 @@
+"""
+Module runner benchmark: kg-construction.cypher run statement by statement vs with parallel schema stages.
+
+Runs `cypher_runner.run_module` against the blocking driver stub, which keeps
+the `(:KnowledgeGraph)` checkpoint in memory, once with `--parallelism 1` and
+once with `--parallelism` index and constraint statements at a time. Then it
+makes the run fail at `--fail-at` (a piece of statement text), runs it again,
+and counts how many statements the resumed run had to send.
+
+    python benchmarks/bench_cypher_runner.py --latency 0.05
+"""
+import argparse
+import sys
+
+from neo4j import Record
+
+from harness import KG_CONSTRUCTION_DIR, timer
+from stub_driver import StubDriver
+
+from cypher_runner import LOAD_CHECKPOINT_QUERY, RECORD_CHECKPOINT_QUERY, run_module
+
+MODULE = str(KG_CONSTRUCTION_DIR / "kg-construction.cypher")
+PARAMS = {"openAiApiKey": "offline"}
+
+
+class CheckpointGraph:
+    """Answers the runner's checkpoint queries from a set, and fails one statement when asked."""
+
+    def __init__(self, fail_at: str = ""):
+        self.completed = set()
+        self.fail_at = fail_at
+        self.sent = 0
+
+    def __call__(self, query, params):
+        if query == LOAD_CHECKPOINT_QUERY:
+            return [Record({"completed": sorted(self.completed)})]
+        if query == RECORD_CHECKPOINT_QUERY:
+            self.completed.update(params["hashes"])
+            return []
+        self.sent += 1
+        if self.fail_at and self.fail_at in query:
+            raise RuntimeError("simulated failure")
+        return []
+
+
+def run(graph: CheckpointGraph, latency: float, parallelism: int) -> list:
+    driver = StubDriver(latency, graph)
+    return run_module(driver, MODULE, PARAMS, parallelism=parallelism)
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per statement")
+    arg_parser.add_argument("--parallelism", type=int, default=4)
+    arg_parser.add_argument("--fail-at", default="OWNS_STOCK_IN", help="Text of the statement that fails the first run")
+    args = arg_parser.parse_args()
+
+    for parallelism in (1, args.parallelism):
+        graph = CheckpointGraph()
+        with timer() as elapsed:
+            timings = run(graph, args.latency, parallelism)
+        print(f"parallelism {parallelism}: {len(timings)} statements in {elapsed['seconds']:.2f}s")
+
+    graph = CheckpointGraph(args.fail_at)
+    first = run(graph, args.latency, args.parallelism)
+    graph.fail_at = ""
+    sent_before = graph.sent
+    second = run(graph, args.latency, args.parallelism)
+    print(f"failed run: {sum(t.status == 'ran' for t in first)} completed before the failure; "
+          f"resumed run: sent {graph.sent - sent_before}, skipped {sum(t.status == 'skipped' for t in second)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
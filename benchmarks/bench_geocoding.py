@@ -0,0 +1,85 @@
+"""
+Geocoding benchmark: the notebook's serial loop vs the geocoding stage, with a cold and a warm cache.
+
+The managers and addresses of a form 13 file are geocoded with `StubGeocoder`,
+which charges `--lookup-latency` per lookup, and written through the blocking
+driver stub. The notebook loop looks up every manager in turn and writes each
+one with its own `execute_query`; the stage looks up each distinct address once,
+`--workers` at a time, and writes `UNWIND` batches. It runs twice against one
+cache, so the second run shows a rerun.
+
+    python benchmarks/bench_geocoding.py --lookup-latency 0.005
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+
+from neo4j import Record
+
+from harness import DATA_DIR, timer
+from stub_driver import StubDriver
+
+from geocoding import FIND_MANAGERS_QUERY, GeocodeCache, StubGeocoder, geocode_managers
+
+# the per-manager write the notebook used before batching
+PER_MANAGER_QUERY = """
+MATCH (mgr:Manager {cik: $managerCik})
+SET mgr.location = point({latitude: $latitude, longitude: $longitude})
+MERGE (addr:Address {city: $city, state: $state})
+MERGE (mgr)-[:LOCATED_AT]->(addr)
+"""
+
+
+def read_managers(form13_file: str) -> list:
+    with open(form13_file, mode='r') as csv_file:
+        managers = {row['managerCik']: row['managerAddress'] for row in csv.DictReader(csv_file)}
+    return [Record({'managerCik': int(cik), 'address': address}) for cik, address in managers.items()]
+
+
+def notebook_loop(driver, geocoder, managers) -> int:
+    written = 0
+    for manager in managers:
+        geocode = geocoder.geocode(manager['address'])
+        if geocode:
+            driver.execute_query(PER_MANAGER_QUERY, managerCik=manager['managerCik'], latitude=geocode.latitude,
+                                 longitude=geocode.longitude, city=geocode.city, state=geocode.state)
+            written += 1
+    return written
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--form13', default=str(DATA_DIR / 'sample' / 'form13.csv'))
+    arg_parser.add_argument('--lookup-latency', type=float, default=0.005, help='Simulated seconds per lookup')
+    arg_parser.add_argument('--latency', type=float, default=0.001, help='Simulated seconds per query')
+    arg_parser.add_argument('--workers', type=int, default=8)
+    args = arg_parser.parse_args()
+
+    managers = read_managers(args.form13)
+
+    def records(query, params):
+        return managers if query == FIND_MANAGERS_QUERY else []
+
+    geocoder = StubGeocoder(args.lookup_latency)
+    driver = StubDriver(args.latency, records)
+    with timer() as elapsed:
+        written = notebook_loop(driver, geocoder, managers)
+    print(f"notebook loop: {written} managers, {geocoder.calls} lookups, {driver.queries} queries "
+          f"in {elapsed['seconds']:.2f}s")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = GeocodeCache(os.path.join(cache_dir, 'geocodes.sqlite'))
+        for run in ('cold cache', 'warm cache'):
+            geocoder = StubGeocoder(args.lookup_latency)
+            driver = StubDriver(args.latency, records)
+            stats = geocode_managers(driver, geocoder, cache, max_workers=args.workers)
+            print(f"stage, {run}: {stats.written} managers, {geocoder.calls} lookups, {driver.queries} queries "
+                  f"in {stats.seconds:.2f}s")
+        cache.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Loader benchmark: one execute_query per row vs batched UNWIND writes.
+
+Both variants run against the blocking driver stub, which charges a fixed
+round-trip latency per query plus a small server cost per row, so the
+difference is the number of round trips and transactions.
+
+    python benchmarks/bench_loader.py --rows 5000 --latency 0.001
+"""
+import argparse
+import csv
+import sys
+
+from harness import DATA_DIR, timer
+from stub_driver import StubDriver
+from synthetic_graph import chunk_rows
+
+from kg_loader import MERGE_CHUNKS_QUERY, MERGE_COMPANIES_QUERY, load_batches
+
+# the per-row queries the notebooks used before batching
+PER_ROW_CHUNK_QUERY = """
+MERGE(mergedChunk:Chunk {chunkId: $rowParam.chunkId})
+    ON CREATE SET
+        mergedChunk.text = $rowParam.text
+"""
+
+PER_ROW_COMPANY_QUERY = """
+MERGE (com:Company {cusip6: $rowParam.cusip6})
+  ON CREATE
+    SET com.name = $rowParam.companyName,
+        com.cusip = $rowParam.cusip
+"""
+
+
+def per_row(driver, query, rows) -> int:
+    count = 0
+    for row in rows:
+        driver.execute_query(query, rowParam=row)
+        count += 1
+    return count
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=5000, help="synthetic chunk rows to load")
+    arg_parser.add_argument("--batch-size", type=int, default=1000)
+    arg_parser.add_argument("--latency", type=float, default=0.001, help="simulated round trip in seconds")
+    arg_parser.add_argument("--row-cost", type=float, default=0.00002, help="simulated server seconds per row")
+    arg_parser.add_argument("--form13", action="store_true", help="load data/sample/form13.csv instead")
+    args = arg_parser.parse_args()
+
+    if args.form13:
+        with open(DATA_DIR / "sample" / "form13.csv") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        per_row_query, batched_query = PER_ROW_COMPANY_QUERY, MERGE_COMPANIES_QUERY
+    else:
+        rows = list(chunk_rows(args.rows))
+        per_row_query, batched_query = PER_ROW_CHUNK_QUERY, MERGE_CHUNKS_QUERY
+
+    print(f"{len(rows)} rows, {args.latency * 1000:.1f} ms round trip, batches of {args.batch_size}")
+
+    driver = StubDriver(args.latency, row_cost=args.row_cost)
+    with timer() as elapsed:
+        count = per_row(driver, per_row_query, rows)
+    print(f"\t   per-row: {count / elapsed['seconds']:10,.0f} rows/s  "
+          f"{driver.queries} round trips  ({elapsed['seconds']:.2f}s)")
+
+    driver = StubDriver(args.latency, row_cost=args.row_cost)
+    stats = load_batches(driver, batched_query, rows, batch_size=args.batch_size)
+    print(f"\t   batched: {stats.rows_per_second:10,.0f} rows/s  "
+          f"{driver.queries} round trips  ({stats.seconds:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
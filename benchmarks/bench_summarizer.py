@@ -0,0 +1,77 @@
+"""
+Form summary benchmark: the notebook's serial loop vs the map-reduce summarizer, with a cold and a warm cache.
+
+The forms of `--data-dir` are summarized with `FakeChat`, which charges
+`--call-latency` per call, embedded with `FakeEmbeddings` and written through
+the blocking driver stub. The notebook loop calls the model for each part of
+each form in turn, then embeds and writes the form with its own
+`execute_query`. The summarizer sends the parts of all forms `--workers` at a
+time, adds one reduce call per multi-part form and writes `UNWIND` batches.
+It runs twice against one cache, so the second run shows a rerun.
+
+    python benchmarks/bench_summarizer.py --call-latency 0.05 --workers 64
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from harness import DATA_DIR, timer
+from stub_driver import StubDriver
+
+from embedding_pipeline import FakeEmbeddings
+from form10k_chunker import form10k_files, read_form10k_form
+from form_summarizer import MAP_PROMPT, FakeChat, SummaryCache, split_parts, summarize_forms
+
+# the per-form write the notebook used before batching
+PER_FORM_QUERY = """
+MATCH (f:Form {formId: $formInfoParam.formId})
+  SET f.summary = $formInfoParam.summary
+WITH f
+  CALL db.create.setNodeVectorProperty(f, "summaryEmbedding", $formInfoParam.summaryEmbedding)
+"""
+
+
+def notebook_loop(driver, chat_api, embeddings_api, forms) -> int:
+    for form_info in forms:
+        summary = ''
+        for partial_text in split_parts(form_info['fullText']):
+            partial_summary = chat_api.invoke(MAP_PROMPT.format(name=form_info['names'][0], text=partial_text))
+            summary += partial_summary.content + '\n\n'
+        form_info['summary'] = summary
+        form_info['summaryEmbedding'] = embeddings_api.embed_query(summary)
+        driver.execute_query(PER_FORM_QUERY, formInfoParam=form_info)
+    return len(forms)
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--data-dir', default=str(DATA_DIR / 'all'))
+    arg_parser.add_argument('--call-latency', type=float, default=0.05, help='Simulated seconds per LLM call')
+    arg_parser.add_argument('--latency', type=float, default=0.001, help='Simulated seconds per query')
+    arg_parser.add_argument('--workers', type=int, default=64)
+    args = arg_parser.parse_args()
+
+    forms = [read_form10k_form(file) for file in form10k_files(args.data_dir)]
+
+    chat_api = FakeChat(args.call_latency)
+    driver = StubDriver(args.latency)
+    with timer() as elapsed:
+        summarized = notebook_loop(driver, chat_api, FakeEmbeddings(), forms)
+    print(f"notebook loop: {summarized} forms, {chat_api.calls} LLM calls, {driver.queries} queries "
+          f"in {elapsed['seconds']:.2f}s")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = SummaryCache(os.path.join(cache_dir, 'summaries.sqlite'))
+        for run in ('cold cache', 'warm cache'):
+            chat_api = FakeChat(args.call_latency)
+            driver = StubDriver(args.latency)
+            stats = summarize_forms(driver, chat_api, FakeEmbeddings(), forms, max_workers=args.workers, cache=cache)
+            print(f"summarizer, {run}: {stats.forms} forms, {chat_api.calls} LLM calls, {driver.queries} queries "
+                  f"in {stats.seconds:.2f}s")
+        cache.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
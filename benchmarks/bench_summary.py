@@ -0,0 +1,122 @@
+"""
+Summary benchmark: graphvis /summary built from the full graph vs from one aggregated row.
+
+The old path reads `--limit` records of nodes and relationships with all their
+properties, builds the `/graph` payload with `to_graph` and ranks every node
+by degree, four times over. The new path has Neo4j reduce the same records to
+a single row of counts and per-label hubs (`graph_summary.SUMMARY_AGGREGATION`);
+here the stub driver answers it with a row computed the way Neo4j would. Both
+run through the async driver stub with an empty cache, and report service
+time, records read and peak Python memory. The summaries are compared too.
+
+    python benchmarks/bench_summary.py --limit 500 5000
+"""
+import argparse
+import asyncio
+import heapq
+import sys
+import tracemalloc
+from collections import Counter, defaultdict
+
+from neo4j import Record
+
+from harness import load_service, timer
+from stub_driver import StubAsyncDriver
+from synthetic_graph import graph_records
+
+HUB_PROPS = ("name", "companyName", "managerName", "formId", "cusip6", "cik", "managerCik", "chunkId")
+
+
+def summarize_graph(mode, focusType, focus, graph) -> str:
+    """The summary as `/summary` composed it before the aggregation, from the full payload."""
+    counts = Counter(n["label"] for n in graph["nodes"])
+    link_types = Counter(l["type"] for l in graph["links"])
+    deg = Counter()
+    for l in graph["links"]:
+        deg[l["source"]] += 1
+        deg[l["target"]] += 1
+    id_to = {n["id"]: n for n in graph["nodes"]}
+    top_nodes = [id_to[i]["name"] for i, _ in deg.most_common(5) if i in id_to]
+    tops = {label: [id_to[i]["name"] for i, _ in deg.most_common() if i in id_to and id_to[i]["label"] == label][:3]
+            for label in ("Manager", "Company", "Form", "Chunk")}
+    parts = [f"{mode.capitalize()} view with {len(graph['nodes'])} nodes / {len(graph['links'])} links."]
+    parts.append(f" Node mix → {', '.join(f'{k}:{v}' for k, v in counts.most_common())}.")
+    parts.append(f" Relations → {', '.join(f'{k}:{v}' for k, v in link_types.most_common())}.")
+    parts.extend(f" {label}: {', '.join(names)}." for label, names in tops.items() if names)
+    parts.append(f" Overall hubs: {', '.join(top_nodes)}.")
+    return " ".join(parts)
+
+
+def aggregate_row(records, top_hubs: int) -> Record:
+    """The row `SUMMARY_AGGREGATION` returns for `records`: distinct links, counts and the top nodes by label."""
+    # a dict rather than a set, so ties between hubs come out in the same order every run
+    links = dict.fromkeys((rel.start_node, rel.end_node, rel.type)
+                          for record in records for rel in record.values() if hasattr(rel, "start_node"))
+    degree = Counter()
+    for source, target, _ in links:
+        degree[source] += 1
+        degree[target] += 1
+    by_label = defaultdict(list)
+    for node in degree:
+        by_label[next(iter(node.labels))].append(node)
+
+    def hub(node):
+        props = {key: node.get(key) for key in HUB_PROPS}
+        props["names"] = (node.get("names") or [])[:1] or None
+        props["text"] = node["text"][:81] if node.get("text") else None
+        return {"degree": degree[node], "props": props}
+
+    return Record({
+        "links": len(links),
+        "types": [{"type": t, "count": c} for t, c in Counter(t for _, _, t in links).items()],
+        "labels": [{"label": label, "count": len(nodes),
+                    "hubs": [hub(n) for n in heapq.nlargest(top_hubs, nodes, key=degree.__getitem__)]}
+                   for label, nodes in by_label.items()],
+    })
+
+
+async def timed(service, fn, *args) -> tuple:
+    service.graph_cache.invalidate()
+    tracemalloc.start()
+    with timer() as elapsed:
+        result = await fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed["seconds"], peak
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--limit", type=int, nargs="+", default=[500, 5000], help="records per view")
+    arg_parser.add_argument("--latency", type=float, default=0.005, help="simulated query latency in seconds")
+    args = arg_parser.parse_args()
+
+    service = load_service("graphvis")
+    graph_summary = sys.modules["graph_summary"]
+
+    async def before(mode, limit):
+        graph = await service.fetch_graph(mode, None, None, limit)
+        return summarize_graph(mode, None, None, graph), graph_summary.graph_stats(graph)
+
+    async def after(mode, limit):
+        stats = await service.fetch_summary_stats(mode, None, None, limit)
+        return graph_summary.render_summary(mode, None, None, stats), stats
+
+    for limit in args.limit:
+        print(f"{limit} records, {args.latency * 1000:.0f} ms per query")
+        for mode in ("filings", "holdings", "sections"):
+            records = graph_records(mode, limit)
+            row = aggregate_row(records, graph_summary.TOP_HUBS)
+            service.driver = StubAsyncDriver(
+                args.latency, lambda query, params: [row] if "UNWIND [rel IN" in query else records)
+            (_, full_stats), full_s, full_peak = asyncio.run(timed(service, before, mode, limit))
+            (_, stats), agg_s, agg_peak = asyncio.run(timed(service, after, mode, limit))
+            same = all(full_stats[key] == stats[key] for key in ("nodes", "links", "labels", "types"))
+            print(f"\t{mode:>8}: full graph {full_s * 1000:7.1f} ms, {limit:5} records, {full_peak / 1e6:6.2f} MB   "
+                  f"aggregated {agg_s * 1000:5.1f} ms, 1 record, {agg_peak / 1e6:5.2f} MB   "
+                  f"counts {'match' if same else 'DIFFER'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
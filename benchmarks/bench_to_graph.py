@@ -0,0 +1,59 @@
+"""
+Microbenchmark: graphvis /graph payloads, full vs compact encoding.
+
+Builds synthetic Node/Relationship records shaped like each mode's query,
+then times building and serializing the payload both ways: `to_graph`
+rendered by `JSONResponse` (stdlib json), and `to_compact_graph` rendered
+by `CompactJSONResponse` (orjson when installed).
+
+    python benchmarks/bench_to_graph.py --limit 5000
+    python benchmarks/bench_to_graph.py --fields cusip6,formId,value
+"""
+import argparse
+import statistics
+import sys
+
+from fastapi.responses import JSONResponse
+
+from harness import load_service, timer
+from synthetic_graph import graph_records
+
+
+def best_of(repeat: int, fn) -> tuple:
+    """Fastest of `repeat` runs, in seconds, and the last result."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        with timer() as elapsed:
+            result = fn()
+        times.append(elapsed["seconds"])
+    return min(times), statistics.median(times), result
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--limit", type=int, default=5000, help="records per payload")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--fields", default="", help="props to include in the compact format")
+    args = arg_parser.parse_args()
+
+    service = load_service("graphvis")
+    fields = [f for f in args.fields.split(",") if f]
+    encoder = "orjson" if service.orjson is not None else "json"
+
+    print(f"{args.limit} records, best of {args.repeat}; compact fields: {fields or 'none'} ({encoder})")
+    for mode in ("filings", "holdings", "sections"):
+        records = graph_records(mode, args.limit)
+        full_s, full_median, full_body = best_of(
+            args.repeat, lambda: JSONResponse(service.to_graph(records)).body)
+        compact_s, compact_median, compact_body = best_of(
+            args.repeat, lambda: service.CompactJSONResponse(service.to_compact_graph(records, fields)).body)
+        print(f"\t{mode:>8}: full {full_s * 1000:7.1f} ms {len(full_body) / 1e6:6.2f} MB   "
+              f"compact {compact_s * 1000:7.1f} ms {len(compact_body) / 1e6:6.2f} MB   "
+              f"{full_s / compact_s:4.1f}x faster, {len(full_body) / len(compact_body):4.1f}x smaller "
+              f"(medians {full_median * 1000:.1f} / {compact_median * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
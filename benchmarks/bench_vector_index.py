@@ -0,0 +1,89 @@
+"""
+Local vector index benchmark: per-query latency and recall of exact, batched and IVF search.
+
+Builds a `local_vector_index` from synthetic clustered embeddings (chunks of
+one form lie near each other, as real filings do), then times single queries,
+a batch of queries in one matrix multiply, filtered queries, and queries that
+probe `--nprobe` of `--lists` IVF lists. Recall is measured against the exact
+top `--k`.
+
+    python benchmarks/bench_vector_index.py --chunks 50000 --dimensions 1536
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from harness import timer
+
+from local_vector_index import LocalVectorIndex, normalized, partition_index, write_index
+
+
+def synthetic_rows(count: int, dimensions: int, forms: int, rng):
+    centers = rng.normal(size=(forms, dimensions)).astype(np.float32)
+    for i in range(count):
+        form = i * forms // count
+        vector = centers[form] + 0.8 * rng.normal(size=dimensions).astype(np.float32)
+        yield {'chunkId': f'chunk-{i}', 'formId': f'form-{form}', 'cusip6': f'{form // 4:06d}', 'embedding': vector}
+
+
+def per_query_ms(search, queries) -> float:
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def recall(results, truth) -> float:
+    return statistics.mean(len({hit.chunk_id for hit in hits} & expected) / len(expected)
+                           for hits, expected in zip(results, truth))
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--chunks', type=int, default=20000)
+    arg_parser.add_argument('--dimensions', type=int, default=1536)
+    arg_parser.add_argument('--forms', type=int, default=500)
+    arg_parser.add_argument('--queries', type=int, default=100)
+    arg_parser.add_argument('--k', type=int, default=10)
+    arg_parser.add_argument('--lists', type=int, default=100)
+    arg_parser.add_argument('--nprobe', type=int, nargs='+', default=[2, 8])
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as index_dir:
+        write_index(index_dir, synthetic_rows(args.chunks, args.dimensions, args.forms, rng))
+        index = LocalVectorIndex(index_dir)
+        queries = normalized(np.asarray(index.vectors[rng.choice(len(index), args.queries, replace=False)])
+                             + 0.05 * rng.normal(size=(args.queries, args.dimensions)))
+        exact = index.search(queries, args.k)
+        truth = [{hit.chunk_id for hit in hits} for hits in exact]
+        print(f"{len(index)} chunks x {args.dimensions} dimensions, {args.queries} queries, k={args.k}")
+
+        print(f"exact, one query at a time: {per_query_ms(lambda q: index.search(q, args.k), queries):.3f} ms/query")
+        start = time.perf_counter()
+        index.search(queries, args.k)
+        print(f"exact, one batch:           {(time.perf_counter() - start) * 1000 / args.queries:.3f} ms/query")
+        forms = [hits[0].form_id for hits in exact]
+        filtered = per_query_ms(lambda q: index.search(q, args.k, form_ids=[forms.pop()]), queries)
+        print(f"exact, filtered by formId:  {filtered:.3f} ms/query")
+
+        del index
+        with timer() as elapsed:
+            partition_index(index_dir, args.lists)
+        index = LocalVectorIndex(index_dir)
+        print(f"partitioned into {args.lists} lists in {elapsed['seconds']:.2f}s")
+        for nprobe in args.nprobe:
+            ms = per_query_ms(lambda q: index.search(q, args.k, nprobe=nprobe), queries)
+            results = index.search(queries, args.k, nprobe=nprobe)
+            print(f"IVF, nprobe={nprobe:<3}:            {ms:.3f} ms/query, recall@{args.k} {recall(results, truth):.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import importlib.util
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import Iterator
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+KG_CONSTRUCTION_DIR = ROOT_DIR / "notebooks" / "kg-construction"
+DATA_DIR = ROOT_DIR / "data"
+
+# the kg-construction modules are imported by the notebooks from their own directory
+sys.path.insert(0, str(KG_CONSTRUCTION_DIR))
+
+
+def load_service(name: str) -> ModuleType:
+    """
+    Import a service's app.py under a unique module name.
+
+    Both services are single `app.py` modules, so they can't share the
+    module name `app`. graphvis resolves its static files relative to the
+    working directory, so the import runs from the service directory, which
+    is also put on `sys.path` for the modules next to `app.py`.
+    """
+    service_dir = ROOT_DIR / name
+    os.environ.setdefault("NEO4J_USER", "neo4j")
+    os.environ.setdefault("NEO4J_PASSWORD", "benchmark")
+    module_name = name.replace("-", "_") + "_app"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, service_dir / "app.py")
+    module = importlib.util.module_from_spec(spec)
+    if str(service_dir) not in sys.path:
+        sys.path.append(str(service_dir))
+    cwd = os.getcwd()
+    os.chdir(service_dir)
+    try:
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+@contextmanager
+def service_dir(name: str) -> Iterator[None]:
+    """Run requests from the service directory, for apps that read files relative to it."""
+    cwd = os.getcwd()
+    os.chdir(ROOT_DIR / name)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+@contextmanager
+def timer() -> Iterator[dict]:
+    elapsed = {}
+    start = time.perf_counter()
+    try:
+        yield elapsed
+    finally:
+        elapsed["seconds"] = time.perf_counter() - start
@@ -0,0 +1,178 @@
+"""
+In-process stand-ins for the Neo4j driver, used by the benchmarks.
+
+The stubs answer every query after a fixed simulated round-trip latency,
+so throughput differences come from the service code, not the database.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from neo4j import EagerResult, Record, SummaryCounters
+
+RecordFactory = Callable[[str, Dict[str, Any]], Iterable[Record]]
+
+
+def constant_records(rows: List[Dict[str, Any]]) -> RecordFactory:
+    """Answer every query with the same rows."""
+    def factory(query: str, params: Dict[str, Any]) -> Iterable[Record]:
+        return [Record(row) for row in rows]
+    return factory
+
+
+class StubAsyncResult:
+    """
+    Streams the factory's records as they are read, yielding to the event loop
+    every `fetch_size` records the way the driver waits on its next batch, so a
+    generator factory never holds the whole result.
+    """
+
+    def __init__(self, records: Iterable[Record], fetch_size: int = 1000):
+        self._records = iter(records)
+        self.fetch_size = fetch_size
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for i, record in enumerate(self._records, 1):
+            yield record
+            if i % self.fetch_size == 0:
+                await asyncio.sleep(0)
+
+    async def single(self) -> Optional[Record]:
+        return next(self._records, None)
+
+    async def consume(self) -> "StubSummary":
+        return StubSummary()
+
+
+class StubAsyncTransaction:
+    def __init__(self, driver: "StubAsyncDriver"):
+        self._driver = driver
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> StubAsyncResult:
+        self._driver.queries += 1
+        await asyncio.sleep(self._driver.latency)
+        return StubAsyncResult(self._driver.records(query, {**(parameters or {}), **kwargs}))
+
+    async def close(self) -> None:
+        pass
+
+
+class StubAsyncSession:
+    def __init__(self, driver: "StubAsyncDriver"):
+        self._driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> StubAsyncResult:
+        self._driver.queries += 1
+        await asyncio.sleep(self._driver.latency)
+        return StubAsyncResult(self._driver.records(query, {**(parameters or {}), **kwargs}))
+
+    async def begin_transaction(self, **config) -> StubAsyncTransaction:
+        return StubAsyncTransaction(self._driver)
+
+    async def close(self) -> None:
+        pass
+
+
+class StubAsyncDriver:
+    """Async driver stub; sessions share the event loop like the real driver."""
+
+    def __init__(self, latency: float = 0.02, records: Optional[RecordFactory] = None):
+        self.latency = latency
+        self.records = records or constant_records([{"ok": 1}])
+        self.queries = 0
+        self.sessions = 0
+
+    def session(self, **config) -> StubAsyncSession:
+        self.sessions += 1
+        return StubAsyncSession(self)
+
+    async def close(self) -> None:
+        pass
+
+
+class StubSummary:
+    def __init__(self):
+        self.counters = SummaryCounters({})
+        self.result_available_after = 0
+        self.result_consumed_after = 0
+        self.profile = None
+
+
+class StubResult(list):
+    def consume(self) -> StubSummary:
+        return StubSummary()
+
+
+class StubTransaction:
+    def __init__(self, driver: "StubDriver"):
+        self._driver = driver
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> StubResult:
+        return self._driver.round_trip(query, {**(parameters or {}), **kwargs})
+
+
+class StubSession:
+    def __init__(self, driver: "StubDriver"):
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> StubResult:
+        return self._driver.round_trip(query, {**(parameters or {}), **kwargs})
+
+    def execute_read(self, work: Callable, *args, **kwargs) -> Any:
+        return work(StubTransaction(self._driver), *args, **kwargs)
+
+    execute_write = execute_read
+
+    def close(self) -> None:
+        pass
+
+
+class StubDriver:
+    """
+    Blocking driver stub; each in-flight query holds its calling thread.
+
+    `row_cost` adds simulated server time per parameter row, so batched
+    `UNWIND $rows` writes pay for their rows but only one round trip.
+    """
+
+    def __init__(self, latency: float = 0.02, records: Optional[RecordFactory] = None, row_cost: float = 0.0):
+        self.latency = latency
+        self.records = records or constant_records([{"ok": 1}])
+        self.row_cost = row_cost
+        self.queries = 0
+        self.rows = 0
+
+    def round_trip(self, query: str, params: Dict[str, Any]) -> StubResult:
+        rows = len(params.get("rows") or [None])
+        self.queries += 1
+        self.rows += rows
+        time.sleep(self.latency + self.row_cost * rows)
+        return StubResult(self.records(query, params))
+
+    def session(self, **config) -> StubSession:
+        return StubSession(self)
+
+    def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> EagerResult:
+        kwargs.pop("database_", None)
+        records = self.round_trip(query, {**(parameters or {}), **kwargs})
+        return EagerResult(list(records), None, records[0].keys() if records else [])
+
+    def close(self) -> None:
+        pass
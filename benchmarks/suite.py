@@ -0,0 +1,271 @@
+"""
+Benchmark suite: quick, fixed cases over synthetic EDGAR data, checked against a stored baseline.
+
+Every case builds its inputs with `synthetic_graph` and talks to the stub
+drivers, then times only the code under test, best of `--repeat` runs. Times
+are recorded relative to a calibration loop run on the same machine, so a
+baseline recorded on a laptop can be checked on a CI runner. Cases also
+report deterministic counts (round trips, rows, payload bytes, statements),
+which must not grow at all.
+
+    python benchmarks/suite.py                    # run every case and print the results
+    python benchmarks/suite.py --check            # also exit 1 on a regression against baseline.json
+    python benchmarks/suite.py --update           # record the results as the new baseline
+    python benchmarks/suite.py --only to_graph    # cases whose name contains "to_graph"
+"""
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+from fastapi.responses import JSONResponse
+
+from harness import load_service
+from stub_driver import StubAsyncDriver, StubDriver
+from synthetic_graph import chunk_rows, form13_rows, graph_records, iter_graph_records
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+RECORDS = 2000
+
+# name -> setup; setup builds the inputs and returns the function to time,
+# which returns the case's deterministic counts
+Case = Callable[[], Callable[[], Dict[str, int]]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str):
+    def register(setup: Case) -> Case:
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Best time of a fixed mix of the dict, string and json work the cases do."""
+    rows = [{"id": i, "name": f"node {i}", "labels": ["Company"], "props": {"value": i * 1.5}} for i in range(20000)]
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        json.dumps([{key: value for key, value in row.items()} for row in rows])
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def request(app, method: str, url: str, **kwargs) -> httpx.Response:
+    async def send() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.request(method, url, **kwargs)
+            response.raise_for_status()
+            return response
+    return asyncio.run(send())
+
+
+# holdings records: the chunks of the other modes carry 1536-float embeddings, which
+# would make these cases time json encoding of the embeddings more than anything else
+@case("neo4j-fastapi.record_to_dict")
+def record_to_dict_case():
+    service = load_service("neo4j-fastapi")
+    records = graph_records("holdings", RECORDS)
+
+    def run():
+        rows = [service.record_to_dict(record) for record in records]
+        return {"rows": len(rows)}
+    return run
+
+
+@case("neo4j-fastapi.cypher_request")
+def cypher_request_case():
+    service = load_service("neo4j-fastapi")
+
+    def run():
+        driver = StubAsyncDriver(0, lambda query, params: iter_graph_records("holdings", RECORDS))
+        service._driver = driver
+        response = request(service.app, "POST", "/cypher", json={"query": "MATCH (company:Company) RETURN company"})
+        return {"rows": response.json()["count"], "bytes": len(response.content), "queries": driver.queries}
+    return run
+
+
+for mode in ("filings", "holdings", "sections"):
+    @case(f"graphvis.to_graph.{mode}")
+    def to_graph_case(mode=mode):
+        service = load_service("graphvis")
+        records = graph_records(mode, RECORDS)
+
+        def run():
+            graph = service.to_graph(records)
+            return {"nodes": len(graph["nodes"]), "links": len(graph["links"]),
+                    "bytes": len(JSONResponse(graph).body)}
+        return run
+
+
+@case("graphvis.graph_summary")
+def graph_summary_case():
+    service = load_service("graphvis")
+    graph = service.to_graph(graph_records("filings", RECORDS))
+
+    def run():
+        return {"chars": len(service.render_summary("filings", None, None, service.graph_stats(graph)))}
+    return run
+
+
+@case("graphvis.graph_request")
+def graph_request_case():
+    service = load_service("graphvis")
+
+    def run():
+        driver = StubAsyncDriver(0, lambda query, params: iter_graph_records("filings", params["limit"]))
+        service.driver = driver
+        service.graph_cache.invalidate()
+        # a limit the materialized views don't cover, so the query runs
+        response = request(service.app, "GET", "/graph", params={"mode": "filings", "limit": RECORDS})
+        return {"bytes": len(response.content), "queries": driver.queries}
+    return run
+
+
+@case("graphvis.summary_request")
+def summary_request_case():
+    from bench_summary import aggregate_row
+
+    service = load_service("graphvis")
+    row = aggregate_row(graph_records("filings", RECORDS), 5)
+
+    def run():
+        driver = StubAsyncDriver(0, lambda query, params: [row])
+        service.driver = driver
+        service.graph_cache.invalidate()
+        response = request(service.app, "GET", "/summary", params={"mode": "filings", "limit": RECORDS})
+        return {"bytes": len(response.content), "queries": driver.queries}
+    return run
+
+
+@case("kg-construction.cypher_parser")
+def cypher_parser_case():
+    from bench_cypher_parser import generate_script
+    from cypher_parser import iter_cypher_file
+
+    script = Path(tempfile.mkdtemp()) / "load.cypher"
+    generate_script(script, 2)
+
+    def run():
+        return {"statements": sum(1 for _ in iter_cypher_file(str(script)))}
+    return run
+
+
+@case("kg-construction.load_chunks")
+def load_chunks_case():
+    from kg_loader import load_chunks
+
+    rows = list(chunk_rows(10000))
+
+    def run():
+        driver = StubDriver(0)
+        stats = load_chunks(driver, rows)
+        return {"rows": stats.rows, "queries": driver.queries}
+    return run
+
+
+@case("kg-construction.load_form13")
+def load_form13_case():
+    from kg_loader import load_form13
+
+    rows = list(form13_rows(10000))
+
+    def run():
+        driver = StubDriver(0)
+        load_form13(driver, rows)
+        return {"rows": driver.rows, "queries": driver.queries}
+    return run
+
+
+def measure(setup: Case, repeat: int) -> Tuple[float, Dict[str, int]]:
+    run = setup()
+    times = []
+    counters: Dict[str, int] = {}
+    for _ in range(repeat):
+        # like timeit, keep collector pauses for earlier garbage out of the timing
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            counters = run()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(times), counters
+
+
+def compare(name: str, result: Dict, baseline: Dict, tolerance: float, min_seconds: float) -> List[str]:
+    """
+    The regressions of one case against its baseline, as messages.
+    Cases faster than `min_seconds` are too noisy to hold to a time.
+    """
+    problems = []
+    if result["seconds"] >= min_seconds and result["relative"] > baseline["relative"] * (1 + tolerance):
+        problems.append(f"{name}: {result['relative'] / baseline['relative']:.2f}x the baseline time "
+                        f"(tolerance {1 + tolerance:.2f}x)")
+    for counter, value in result["counters"].items():
+        expected = baseline["counters"].get(counter)
+        if expected is not None and value > expected:
+            problems.append(f"{name}: {counter} grew from {expected} to {value}")
+    return problems
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--repeat", type=int, default=5, help="runs per case; the best is kept")
+    arg_parser.add_argument("--only", default="", help="only cases whose name contains this")
+    arg_parser.add_argument("--check", action="store_true", help="exit 1 on a regression against the baseline")
+    arg_parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    arg_parser.add_argument("--tolerance", type=float, default=1.0,
+                            help="allowed slowdown relative to the baseline, e.g. 1.0 for 2x")
+    arg_parser.add_argument("--min-ms", type=float, default=5.0, help="don't check the time of faster cases")
+    arg_parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    args = arg_parser.parse_args()
+
+    calibration = calibrate()
+    baseline = json.loads(Path(args.baseline).read_text()) if Path(args.baseline).exists() else {"cases": {}}
+    print(f"calibration {calibration * 1000:.1f} ms, best of {args.repeat}")
+
+    results = {}
+    problems: List[str] = []
+    for name, setup in CASES.items():
+        if args.only not in name:
+            continue
+        seconds, counters = measure(setup, args.repeat)
+        result = {"relative": round(seconds / calibration, 3), "seconds": round(seconds, 5), "counters": counters}
+        results[name] = result
+        expected = baseline["cases"].get(name)
+        vs = f"{result['relative'] / expected['relative']:5.2f}x baseline" if expected else "    no baseline"
+        print(f"\t{name:<34} {seconds * 1000:8.1f} ms  {vs}  "
+              + ", ".join(f"{counter} {value}" for counter, value in counters.items()))
+        if expected:
+            problems.extend(compare(name, result, expected, args.tolerance, args.min_ms / 1000))
+
+    if args.update:
+        cases = {**baseline["cases"], **results} if args.only else results
+        Path(args.baseline).write_text(json.dumps({
+            "python": platform.python_version(),
+            "calibration_seconds": round(calibration, 5),
+            "cases": dict(sorted(cases.items())),
+        }, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")
+    if problems:
+        print("regressions:")
+        for problem in problems:
+            print(f"\t{problem}")
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Synthetic EDGAR data at configurable scale, in the shapes the services and loaders expect.
+
+`graph_records(mode, count)` returns Records whose values are
+`neo4j.graph.Node` / `Relationship` objects, like the ones the driver
+hydrates, so `to_graph` and friends can be measured without a database;
+`iter_graph_records` yields them one at a time, for stub drivers that stream.
+`chunk_rows` and `form13_rows` are the row dicts the kg-construction loaders write.
+"""
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+from neo4j import Record
+from neo4j.graph import Graph, Node, Relationship
+
+ITEMS = ["item1", "item1a", "item7", "item7a"]
+
+
+class SyntheticGraph:
+    """Deterministic EDGAR-shaped nodes and relationships, shared through one driver `Graph`."""
+
+    def __init__(self, seed: int = 0):
+        self.graph = Graph()
+        self.random = random.Random(seed)
+        self._next_id = 0
+
+    def _id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def node(self, label: str, **properties: Any) -> Node:
+        node_id = self._id()
+        return Node(self.graph, f"4:synthetic:{node_id}", node_id, [label], properties)
+
+    def relationship(self, start: Node, rel_type: str, end: Node, **properties: Any) -> Relationship:
+        rel_id = self._id()
+        rel = self.graph.relationship_type(rel_type)(self.graph, f"5:synthetic:{rel_id}", rel_id, properties)
+        rel._start_node = start
+        rel._end_node = end
+        return rel
+
+    def company(self, i: int) -> Node:
+        cusip6 = f"{100000 + i:06d}"
+        return self.node("Company", cusip6=cusip6, cusip=f"{cusip6}105", name=f"COMPANY {i} INC",
+                         names=[f"Company {i} Inc", f"COMPANY {i} INC"])
+
+    def manager(self, i: int) -> Node:
+        return self.node("Manager", cik=str(1000000 + i), name=f"Manager {i} Capital LLC",
+                         address=f"{i} Main Street, New York, NY")
+
+    def form(self, company: Node) -> Node:
+        return self.node("Form", formId=f"{company['cusip6']}-10k",
+                         source=f"https://www.sec.gov/Archives/edgar/data/{company['cusip6']}.txt",
+                         summary="A synthetic summary. " * 20)
+
+    def chunk(self, form: Node, item: str, seq: int) -> Node:
+        words = " ".join(self.random.choice(["revenue", "risk", "growth", "market", "supply", "cloud"])
+                         for _ in range(300))
+        return self.node("Chunk", chunkId=f"{form['formId']}-{item}-chunk{seq:04d}", formId=form["formId"],
+                         item=item, chunkSeqId=seq, text=words, textEmbedding=[0.0] * 1536)
+
+
+def graph_records(mode: str = "filings", count: int = 1000, seed: int = 0,
+                  companies: Optional[int] = None, managers: Optional[int] = None) -> List[Record]:
+    """
+    `count` records shaped like the graphvis `build_query(mode, ...)` results.
+
+    Companies, managers and chunks repeat across records the way they do in
+    the real result, so `to_graph` deduplication is exercised too. There are
+    `count // 50` companies and `count // 5` managers unless given.
+    """
+    return list(iter_graph_records(mode, count, seed, companies, managers))
+
+
+def iter_graph_records(mode: str = "filings", count: int = 1000, seed: int = 0,
+                       companies: Optional[int] = None, managers: Optional[int] = None) -> Iterator[Record]:
+    """`graph_records`, one record at a time"""
+    company_count = companies or max(1, count // 50)
+    manager_count = managers or max(1, count // 5)
+    synthetic = SyntheticGraph(seed)
+    companies = [synthetic.company(i) for i in range(company_count)]
+    managers = [synthetic.manager(i) for i in range(manager_count)]
+    forms = {company.element_id: synthetic.form(company) for company in companies}
+    filed = {company.element_id: synthetic.relationship(company, "FILED", forms[company.element_id])
+             for company in companies}
+    sections: Dict[str, List[Any]] = {}
+    for form in forms.values():
+        chunks = [synthetic.chunk(form, item, 0) for item in ITEMS]
+        nexts = [synthetic.chunk(form, item, 1) for item in ITEMS]
+        sections[form.element_id] = [
+            (synthetic.relationship(form, "SECTION", head, item=head["item"]), head,
+             synthetic.relationship(head, "NEXT", nxt), nxt)
+            for head, nxt in zip(chunks, nexts)
+        ]
+
+    for i in range(count):
+        company = companies[i % len(companies)]
+        form = forms[company.element_id]
+        section_rel, section, next_rel, next_chunk = sections[form.element_id][i % len(ITEMS)]
+        manager = managers[synthetic.random.randrange(len(managers))]
+        owns = synthetic.relationship(manager, "OWNS_STOCK_IN", company,
+                                      reportCalendarOrQuarter="2023-06-30",
+                                      value=float(synthetic.random.randrange(10**6, 10**10)),
+                                      shares=synthetic.random.randrange(100, 10**7))
+        if mode == "holdings":
+            yield Record({"manager": manager, "owns": owns, "company": company,
+                          "form": form, "filed": filed[company.element_id]})
+        elif mode == "sections":
+            yield Record({"form": form, "company": company, "filed": filed[company.element_id],
+                          "sectionRel": section_rel, "section": section, "nextRel": next_rel,
+                          "nextChunk": next_chunk, "prevRel": None, "prevChunk": None})
+        else:
+            yield Record({"company": company, "filed": filed[company.element_id], "form": form,
+                          "manager": manager, "owns": owns, "sectionRel": section_rel,
+                          "section": section, "nextRel": next_rel, "nextChunk": next_chunk})
+
+
+def chunk_rows(count: int, chunks_per_form: int = 80, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """`count` chunk records as the form 10-K splitter produces them for `load_chunks`"""
+    rng = random.Random(seed)
+    for i in range(count):
+        form = i // chunks_per_form
+        item = ITEMS[(i % chunks_per_form) * len(ITEMS) // chunks_per_form]
+        seq = i % (chunks_per_form // len(ITEMS))
+        cusip6 = f"{100000 + form:06d}"
+        yield {
+            "text": " ".join(rng.choice(["revenue", "risk", "growth", "market", "supply", "cloud"])
+                             for _ in range(300)),
+            "item": item,
+            "chunkSeqId": seq,
+            "formId": f"0000{cusip6}-23-{form:06d}",
+            "chunkId": f"0000{cusip6}-23-{form:06d}-{item}-chunk{seq:04d}",
+            "names": [f"Company {form} Inc", f"COMPANY {form} INC"],
+            "cik": str(2000000 + form),
+            "cusip6": cusip6,
+            "source": f"https://www.sec.gov/Archives/edgar/data/{2000000 + form}.txt",
+        }
+
+
+def form13_rows(count: int, companies: Optional[int] = None, managers: Optional[int] = None,
+                seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """`count` holdings as rows of `form13.csv`, for `load_form13`; every value is a string, as csv reads it"""
+    rng = random.Random(seed)
+    company_count = companies or max(1, count // 50)
+    manager_count = managers or max(1, count // 5)
+    for i in range(count):
+        company, manager = i % company_count, rng.randrange(manager_count)
+        cusip6 = f"{100000 + company:06d}"
+        shares = rng.randrange(100, 10**7)
+        yield {
+            "source": f"https://sec.gov/Archives/edgar/data/{1000000 + manager}/{manager:010d}-23-000001.txt",
+            "managerCik": str(1000000 + manager),
+            "managerAddress": f"{manager} Main Street, New York, NY, 10019",
+            "managerName": f"MANAGER {manager} CAPITAL LLC",
+            "reportCalendarOrQuarter": "2023-06-30",
+            "cusip6": cusip6,
+            "cusip": f"{cusip6}105",
+            "companyName": f"COMPANY {company} INC",
+            "value": f"{shares * rng.uniform(5, 500):.1f}",
+            "shares": str(shares),
+        }
@@ -1,17 +1,38 @@
 # app.py
+import asyncio
+import base64
+import binascii
+import gzip
+import json
+import logging
 import os
-from collections import Counter, defaultdict
+import time
 from collections.abc import Iterable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple
 
-from fastapi import FastAPI, Query
-from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from neo4j import GraphDatabase, Driver
-from neo4j.exceptions import AuthError, ServiceUnavailable
+from starlette.background import BackgroundTask
+from neo4j import AsyncDriver, AsyncGraphDatabase
+from neo4j.exceptions import AuthError, ClientError, ServiceUnavailable
 from neo4j.graph import Node, Relationship, Path as NeoPath
 
+from graph_cache import GraphCache, cache_key
+from graph_sessions import GraphSessions
+from graph_summary import graph_stats, record_stats, render_summary, summary_query
+from materialized import MODES, MaterializedViews, parse_limits
+from prefix_index import WORD, PrefixIndex
+from query_metrics import PoolStats, QueryMetrics, QueryTiming, SlowQueryLog, profile_operators
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
 # --- Config ---
 NEO4J_URI = (
     os.getenv("NEO4J_BOLT_URL")
@@ -21,6 +42,22 @@ NEO4J_URI = (
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASS = os.getenv("NEO4J_PASSWORD")
 NEO4J_AUTH_RAW = os.getenv("NEO4J_AUTH")
+POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+POOL_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "128"))
+GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL", "300"))
+GRAPH_MATERIALIZED_DIR = Path(os.getenv("GRAPH_MATERIALIZED_DIR", "materialized"))
+# 800 is the /graph default, 1000 is what the UI asks for
+GRAPH_MATERIALIZED_LIMITS = parse_limits(os.getenv("GRAPH_MATERIALIZED_LIMITS", "800,1000"))
+GRAPH_MATERIALIZE_ON_STARTUP = os.getenv("GRAPH_MATERIALIZE_ON_STARTUP", "1") == "1"
+GRAPH_MATERIALIZED_MAX_AGE = float(os.getenv("GRAPH_MATERIALIZED_MAX_AGE", "3600"))
+GRAPH_SESSION_TTL = float(os.getenv("GRAPH_SESSION_TTL", "900"))
+GRAPH_MAX_SESSIONS = int(os.getenv("GRAPH_MAX_SESSIONS", "1000"))
+STREAM_FETCH_SIZE = int(os.getenv("STREAM_FETCH_SIZE", "500"))
+FOCUS_SEED_LIMIT = int(os.getenv("GRAPH_FOCUS_SEED_LIMIT", "100"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "1000"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
 INDEX_PATH = Path("static/index.html")
 INDEX_V2_PATH = Path("static/v2/index.html")
 INDEX_V2_DIR = INDEX_V2_PATH.parent
@@ -42,13 +79,19 @@ def _credential_candidates() -> list[Tuple[str, str]]:
     return candidates
 
 
-def _create_driver() -> Driver:
+async def _create_driver() -> AsyncDriver:
     last_error: Optional[Exception] = None
     for user, password in _credential_candidates():
+        drv = AsyncGraphDatabase.driver(
+            NEO4J_URI,
+            auth=(user, password),
+            max_connection_pool_size=POOL_SIZE,
+            connection_acquisition_timeout=POOL_ACQUISITION_TIMEOUT,
+            max_connection_lifetime=MAX_CONNECTION_LIFETIME,
+        )
         try:
-            drv = GraphDatabase.driver(NEO4J_URI, auth=(user, password))
-            with drv.session() as session:
-                session.run("RETURN 1")
+            async with drv.session() as session:
+                await session.run("RETURN 1")
             global NEO4J_USER, NEO4J_PASS
             NEO4J_USER, NEO4J_PASS = user, password
             return drv
@@ -56,39 +99,194 @@ def _create_driver() -> Driver:
             last_error = exc
         except ServiceUnavailable as exc:
             last_error = exc
+        await drv.close()
     raise RuntimeError(
         f"Failed to connect to Neo4j at {NEO4J_URI!r} with available credentials: {last_error}"
     )
 
+
+class CompactJSONResponse(JSONResponse):
+    """JSON without whitespace, encoded with orjson when it's installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
 # --- App / Driver ---
-driver = _create_driver()
+driver: Optional[AsyncDriver] = None
+pool_stats = PoolStats(POOL_SIZE, POOL_ACQUISITION_TIMEOUT, MAX_CONNECTION_LIFETIME)
+graph_cache = GraphCache(GRAPH_CACHE_SIZE, GRAPH_CACHE_TTL)
+materialized_views = MaterializedViews(GRAPH_MATERIALIZED_DIR, GRAPH_MATERIALIZED_LIMITS, GRAPH_MATERIALIZED_MAX_AGE)
+query_metrics = QueryMetrics("graphvis", unit="request")
+slow_queries = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE, logging.getLogger("graphvis"))
+# timings of the request being served; cache loads run in tasks that inherit it
+request_timing: ContextVar[Optional[QueryTiming]] = ContextVar("request_timing", default=None)
+materialize_task: Optional[asyncio.Task] = None
+graph_sessions = GraphSessions(GRAPH_MAX_SESSIONS, GRAPH_SESSION_TTL)
+name_index = PrefixIndex()
+name_index_task: Optional[asyncio.Task] = None
 app = FastAPI(title="FNV Graph Viz")
 
+
+@app.on_event("startup")
+async def startup():
+    global driver
+    driver = await _create_driver()
+    if GRAPH_MATERIALIZE_ON_STARTUP and materialized_views.enabled and materialized_views.missing():
+        schedule_materialize()
+    schedule_name_index()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if materialize_task is not None:
+        materialize_task.cancel()
+    if name_index_task is not None:
+        name_index_task.cancel()
+    if driver is not None:
+        await driver.close()
+
+
+@asynccontextmanager
+async def pooled_session() -> AsyncIterator[Any]:
+    pool_stats.acquire()
+    try:
+        async with driver.session() as session:
+            yield session
+    finally:
+        pool_stats.release()
+
 app.mount("/v2/css", StaticFiles(directory=INDEX_V2_DIR / "css"), name="v2-css")
 app.mount("/v2/js", StaticFiles(directory=INDEX_V2_DIR / "js"), name="v2-js")
 
 
 @app.get("/", response_class=HTMLResponse)
-def home():
+async def home():
     return INDEX_PATH.read_text(encoding="utf-8")
 
 
 @app.get("/v2/", response_class=HTMLResponse)
-def home_v2():
+async def home_v2():
     return INDEX_V2_PATH.read_text(encoding="utf-8")
 
 
 # ---------- Shared helpers ----------
 
-def _focus_clauses(mode: str, focusType: Optional[str], focus: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+# Name searches that resolve to seeds: (mode, focusType) -> the variable the seeds bind
+FOCUS_SEARCHES = {
+    ("filings", "company"): "company",
+    ("holdings", "company"): "company",
+    ("holdings", "manager"): "manager",
+    ("sections", "company"): "company",
+}
+
+COMPANY_SEEDS_QUERY = """
+CALL {
+  CALL db.index.fulltext.queryNodes('fullTextCompanyNames', $search) YIELD node
+  RETURN node LIMIT $seedLimit
+  UNION
+  MATCH (node:Company {cusip6: $focus}) RETURN node
+  %s
+}
+RETURN collect(elementId(node)) AS seeds
+"""
+COMPANY_CIK_SEEDS = "UNION MATCH (node:Company) WHERE node.cik IN [$focus, $focusInt] RETURN node"
+
+MANAGER_SEEDS_QUERY = """
+CALL {
+  CALL db.index.fulltext.queryNodes('fullTextManagerNames', $search) YIELD node
+  RETURN node LIMIT $seedLimit
+  UNION
+  MATCH (node:Manager {cik: $focus}) RETURN node
+  %s
+}
+RETURN collect(elementId(node)) AS seeds
+"""
+MANAGER_CIK_SEEDS = "UNION MATCH (node:Manager {cik: $focusInt}) RETURN node"
+
+
+NAME_INDEX_QUERY = """
+MATCH (com:Company)
+RETURN 'company' AS kind, coalesce(com.companyName, com.name, com.names[0]) AS name, com.cusip6 AS key
+UNION ALL
+MATCH (mgr:Manager)
+RETURN 'manager' AS kind, coalesce(mgr.managerName, mgr.name) AS name,
+       toString(coalesce(mgr.managerCik, mgr.cik)) AS key
+"""
+
+
+def _focus_int(focus: str) -> Optional[int]:
+    try:
+        return int(focus.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def fulltext_search(focus: str) -> str:
+    """A Lucene query matching names with words starting with each word of `focus`."""
+    return " AND ".join(f"{word}*" for word in WORD.findall(focus.lower()))
+
+
+def seed_query(mode: str, focusType: Optional[str], focus: Optional[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    The query that resolves a name focus to the element ids of matching nodes, or None
+    when the focus is a plain key lookup (form, cusip, item, chunk) that needs no seeds.
+    """
+    if not focusType or not focus or (mode, focusType) not in FOCUS_SEARCHES:
+        return None
+    focus_int = _focus_int(focus)
+    if FOCUS_SEARCHES[(mode, focusType)] == "manager":
+        cypher = MANAGER_SEEDS_QUERY % (MANAGER_CIK_SEEDS if focus_int is not None else "")
+    else:
+        # company cik isn't indexed, so it's only tried for a numeric focus
+        with_cik = focus_int is not None and mode == "filings"
+        cypher = COMPANY_SEEDS_QUERY % (COMPANY_CIK_SEEDS if with_cik else "")
+    search = fulltext_search(focus)
+    if not search:
+        # nothing to search for by name; match no names, keep the key lookups
+        search = "__no_name__"
+    params = {"search": search, "seedLimit": FOCUS_SEED_LIMIT, "focus": focus, "focusInt": focus_int}
+    return cypher, params
+
+
+def _seeded(mode: str, focusType: Optional[str], focus: Optional[str], seeds: Optional[List[str]]) -> bool:
+    """Whether the focus was resolved to seeds up front, through the fulltext and key indexes."""
+    return bool(focusType and focus) and seeds is not None and (mode, focusType) in FOCUS_SEARCHES
+
+
+def _sections_match(where_clause: str, seeded: bool) -> str:
+    """
+    The driving pattern of the sections mode. A company focus resolved to seeds
+    starts from those companies instead of filtering the sections of every form.
+    """
+    if seeded:
+        return """
+        MATCH (company:Company) WHERE elementId(company) IN $seeds
+        MATCH (company)-[filed:FILED]->(form:Form)-[sectionRel:SECTION]->(section:Chunk)
+        WITH form, sectionRel, section, company, filed
+        """
+    return f"""
+        MATCH (form:Form)-[sectionRel:SECTION]->(section:Chunk)
+        OPTIONAL MATCH (company:Company)-[filed:FILED]->(form)
+        WITH form, sectionRel, section, company, filed
+        {where_clause}
+        """
+
+
+def _focus_clauses(
+    mode: str, focusType: Optional[str], focus: Optional[str], seeds: Optional[List[str]] = None
+) -> Tuple[str, Dict[str, Any]]:
     if not focusType or not focus:
         return "", {}
 
+    if _seeded(mode, focusType, focus, seeds):
+        # resolved up front through the fulltext and key indexes
+        return f"WHERE elementId({FOCUS_SEARCHES[(mode, focusType)]}) IN $seeds", {"seeds": seeds}
+
     params: Dict[str, Any] = {"focus": focus, "focusLower": focus.lower()}
-    try:
-        params["focusInt"] = int(focus.replace(",", ""))
-    except ValueError:
-        params["focusInt"] = None
+    params["focusInt"] = _focus_int(focus)
 
     if mode == "filings":
         if focusType == "company":
@@ -138,8 +336,10 @@ def _focus_clauses(mode: str, focusType: Optional[str], focus: Optional[str]) ->
     return clause, params
 
 
-def build_query(mode: str, focusType: Optional[str], focus: Optional[str], limit: int) -> Tuple[str, Dict[str, Any]]:
-    where_clause, focus_params = _focus_clauses(mode, focusType, focus)
+def build_query(
+    mode: str, focusType: Optional[str], focus: Optional[str], limit: int, seeds: Optional[List[str]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    where_clause, focus_params = _focus_clauses(mode, focusType, focus, seeds)
     params: Dict[str, Any] = {"limit": limit, **focus_params}
 
     if mode == "holdings":
@@ -153,10 +353,7 @@ def build_query(mode: str, focusType: Optional[str], focus: Optional[str], limit
         """
     elif mode == "sections":
         cypher = f"""
-        MATCH (form:Form)-[sectionRel:SECTION]->(section:Chunk)
-        OPTIONAL MATCH (company:Company)-[filed:FILED]->(form)
-        WITH form, sectionRel, section, company, filed
-        {where_clause}
+        {_sections_match(where_clause, _seeded(mode, focusType, focus, seeds))}
         OPTIONAL MATCH (section)-[nextRel:NEXT]->(nextChunk:Chunk)
         OPTIONAL MATCH (section)<-[prevRel:NEXT]-(prevChunk:Chunk)
         RETURN form, company, filed, sectionRel, section, nextRel, nextChunk, prevRel, prevChunk
@@ -176,41 +373,170 @@ def build_query(mode: str, focusType: Optional[str], focus: Optional[str], limit
     return cypher, params
 
 
-def to_graph(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+# The driving pattern of each mode: its relationship is the page key, and the
+# variables bound with it before the OPTIONAL MATCHes are carried through the keyset.
+PAGE_ANCHORS = {
+    "filings": ("filed", ("company", "form")),
+    "holdings": ("owns", ("manager", "company")),
+    "sections": ("sectionRel", ("form", "section", "company", "filed")),
+}
+
+
+def build_page_query(
+    mode: str,
+    focusType: Optional[str],
+    focus: Optional[str],
+    after: Optional[str],
+    page_size: int,
+    seeds: Optional[List[str]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    One page of a mode's query, keyset-paginated on the element id of its driving relationship.
+
+    A page holds `page_size` driving relationships, each expanded by the mode's OPTIONAL MATCHes,
+    and every record carries its `pageKey` for the next cursor. The rows of a key (a section
+    of a form filed by several companies, say) are collected into one before the `LIMIT`,
+    so a page never ends partway through a key that the next page's `> $after` would skip.
+    """
+    where_clause, focus_params = _focus_clauses(mode, focusType, focus, seeds)
+    params: Dict[str, Any] = {"after": after, "pageSize": page_size, **focus_params}
+    key, carried = PAGE_ANCHORS[mode]
+    columns = ", ".join(carried)
+    unpacked = ", ".join(f"keyRow[{i}] AS {name}" for i, name in enumerate(carried))
+    keyset = f"""
+        WITH {key}, {columns}
+          WHERE $after IS NULL OR elementId({key}) > $after
+        WITH {key}, collect([{columns}]) AS keyRows
+          ORDER BY elementId({key})
+          LIMIT $pageSize
+        UNWIND keyRows AS keyRow
+        WITH {key}, {unpacked}
+    """
+
+    if mode == "holdings":
+        cypher = f"""
+        MATCH (manager:Manager)-[owns:OWNS_STOCK_IN]->(company:Company)
+        {where_clause}
+        {keyset}
+        OPTIONAL MATCH (company)-[filed:FILED]->(form:Form)
+        RETURN manager, owns, company, form, filed, elementId(owns) AS pageKey
+        """
+    elif mode == "sections":
+        cypher = f"""
+        {_sections_match(where_clause, _seeded(mode, focusType, focus, seeds))}
+        {keyset}
+        OPTIONAL MATCH (section)-[nextRel:NEXT]->(nextChunk:Chunk)
+        OPTIONAL MATCH (section)<-[prevRel:NEXT]-(prevChunk:Chunk)
+        RETURN form, company, filed, sectionRel, section, nextRel, nextChunk, prevRel, prevChunk,
+               elementId(sectionRel) AS pageKey
+        """
+    else:  # filings
+        cypher = f"""
+        MATCH (company:Company)-[filed:FILED]->(form:Form)
+        {where_clause}
+        {keyset}
+        OPTIONAL MATCH (company)<-[owns:OWNS_STOCK_IN]-(manager:Manager)
+        OPTIONAL MATCH (form)-[sectionRel:SECTION]->(section:Chunk)
+        OPTIONAL MATCH (section)-[nextRel:NEXT]->(nextChunk:Chunk)
+        RETURN company, filed, form, manager, owns, sectionRel, section, nextRel, nextChunk,
+               elementId(filed) AS pageKey
+        """
+
+    return cypher, params
+
+
+def encode_cursor(after: str, session_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after": after, "session": session_id}).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    if not cursor:
+        return None, None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after, session_id = data["after"], data["session"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after, str) or not isinstance(session_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after, session_id
+
+
+def sse_event(event: str, payload: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n".encode("utf-8")
+
+
+HIDDEN_PROPS = {"textEmbedding", "summaryEmbeddings"}
+TEXT_PREVIEW_CHARS = 600
+
+
+def sanitize_props(data: Dict[str, Any]) -> Dict[str, Any]:
+    props = {
+        k: v for k, v in data.items() if k not in HIDDEN_PROPS
+    }
+    text_val = props.get("text")
+    if isinstance(text_val, str) and len(text_val) > TEXT_PREVIEW_CHARS:
+        props["text"] = text_val[:TEXT_PREVIEW_CHARS] + "…"
+    return props
+
+
+def node_name(node_label: str, props: Mapping[str, Any]) -> str:
+    name_val = props.get("name") or props.get("companyName") or props.get("managerName")
+    if name_val:
+        return str(name_val)
+    if node_label == "Form" and props.get("formId"):
+        return str(props["formId"])
+    if node_label == "Company" and props.get("cusip6"):
+        label_name = name_val or props.get("names") or "Company"
+        if isinstance(label_name, list) and label_name:
+            label_name = label_name[0]
+        return f"{label_name} ({props['cusip6']})"
+    if node_label == "Manager":
+        cik_val = props.get("cik") or props.get("managerCik")
+        return f"{name_val or 'Manager'} ({cik_val})" if cik_val else str(name_val or "Manager")
+    if node_label == "Chunk":
+        text = props.get("text") or props.get("chunkId") or "Chunk"
+        return str(text)[:80] + ("…" if isinstance(text, str) and len(text) > 80 else "")
+    if props.get("chunkId"):
+        return str(props["chunkId"])
+    return f"{node_label}"
+
+
+def node_metric(props: Mapping[str, Any]) -> Any:
+    # text is measured as sanitize_props leaves it, so raw and sanitized props agree
+    return (
+        props.get("value")
+        or props.get("shares")
+        or props.get("amount")
+        or (min(len(props.get("text", "")), TEXT_PREVIEW_CHARS + 1) if props.get("text") else 1)
+    )
+
+
+def rel_nodes(rel: Relationship) -> Tuple[Optional[Node], Optional[Node]]:
+    start = getattr(rel, "start_node", None)
+    end = getattr(rel, "end_node", None)
+    if (start is None or end is None) and hasattr(rel, "nodes"):
+        nodes = rel.nodes
+        if nodes and len(nodes) == 2:
+            start, end = nodes
+    return start, end
+
+
+def to_graph(
+    records: Iterable[Dict[str, Any]],
+    seen_nodes: Optional[set[Any]] = None,
+    seen_links: Optional[set[Tuple[Any, Any, str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Collect the nodes and relationships in `records` as a force-graph payload.
+
+    Pass `seen_nodes` / `seen_links` from earlier pages to leave out what
+    the client already has; they are updated in place.
+    """
     nodes: list[Dict[str, Any]] = []
     links: list[Dict[str, Any]] = []
-    seen_nodes: set[Any] = set()
-    seen_links: set[Tuple[Any, Any, str]] = set()
-
-    def sanitize_props(data: Dict[str, Any]) -> Dict[str, Any]:
-        props = {
-            k: v for k, v in data.items() if k not in {"textEmbedding", "summaryEmbeddings"}
-        }
-        text_val = props.get("text")
-        if isinstance(text_val, str) and len(text_val) > 600:
-            props["text"] = text_val[:600] + "…"
-        return props
-
-    def node_name(node_label: str, props: Dict[str, Any]) -> str:
-        name_val = props.get("name") or props.get("companyName") or props.get("managerName")
-        if name_val:
-            return str(name_val)
-        if node_label == "Form" and props.get("formId"):
-            return str(props["formId"])
-        if node_label == "Company" and props.get("cusip6"):
-            label_name = name_val or props.get("names") or "Company"
-            if isinstance(label_name, list) and label_name:
-                label_name = label_name[0]
-            return f"{label_name} ({props['cusip6']})"
-        if node_label == "Manager":
-            cik_val = props.get("cik") or props.get("managerCik")
-            return f"{name_val or 'Manager'} ({cik_val})" if cik_val else str(name_val or "Manager")
-        if node_label == "Chunk":
-            text = props.get("text") or props.get("chunkId") or "Chunk"
-            return str(text)[:80] + ("…" if isinstance(text, str) and len(text) > 80 else "")
-        if props.get("chunkId"):
-            return str(props["chunkId"])
-        return f"{node_label}"
+    seen_nodes = set() if seen_nodes is None else seen_nodes
+    seen_links = set() if seen_links is None else seen_links
 
     def add_node(node: Node) -> None:
         if not isinstance(node, Node):
@@ -220,18 +546,12 @@ def to_graph(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         seen_nodes.add(node.id)
         label = next(iter(node.labels)) if node.labels else "Node"
         props = sanitize_props(dict(node.items()))
-        metric = (
-            props.get("value")
-            or props.get("shares")
-            or props.get("amount")
-            or (len(props.get("text", "")) if props.get("text") else 1)
-        )
         nodes.append(
             {
                 "id": node.id,
                 "label": label,
                 "name": node_name(label, props),
-                "metric": metric,
+                "metric": node_metric(props),
                 "props": props,
             }
         )
@@ -239,12 +559,7 @@ def to_graph(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
     def add_relationship(rel: Relationship) -> None:
         if not isinstance(rel, Relationship):
             return
-        start = getattr(rel, "start_node", None)
-        end = getattr(rel, "end_node", None)
-        if (start is None or end is None) and hasattr(rel, "nodes"):
-            rel_nodes = rel.nodes
-            if rel_nodes and len(rel_nodes) == 2:
-                start, end = rel_nodes
+        start, end = rel_nodes(rel)
         if start is None or end is None:
             return
         add_node(start)
@@ -283,104 +598,455 @@ def to_graph(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
     return {"nodes": nodes, "links": links}
 
 
-def summarize_graph(mode: str, focusType: Optional[str], focus: Optional[str], graph: Dict[str, Any]) -> str:
-    # Basic stats
-    labels = [n["label"] for n in graph["nodes"]]
-    counts = Counter(labels)
-    by_label_names = defaultdict(list)
-    for n in graph["nodes"]:
-        name = str(n.get("name", ""))
-        if name:
-            by_label_names[n["label"]].append(name)
-
-    # relationship flavors
-    link_types = Counter(l["type"] for l in graph["links"])
-    # top apps and endpoints by degree (proxy for impact)
-    deg = Counter()
-    for l in graph["links"]:
-        deg[l["source"]] += 1
-        deg[l["target"]] += 1
-    id_to = {n["id"]: n for n in graph["nodes"]}
-    top_nodes = [id_to[i]["name"] for i, _ in deg.most_common(5) if i in id_to]
-    top_managers = [
-        id_to[i]["name"]
-        for i, _ in deg.most_common()
-        if i in id_to and id_to[i]["label"] == "Manager"
-    ][:3]
-    top_companies = [
-        id_to[i]["name"]
-        for i, _ in deg.most_common()
-        if i in id_to and id_to[i]["label"] == "Company"
-    ][:3]
-    top_forms = [
-        id_to[i]["name"]
-        for i, _ in deg.most_common()
-        if i in id_to and id_to[i]["label"] == "Form"
-    ][:3]
-    top_chunks = [
-        id_to[i]["name"]
-        for i, _ in deg.most_common()
-        if i in id_to and id_to[i]["label"] == "Chunk"
-    ][:3]
-
-    # compose a short narrative
-    focus_str = ""
-    if focusType and focus:
-        focus_str = f" Focus: {focusType} = “{focus}”."
-
-    parts = []
-    parts.append(f"{mode.capitalize()} view with {len(graph['nodes'])} nodes / {len(graph['links'])} links.{focus_str}")
-
-    # label counts
-    if counts:
-        label_bits = ", ".join(f"{k}:{v}" for k, v in counts.most_common())
-        parts.append(f" Node mix → {label_bits}.")
-
-    # link types
-    if link_types:
-        link_bits = ", ".join(f"{k}:{v}" for k, v in link_types.most_common())
-        parts.append(f" Relations → {link_bits}.")
-
-    # impact highlights
-    if mode == "holdings" and top_managers:
-        parts.append(f" Top managers: {', '.join(top_managers)}.")
-    if mode in {"filings", "holdings"} and top_companies:
-        parts.append(f" Key companies: {', '.join(top_companies)}.")
-    if mode == "filings" and top_forms:
-        parts.append(f" Active filings: {', '.join(top_forms)}.")
-    if mode == "sections" and top_chunks:
-        parts.append(f" Dense chunks: {', '.join(top_chunks)}.")
-    if top_nodes:
-        parts.append(f" Overall hubs: {', '.join(top_nodes)}.")
-
-    # gentle callout based on mode
-    if mode == "filings":
-        parts.append(" Suggestion: review company narratives alongside filing sections for emerging risks.")
-    elif mode == "holdings":
-        parts.append(" Suggestion: compare position sizes across managers to spot concentration or consensus trades.")
-    elif mode == "sections":
-        parts.append(" Suggestion: follow NEXT chains to capture surrounding context before quoting a chunk.")
+def to_compact_graph(records: Iterable[Dict[str, Any]], fields: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Same graph as `to_graph`, laid out as parallel arrays.
+
+    Labels and relationship types are interned into `labels` / `types` and
+    referenced by index, links refer to nodes by their index in the node
+    arrays, and only the properties named in `fields` are sent, one array
+    per field (null where an entity doesn't have it).
+    """
+    fields = [f for f in fields if f not in HIDDEN_PROPS]
+    labels: Dict[str, int] = {}
+    types: Dict[str, int] = {}
+    node_index: Dict[str, int] = {}
+    node_ids: list[Any] = []
+    node_labels: list[int] = []
+    node_names: list[str] = []
+    node_metrics: list[Any] = []
+    node_props: Dict[str, list[Any]] = {f: [] for f in fields}
+    seen_links: set[Tuple[int, int, str]] = set()
+    link_sources: list[int] = []
+    link_targets: list[int] = []
+    link_types: list[int] = []
+    link_props: Dict[str, list[Any]] = {f: [] for f in fields}
+
+    def add_node(node: Node) -> int:
+        # keyed on element_id: reading the deprecated `id` warns, so it's read once per node
+        index = node_index.get(node.element_id)
+        if index is not None:
+            return index
+        index = node_index[node.element_id] = len(node_ids)
+        label = next(iter(node.labels)) if node.labels else "Node"
+        node_ids.append(node.id)
+        node_labels.append(labels.setdefault(label, len(labels)))
+        # read straight from the node; only the requested props are copied
+        node_names.append(node_name(label, node))
+        node_metrics.append(node_metric(node))
+        for f, values in node_props.items():
+            value = node.get(f)
+            if f == "text" and isinstance(value, str) and len(value) > TEXT_PREVIEW_CHARS:
+                value = value[:TEXT_PREVIEW_CHARS] + "…"
+            values.append(value)
+        return index
+
+    def add_relationship(rel: Relationship) -> None:
+        start, end = rel_nodes(rel)
+        if start is None or end is None:
+            return
+        source, target = add_node(start), add_node(end)
+        key = (source, target, rel.type)
+        if key in seen_links:
+            return
+        seen_links.add(key)
+        link_sources.append(source)
+        link_targets.append(target)
+        link_types.append(types.setdefault(rel.type, len(types)))
+        for f, values in link_props.items():
+            values.append(rel.get(f))
+
+    def handle(value: Any) -> None:
+        if value is None:  # unmatched OPTIONAL MATCH columns
+            return
+        if isinstance(value, Node):
+            add_node(value)
+        elif isinstance(value, Relationship):
+            add_relationship(value)
+        elif isinstance(value, NeoPath):
+            for path_node in value.nodes:
+                add_node(path_node)
+            for path_rel in value.relationships:
+                add_relationship(path_rel)
+        elif isinstance(value, Iterable) and not isinstance(value, (str, bytes, dict)):
+            for item in value:
+                handle(item)
+
+    for record in records:
+        for value in record.values():
+            handle(value)
+
+    return {
+        "format": "compact",
+        "labels": list(labels),
+        "types": list(types),
+        "nodes": {
+            "id": node_ids,
+            "label": node_labels,
+            "name": node_names,
+            "metric": node_metrics,
+            "props": node_props,
+        },
+        "links": {
+            "source": link_sources,
+            "target": link_targets,
+            "type": link_types,
+            "props": link_props,
+        },
+    }
+
+
+async def read_records(cypher: str, params: Dict[str, Any]) -> List[Any]:
+    """Run a graph query and read every record, timing it for the current request."""
+    timing = request_timing.get()
+    async with pooled_session() as s:
+        run_started = time.perf_counter()
+        result = await s.run(cypher, **params)
+        if timing is not None:
+            timing.ran(run_started)
+        recs = [rec async for rec in result]
+        summary = await result.consume()
+    if timing is not None:
+        timing.summarize(summary)
+        timing.rows += len(recs)
+    return recs
+
+
+def timed_build(build, recs: Sequence[Any], *args: Any) -> Any:
+    started = time.perf_counter()
+    graph = build(recs, *args)
+    timing = request_timing.get()
+    if timing is not None:
+        timing.add("serialize", started)
+    return graph
+
+
+def timed_response(endpoint: str, request: Dict[str, Any], response: Response, timing: QueryTiming) -> Response:
+    """Report the request's timings in a `Server-Timing` header and record them."""
+    timing.bytes = len(response.body)
+    response.headers["Server-Timing"] = timing.server_timing()
+    query_metrics.observe(endpoint, timing, slow_queries.check(endpoint, request, timing))
+    return response
+
+
+def start_timing() -> QueryTiming:
+    # a request that never runs a query was served from the cache
+    timing = QueryTiming(source="cache")
+    request_timing.set(timing)
+    return timing
+
+
+async def resolve_focus_seeds(mode: str, focusType: Optional[str], focus: Optional[str]) -> Optional[List[str]]:
+    """
+    Element ids of the nodes a name focus matches, looked up through the fulltext
+    and key indexes so the graph query expands from them instead of scanning names.
+
+    None means there is nothing to resolve, or the indexes aren't there yet,
+    and the graph query falls back to matching the focus itself.
+    """
+    seed = seed_query(mode, focusType, focus)
+    if seed is None:
+        return None
+    cypher, params = seed
+
+    async def load() -> Optional[List[str]]:
+        try:
+            async with pooled_session() as s:
+                result = await s.run(cypher, **params)
+                rec = await result.single()
+        except ClientError:
+            return None
+        return rec["seeds"] if rec is not None else []
+
+    return await graph_cache.get_or_load(cache_key(cypher, params), load)
+
+
+async def fetch_graph(
+    mode: str,
+    focusType: Optional[str],
+    focus: Optional[str],
+    limit: int,
+    compact_fields: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the mode's query and build its graph, served from `graph_cache` when possible.
+    With `compact_fields`, the graph is built by `to_compact_graph` with those fields.
+    """
+    seeds = await resolve_focus_seeds(mode, focusType, focus)
+    cypher, params = build_query(mode, focusType, focus, limit, seeds)
+    if compact_fields is not None:
+        async def load() -> Dict[str, Any]:
+            recs = await read_records(cypher, params)
+            return timed_build(to_compact_graph, recs, compact_fields)
+
+        key_params = {**params, "format": "compact", "fields": list(compact_fields)}
+        return await graph_cache.get_or_load(cache_key(cypher, key_params), load)
+
+    async def load() -> Dict[str, Any]:
+        if materialized_views.covers(mode, focusType, focus, limit):
+            graph = materialized_views.get_graph(mode, limit)
+            if graph is not None:
+                timing = request_timing.get()
+                if timing is not None:
+                    timing.source = "materialized"
+                return graph
+        recs = await read_records(cypher, params)
+        return timed_build(to_graph, recs)
+
+    return await graph_cache.get_or_load(cache_key(cypher, params), load)
+
+
+async def fetch_summary_stats(mode: str, focusType: Optional[str], focus: Optional[str], limit: int) -> Dict[str, Any]:
+    """
+    Node and relationship counts and per-label hubs of the mode's view.
+
+    A graph `/graph` already cached or materialized is summarized in one pass;
+    otherwise Neo4j aggregates the view and returns a single row, so no
+    property maps cross the wire and the cost doesn't grow with `limit`.
+    """
+    seeds = await resolve_focus_seeds(mode, focusType, focus)
+    cypher, params = build_query(mode, focusType, focus, limit, seeds)
+    graph = graph_cache.get(cache_key(cypher, params))
+    if graph is None and materialized_views.covers(mode, focusType, focus, limit):
+        graph = materialized_views.get_graph(mode, limit)
+    if graph is not None:
+        return graph_stats(graph)
+
+    summary_cypher, summary_params = summary_query(mode, cypher, params)
+
+    async def load() -> Dict[str, Any]:
+        recs = await read_records(summary_cypher, summary_params)
+        return record_stats(recs[0], node_name)
+
+    return await graph_cache.get_or_load(cache_key(summary_cypher, summary_params), load)
+
+
+class StreamSession:
+    """
+    A pooled session that a streaming response keeps after its handler returns.
+
+    The stream releases it when it ends, and the response's background task
+    does too, in case the client goes away before the stream starts; only the
+    first `release` closes the session and returns its pool slot.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.released = False
+
+    async def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        try:
+            await self.session.close()
+        finally:
+            pool_stats.release()
+
+
+async def stream_graph(stream_session: StreamSession, result, batch_size: int) -> AsyncIterator[bytes]:
+    # Build and send the graph a batch of records at a time; the driver only
+    # fetches more records as earlier batches are written out.
+    seen_nodes: set[Any] = set()
+    seen_links: set[Tuple[Any, Any, str]] = set()
+    batch: list[Any] = []
+    nodes = links = 0
+    try:
+        async for rec in result:
+            batch.append(rec)
+            if len(batch) >= batch_size:
+                page = to_graph(batch, seen_nodes, seen_links)
+                batch = []
+                nodes, links = nodes + len(page["nodes"]), links + len(page["links"])
+                if page["nodes"] or page["links"]:
+                    yield sse_event("batch", page)
+        if batch:
+            page = to_graph(batch, seen_nodes, seen_links)
+            nodes, links = nodes + len(page["nodes"]), links + len(page["links"])
+            yield sse_event("batch", page)
+        yield sse_event("end", {"nodes": nodes, "links": links})
+    except Exception as e:
+        yield sse_event("error", {"detail": f"Cypher error: {e}"})
+    finally:
+        await stream_session.release()
+
+
+async def materialize() -> Dict[str, Any]:
+    """
+    Rebuild every materialized view: one query per mode at the largest tier,
+    with each smaller tier built from the leading records, as `LIMIT` would return them.
+    Stops without storing anything more if the views are invalidated meanwhile.
+    """
+    started = time.perf_counter()
+    generation = materialized_views.generation
+    sizes: Dict[str, int] = {}
+    for mode in MODES:
+        cypher, params = build_query(mode, None, None, max(materialized_views.limits))
+        async with pooled_session() as s:
+            result = await s.run(cypher, **params)
+            recs = [rec async for rec in result]
+        for limit in materialized_views.limits:
+            graph = to_graph(recs[:limit])
+            size = await asyncio.to_thread(materialized_views.write, mode, limit, graph, generation)
+            if size is None:
+                # the graph changed while this ran; the invalidate scheduled a newer rebuild
+                return sizes
+            sizes[f"{mode}-{limit}"] = size
+    materialized_views.record_refresh(time.perf_counter() - started)
+    return sizes
+
+
+async def build_name_index() -> int:
+    """Reload the typeahead index with every company and manager name."""
+    async with pooled_session() as s:
+        result = await s.run(NAME_INDEX_QUERY)
+        entries = [(rec["kind"], rec["name"], rec["key"]) async for rec in result]
+    await asyncio.to_thread(name_index.build, entries)
+    return len(name_index)
+
+
+def schedule_name_index() -> asyncio.Task:
+    """Rebuild the typeahead index in the background, replacing any rebuild still running."""
+    global name_index_task
+    if name_index_task is not None and not name_index_task.done():
+        name_index_task.cancel()
+    name_index_task = asyncio.ensure_future(build_name_index())
+    return name_index_task
 
-    return " ".join(parts)
+
+def schedule_materialize() -> asyncio.Task:
+    """Rebuild the materialized views in the background, replacing any rebuild still running."""
+    global materialize_task
+    if materialize_task is not None and not materialize_task.done():
+        materialize_task.cancel()
+    materialize_task = asyncio.ensure_future(materialize())
+    return materialize_task
+
+
+def refresh_expired_views() -> None:
+    """Rebuild the materialized views in the background once one has aged out, unless a rebuild is running."""
+    if materialize_task is None or materialize_task.done():
+        schedule_materialize()
 
 
 # ---------- Endpoints ----------
 
 @app.get("/graph")
-def graph(
+async def graph(
+    request: Request,
+    mode: str = Query("filings", pattern="^(filings|holdings|sections)$"),
+    limit: int = Query(800, ge=1, le=5000),
+    focusType: Optional[str] = Query(None),
+    focus: Optional[str] = Query(None),
+    format: str = Query("full", pattern="^(full|compact)$"),
+    fields: Optional[str] = Query(None, description="compact format: comma separated props to include"),
+):
+    timing = start_timing()
+    request_info = {"mode": mode, "focusType": focusType, "focus": focus, "limit": limit, "format": format}
+    if materialized_views.covers(mode, focusType, focus, limit) and format == "full":
+        payload = materialized_views.get_bytes(mode, limit)
+        if payload is not None:
+            timing.source = "materialized"
+            # already serialized and compressed; only decompress for clients that can't take gzip
+            if "gzip" in request.headers.get("accept-encoding", ""):
+                response = Response(payload, media_type="application/json", headers={"Content-Encoding": "gzip"})
+            else:
+                response = Response(gzip.decompress(payload), media_type="application/json")
+            return timed_response("graph", request_info, response, timing)
+        if materialized_views.path(mode, limit).exists():
+            refresh_expired_views()
+
+    compact_fields = None
+    response_class = JSONResponse
+    if format == "compact":
+        compact_fields = [f.strip() for f in (fields or "").split(",") if f.strip()]
+        response_class = CompactJSONResponse
+    try:
+        graph = await fetch_graph(mode, focusType, focus, limit, compact_fields)
+    except Exception:
+        query_metrics.error("graph")
+        raise
+    started = time.perf_counter()
+    response = response_class(graph)
+    timing.add("serialize", started)
+    return timed_response("graph", request_info, response, timing)
+
+
+@app.get("/graph/page")
+async def graph_page(
+    mode: str = Query("filings", pattern="^(filings|holdings|sections)$"),
+    pageSize: int = Query(200, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    focusType: Optional[str] = Query(None),
+    focus: Optional[str] = Query(None),
+):
+    """
+    One page of a mode's graph, holding only nodes and links this session hasn't been sent.
+
+    Pages are keyset-paginated on the element id of each mode's driving relationship.
+    Pass `next_cursor` back as `cursor` for the next page; it is null after the last one.
+    """
+    after, session_id = decode_cursor(cursor)
+    session = graph_sessions.get_or_create(session_id)
+    seeds = await resolve_focus_seeds(mode, focusType, focus)
+    cypher, params = build_page_query(mode, focusType, focus, after, pageSize, seeds)
+    timing = start_timing()
+    try:
+        recs = await read_records(cypher, params)
+    except Exception:
+        query_metrics.error("graph_page")
+        raise
+    page = timed_build(to_graph, recs, session.seen_nodes, session.seen_links)
+    session.pages += 1
+
+    keys = {rec["pageKey"] for rec in recs}
+    if len(keys) >= pageSize:
+        next_cursor = encode_cursor(max(keys), session.id)
+    else:
+        next_cursor = None
+        graph_sessions.end(session.id)
+    started = time.perf_counter()
+    response = JSONResponse({**page, "session": session.id, "page": session.pages, "next_cursor": next_cursor})
+    timing.add("serialize", started)
+    request_info = {"mode": mode, "focusType": focusType, "focus": focus, "pageSize": pageSize}
+    return timed_response("graph_page", request_info, response, timing)
+
+
+@app.get("/graph/stream")
+async def graph_stream(
     mode: str = Query("filings", pattern="^(filings|holdings|sections)$"),
     limit: int = Query(800, ge=1, le=5000),
+    batchSize: int = Query(100, ge=1, le=5000),
     focusType: Optional[str] = Query(None),
     focus: Optional[str] = Query(None),
 ):
-    cypher, params = build_query(mode, focusType, focus, limit)
-    with driver.session() as s:
-        recs = s.run(cypher, **params)
-        return JSONResponse(to_graph(recs))
+    """
+    Stream the `/graph` result as server-sent events while the query runs.
+
+    Each ``batch`` event carries the nodes and links first seen in the next
+    `batchSize` records; an ``end`` event closes the stream with the totals.
+    """
+    seeds = await resolve_focus_seeds(mode, focusType, focus)
+    cypher, params = build_query(mode, focusType, focus, limit, seeds)
+
+    # The session outlives this handler; the stream or the response's background task releases it.
+    pool_stats.acquire()
+    stream_session = StreamSession(driver.session(fetch_size=STREAM_FETCH_SIZE))
+    try:
+        result = await stream_session.session.run(cypher, **params)
+    except Exception as e:
+        await stream_session.release()
+        raise HTTPException(status_code=400, detail=f"Cypher error: {e}")
+    return StreamingResponse(
+        stream_graph(stream_session, result, batchSize),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=BackgroundTask(stream_session.release),
+    )
 
 
 @app.get("/summary", response_class=PlainTextResponse)
-def summary(
+async def summary(
     mode: str = Query("filings", pattern="^(filings|holdings|sections)$"),
     limit: int = Query(800, ge=1, le=5000),
     focusType: Optional[str] = Query(None),
@@ -389,8 +1055,108 @@ def summary(
     """
     Returns a concise, human-readable impact explanation for the current subgraph.
     """
-    cypher, params = build_query(mode, focusType, focus, limit)
-    with driver.session() as s:
-        recs = s.run(cypher, **params)
-        g = to_graph(recs)
-    return summarize_graph(mode, focusType, focus, g)
+    timing = start_timing()
+    stats = await fetch_summary_stats(mode, focusType, focus, limit)
+    response = PlainTextResponse(render_summary(mode, focusType, focus, stats))
+    request_info = {"mode": mode, "focusType": focusType, "focus": focus, "limit": limit}
+    return timed_response("summary", request_info, response, timing)
+
+
+@app.get("/graph/profile")
+async def graph_profile(
+    mode: str = Query("filings", pattern="^(filings|holdings|sections)$"),
+    limit: int = Query(800, ge=1, le=5000),
+    focusType: Optional[str] = Query(None),
+    focus: Optional[str] = Query(None),
+):
+    """
+    Run the `/graph` query for these parameters with PROFILE and return db hits per operator.
+    Neither the cache nor the materialized views are used.
+    """
+    seeds = await resolve_focus_seeds(mode, focusType, focus)
+    cypher, params = build_query(mode, focusType, focus, limit, seeds)
+    timing = start_timing()
+    try:
+        async with pooled_session() as s:
+            run_started = time.perf_counter()
+            result = await s.run(f"PROFILE {cypher}", **params)
+            timing.ran(run_started)
+            summary = await result.consume()
+    except Exception as e:
+        query_metrics.error("graph_profile")
+        raise HTTPException(status_code=400, detail=f"Cypher error: {e}")
+    timing.summarize(summary)
+    return {"query": " ".join(cypher.split()), "profile": profile_operators(summary.profile),
+            "timing": timing.as_dict()}
+
+
+@app.get("/typeahead")
+async def typeahead(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    kind: Optional[str] = Query(None, pattern="^(company|manager)$"),
+):
+    """
+    Company and manager names with a word starting with `q`, answered from memory.
+    Use a result's `name` (or `key`, the cusip6 or manager cik) as the `/graph` focus.
+    """
+    return {"results": name_index.search(q, limit, kind), "indexed": len(name_index)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request counts, rows, bytes and per-phase time by endpoint, plus pool and cache sizes."""
+    gauges = {
+        "pool_in_use": ("Sessions checked out of the connection pool.", pool_stats.in_use),
+        "pool_peak_in_use": ("Most sessions checked out at once.", pool_stats.peak_in_use),
+        "cache_entries": ("Graphs held in the result cache.", graph_cache.snapshot()["entries"]),
+    }
+    return PlainTextResponse(query_metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/slow-queries")
+async def slow_query_log():
+    return {"threshold_ms": slow_queries.threshold_ms, "queries": list(slow_queries.entries)}
+
+
+@app.get("/metrics/pool")
+async def pool_metrics():
+    return pool_stats.snapshot()
+
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    return graph_cache.snapshot()
+
+
+@app.get("/metrics/sessions")
+async def session_metrics():
+    return graph_sessions.snapshot()
+
+
+@app.get("/metrics/materialized")
+async def materialized_metrics():
+    return materialized_views.snapshot()
+
+
+@app.post("/cache/invalidate")
+async def invalidate_cache():
+    """
+    Drop cached graphs and materialized views, and start rebuilding the views.
+    Loaders call this after writing to Neo4j.
+    """
+    dropped = materialized_views.invalidate()
+    if materialized_views.enabled:
+        schedule_materialize()
+    schedule_name_index()
+    return {"invalidated": graph_cache.invalidate(), "materialized": dropped}
+
+
+@app.post("/materialized/refresh")
+async def refresh_materialized():
+    """
+    Rebuild the materialized views now and report their compressed sizes.
+    """
+    if not materialized_views.enabled:
+        return {"views": {}}
+    return {"views": await schedule_materialize()}
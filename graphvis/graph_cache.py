@@ -0,0 +1,111 @@
+# graph_cache.py
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+def cache_key(cypher: str, params: Dict[str, Any]) -> str:
+    """Normalize whitespace in the query and sort params so equal requests share a key."""
+    return json.dumps([" ".join(cypher.split()), params], sort_keys=True, default=str)
+
+
+class GraphCache:
+    """
+    Bounded LRU cache with per-entry TTL for `to_graph` payloads.
+
+    Concurrent misses for the same key are coalesced: the first caller
+    starts the load, later callers await the same task (single-flight).
+    Loads are keyed by the generation they started in, so after `invalidate`
+    new callers start a fresh load rather than joining one that may be stale.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await loader()
+
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        flight = (self._generation, key)
+        task = self._inflight.get(flight)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(flight, loader))
+            self._inflight[flight] = task
+        # shield so a disconnecting client doesn't cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    async def _load(self, flight: Tuple[int, str], loader: Callable[[], Awaitable[Any]]) -> Any:
+        generation, key = flight
+        try:
+            value = await loader()
+            # a write invalidated the cache while we were loading; don't keep stale data
+            if generation == self._generation:
+                self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(flight, None)
+
+    def invalidate(self) -> int:
+        """
+        Drop every entry. Loads still in flight finish for their callers but are
+        neither cached nor shared with later callers. Returns the number dropped.
+        """
+        self._generation += 1
+        dropped = len(self._entries)
+        self._entries.clear()
+        return dropped
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,65 @@
+# graph_sessions.py
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+
+class GraphSession:
+    """Nodes and links already sent to one client, so later pages only carry new ones."""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.seen_nodes: Set[Any] = set()
+        self.seen_links: Set[Tuple[Any, Any, str]] = set()
+        self.pages = 0
+
+
+class GraphSessions:
+    """
+    Bounded LRU of paging sessions, each expiring `ttl` seconds after its last page.
+
+    An unknown or expired session id starts a fresh session, so a client
+    that comes back late gets complete pages again rather than an error.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 900.0, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Tuple[float, GraphSession]]" = OrderedDict()
+        self.created = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get_or_create(self, session_id: Optional[str]) -> GraphSession:
+        now = self._clock()
+        entry = self._sessions.get(session_id) if session_id else None
+        if entry is not None and entry[0] <= now:
+            del self._sessions[session_id]
+            self.expired += 1
+            entry = None
+        if entry is None:
+            session = GraphSession(secrets.token_urlsafe(12))
+            self.created += 1
+        else:
+            session = entry[1]
+        self._sessions[session.id] = (now + self.ttl, session)
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        return session
+
+    def end(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "created": self.created,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,151 @@
+# graph_summary.py
+import heapq
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+TOP_HUBS = 5
+
+# The relationship variables each mode's graph query returns. Every node in a
+# record is an endpoint of one of them, so the links determine the whole view.
+SUMMARY_RELATIONSHIPS = {
+    "filings": "filed, owns, sectionRel, nextRel",
+    "holdings": "owns, filed",
+    "sections": "sectionRel, filed, nextRel, prevRel",
+}
+
+# Replaces the graph query's RETURN, so the same `$limit` records are reduced to
+# one row in Neo4j: links deduplicated as `to_graph` does, counts by type and
+# label, and the best connected nodes of each label with just the properties
+# `node_name` reads.
+SUMMARY_AGGREGATION = """
+UNWIND [rel IN [{relationships}] WHERE rel IS NOT NULL] AS rel
+WITH DISTINCT startNode(rel) AS source, endNode(rel) AS target, type(rel) AS type
+WITH collect({{source: source, target: target, type: type}}) AS links
+CALL {{
+  WITH links
+  UNWIND links AS link
+  WITH link.type AS type, count(*) AS count
+  RETURN collect({{type: type, count: count}}) AS types
+}}
+CALL {{
+  WITH links
+  UNWIND links AS link
+  UNWIND [link.source, link.target] AS node
+  WITH node, count(*) AS degree
+  WITH coalesce(head(labels(node)), 'Node') AS label, node, degree ORDER BY degree DESC
+  WITH label, count(*) AS count, collect({{node: node, degree: degree}})[..$topHubs] AS top
+  RETURN collect({{label: label, count: count, hubs: [hub IN top | {{
+    degree: hub.degree,
+    props: {{name: hub.node.name, companyName: hub.node.companyName, managerName: hub.node.managerName,
+             formId: hub.node.formId, cusip6: hub.node.cusip6, names: hub.node.names[..1],
+             cik: hub.node.cik, managerCik: hub.node.managerCik, chunkId: hub.node.chunkId,
+             text: left(hub.node.text, 81)}}
+  }}]}}) AS labels
+}}
+RETURN size(links) AS links, types, labels
+"""
+
+
+def summary_query(mode: str, graph_cypher: str, params: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """The mode's graph query, with its RETURN turned into a WITH that the aggregation follows."""
+    head, _, tail = graph_cypher.rpartition("RETURN ")
+    cypher = head + "WITH " + tail + SUMMARY_AGGREGATION.format(relationships=SUMMARY_RELATIONSHIPS[mode])
+    return cypher, {**params, "topHubs": TOP_HUBS}
+
+
+def record_stats(record: Mapping[str, Any], name_of: Callable[[str, Mapping[str, Any]], str]) -> Dict[str, Any]:
+    """Summary stats from the aggregation's row; `name_of` names a node from its label and props."""
+    labels = record["labels"] or []
+    return {
+        "nodes": sum(entry["count"] for entry in labels),
+        "links": record["links"],
+        "labels": {entry["label"]: entry["count"] for entry in labels},
+        "types": {entry["type"]: entry["count"] for entry in record["types"] or []},
+        "hubs": {
+            entry["label"]: [(name_of(entry["label"], hub["props"]), hub["degree"]) for hub in entry["hubs"]]
+            for entry in labels
+        },
+    }
+
+
+def graph_stats(graph: Dict[str, Any], top_k: int = TOP_HUBS) -> Dict[str, Any]:
+    """The same stats from a graph payload already on hand, in one pass plus a bounded heap per label."""
+    degree: Counter = Counter()
+    types: Counter = Counter()
+    for link in graph["links"]:
+        degree[link["source"]] += 1
+        degree[link["target"]] += 1
+        types[link["type"]] += 1
+    by_label: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for node in graph["nodes"]:
+        by_label[node["label"]].append(node)
+    return {
+        "nodes": len(graph["nodes"]),
+        "links": len(graph["links"]),
+        "labels": {label: len(nodes) for label, nodes in by_label.items()},
+        "types": dict(types),
+        "hubs": {
+            label: [(str(n.get("name", "")), degree[n["id"]])
+                    for n in heapq.nlargest(top_k, nodes, key=lambda n: degree[n["id"]])]
+            for label, nodes in by_label.items()
+        },
+    }
+
+
+def _by_count(counts: Dict[str, int]) -> List[Tuple[str, int]]:
+    return sorted(counts.items(), key=lambda item: -item[1])
+
+
+def _names(hubs: List[Tuple[str, int]], count: int) -> List[str]:
+    return [name for name, degree in hubs if degree > 0 and name][:count]
+
+
+def render_summary(mode: str, focusType: Optional[str], focus: Optional[str], stats: Dict[str, Any]) -> str:
+    """A short narrative of the view: its size, node and relationship mix, and its hubs."""
+    hubs = stats["hubs"]
+    top_nodes = _names(heapq.nlargest(TOP_HUBS, (hub for label_hubs in hubs.values() for hub in label_hubs),
+                                      key=lambda hub: hub[1]), TOP_HUBS)
+    top_managers = _names(hubs.get("Manager", []), 3)
+    top_companies = _names(hubs.get("Company", []), 3)
+    top_forms = _names(hubs.get("Form", []), 3)
+    top_chunks = _names(hubs.get("Chunk", []), 3)
+
+    # compose a short narrative
+    focus_str = ""
+    if focusType and focus:
+        focus_str = f" Focus: {focusType} = “{focus}”."
+
+    parts = []
+    parts.append(f"{mode.capitalize()} view with {stats['nodes']} nodes / {stats['links']} links.{focus_str}")
+
+    # label counts
+    if stats["labels"]:
+        label_bits = ", ".join(f"{k}:{v}" for k, v in _by_count(stats["labels"]))
+        parts.append(f" Node mix → {label_bits}.")
+
+    # link types
+    if stats["types"]:
+        link_bits = ", ".join(f"{k}:{v}" for k, v in _by_count(stats["types"]))
+        parts.append(f" Relations → {link_bits}.")
+
+    # impact highlights
+    if mode == "holdings" and top_managers:
+        parts.append(f" Top managers: {', '.join(top_managers)}.")
+    if mode in {"filings", "holdings"} and top_companies:
+        parts.append(f" Key companies: {', '.join(top_companies)}.")
+    if mode == "filings" and top_forms:
+        parts.append(f" Active filings: {', '.join(top_forms)}.")
+    if mode == "sections" and top_chunks:
+        parts.append(f" Dense chunks: {', '.join(top_chunks)}.")
+    if top_nodes:
+        parts.append(f" Overall hubs: {', '.join(top_nodes)}.")
+
+    # gentle callout based on mode
+    if mode == "filings":
+        parts.append(" Suggestion: review company narratives alongside filing sections for emerging risks.")
+    elif mode == "holdings":
+        parts.append(" Suggestion: compare position sizes across managers to spot concentration or consensus trades.")
+    elif mode == "sections":
+        parts.append(" Suggestion: follow NEXT chains to capture surrounding context before quoting a chunk.")
+
+    return " ".join(parts)
@@ -0,0 +1,158 @@
+# materialized.py
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+MODES = ("filings", "holdings", "sections")
+
+
+def parse_limits(raw: str) -> Tuple[int, ...]:
+    """Parse a comma separated list of limit tiers, e.g. "800,1000"."""
+    return tuple(sorted({int(part) for part in raw.split(",") if part.strip()}))
+
+
+class MaterializedViews:
+    """
+    Precomputed `to_graph` payloads for the unfocused view of each mode, one per limit tier.
+
+    Payloads are stored as gzipped JSON files so they can be sent as-is,
+    and kept in memory once read. Focused requests, and limits that aren't
+    a tier, are not covered and go to Neo4j.
+
+    Views older than `max_age` seconds (0 for no limit) aren't served. Each
+    `invalidate` starts a new generation; a rebuild passes the generation it
+    read the graph in to `write`, which refuses views built before the last
+    invalidate, so a rebuild overtaken by a write never stores stale data.
+    """
+
+    def __init__(self, directory: Path, limits: Iterable[int], max_age: float = 0.0,
+                 clock: Callable[[], float] = time.time):
+        self.directory = Path(directory)
+        self.limits = tuple(sorted(limits))
+        self.max_age = max_age
+        self._clock = clock
+        # (mode, limit) -> (written at, payload)
+        self._payloads: Dict[Tuple[str, int], Tuple[float, bytes]] = {}
+        # writes run in worker threads while invalidate runs on the event loop
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.served = 0
+        self.expired = 0
+        self.discarded = 0
+        self.refreshes = 0
+        self.last_refresh_seconds: Optional[float] = None
+        self.last_refreshed_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.limits)
+
+    def covers(self, mode: str, focusType: Optional[str], focus: Optional[str], limit: int) -> bool:
+        return self.enabled and mode in MODES and not (focusType and focus) and limit in self.limits
+
+    def path(self, mode: str, limit: int) -> Path:
+        return self.directory / f"{mode}-{limit}.json.gz"
+
+    def is_expired(self, written_at: float) -> bool:
+        return self.max_age > 0 and self._clock() - written_at > self.max_age
+
+    def get_bytes(self, mode: str, limit: int) -> Optional[bytes]:
+        """The gzipped JSON payload for a view, or None if it hasn't been materialized or has expired."""
+        entry = self._payloads.get((mode, limit))
+        if entry is None:
+            path = self.path(mode, limit)
+            try:
+                entry = (path.stat().st_mtime, path.read_bytes())
+            except FileNotFoundError:
+                return None
+            self._payloads[(mode, limit)] = entry
+        written_at, payload = entry
+        if self.is_expired(written_at):
+            self._payloads.pop((mode, limit), None)
+            self.expired += 1
+            return None
+        self.served += 1
+        return payload
+
+    def get_graph(self, mode: str, limit: int) -> Optional[Dict[str, Any]]:
+        payload = self.get_bytes(mode, limit)
+        return json.loads(gzip.decompress(payload)) if payload is not None else None
+
+    def write(self, mode: str, limit: int, graph: Dict[str, Any], generation: Optional[int] = None) -> Optional[int]:
+        """
+        Serialize, compress and store a view built from the graph as of `generation`
+        (the current one if None). Returns the compressed size, or None if the
+        views were invalidated since and the view was discarded.
+        """
+        payload = gzip.compress(
+            json.dumps(graph, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+        )
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                self.discarded += 1
+                return None
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.path(mode, limit)
+            # write then rename, so readers never see a half-written file
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+            # stamp the file with the view's clock, so its age reads the same after a restart
+            written_at = self._clock()
+            os.utime(path, (written_at, written_at))
+            self._payloads[(mode, limit)] = (written_at, payload)
+        return len(payload)
+
+    def missing(self) -> list[Tuple[str, int]]:
+        """Views that aren't stored, or are too old to serve."""
+        missing = []
+        for mode in MODES:
+            for limit in self.limits:
+                path = self.path(mode, limit)
+                if not path.exists() or self.is_expired(path.stat().st_mtime):
+                    missing.append((mode, limit))
+        return missing
+
+    def invalidate(self) -> int:
+        """Delete every stored view, so requests go to Neo4j until the next refresh."""
+        dropped = 0
+        with self._lock:
+            self.generation += 1
+            self._payloads.clear()
+            for mode in MODES:
+                for limit in self.limits:
+                    try:
+                        self.path(mode, limit).unlink()
+                        dropped += 1
+                    except FileNotFoundError:
+                        pass
+        return dropped
+
+    def record_refresh(self, seconds: float) -> None:
+        self.refreshes += 1
+        self.last_refresh_seconds = round(seconds, 3)
+        self.last_refreshed_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        views = {}
+        for mode in MODES:
+            for limit in self.limits:
+                path = self.path(mode, limit)
+                views[f"{mode}-{limit}"] = path.stat().st_size if path.exists() else None
+        return {
+            "directory": str(self.directory),
+            "limits": list(self.limits),
+            "max_age": self.max_age,
+            "generation": self.generation,
+            "views": views,
+            "served": self.served,
+            "expired": self.expired,
+            "discarded": self.discarded,
+            "refreshes": self.refreshes,
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "last_refreshed_at": self.last_refreshed_at,
+        }
@@ -0,0 +1,71 @@
+# prefix_index.py
+import bisect
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+WORD = re.compile(r"[0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(WORD.findall(text.lower()))
+
+
+class PrefixIndex:
+    """
+    In-memory typeahead over entity names.
+
+    Every word of a name is a sorted key, so "net" finds both "NETAPP INC"
+    and "PALO ALTO NETWORKS INC"; a lookup is a binary search plus a scan
+    of the matching range.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]] = ()):
+        """`entries` are (kind, name, key) triples, e.g. ("company", "APPLE INC", "037833")."""
+        self._entities: List[Dict[str, str]] = []
+        self._keys: List[str] = []
+        self._refs: List[Tuple[int, int]] = []  # (entity index, word position) per key
+        self.build(entries)
+
+    def build(self, entries: Iterable[Tuple[str, str, str]]) -> None:
+        entities = []
+        keyed = []
+        seen = set()
+        for kind, name, key in entries:
+            if not name or (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+            index = len(entities)
+            entities.append({"kind": kind, "name": name, "key": key})
+            words = normalize(name).split()
+            for position in range(len(words)):
+                # the rest of the name from this word on, so multi-word prefixes match too
+                keyed.append((" ".join(words[position:]), index, position))
+        keyed.sort()
+        self._entities = entities
+        self._keys = [k for k, _, _ in keyed]
+        self._refs = [(index, position) for _, index, position in keyed]
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def search(self, prefix: str, limit: int = 10, kind: Optional[str] = None,
+               max_scan: int = 5000) -> List[Dict[str, Any]]:
+        """
+        Entities with a word starting with `prefix`, names that start with it first, then shorter names.
+
+        At most `max_scan` keys are examined, so a one-letter prefix stays cheap.
+        """
+        query = normalize(prefix)
+        if not query:
+            return []
+        start = bisect.bisect_left(self._keys, query)
+        matches: Dict[int, int] = {}
+        for i in range(start, min(start + max_scan, len(self._keys))):
+            if not self._keys[i].startswith(query):
+                break
+            index, position = self._refs[i]
+            if kind and self._entities[index]["kind"] != kind:
+                continue
+            matches[index] = min(position, matches.get(index, position))
+        ranked = sorted(matches, key=lambda i: (matches[i] > 0, len(self._entities[i]["name"]), i))
+        return [self._entities[i] for i in ranked[:limit]]
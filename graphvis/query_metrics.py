@@ -0,0 +1,207 @@
+# query_metrics.py
+#
+# Shared by graphvis and neo4j-fastapi, which each ship a copy next to their
+# app.py; tests keep the copies identical.
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Track sessions checked out of the driver's connection pool."""
+
+    def __init__(self, max_size: int, acquisition_timeout: float, max_connection_lifetime: float):
+        self.max_size = max_size
+        self.acquisition_timeout = acquisition_timeout
+        self.max_connection_lifetime = max_connection_lifetime
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquired = 0
+        self.saturated = 0
+
+    def acquire(self) -> None:
+        self.in_use += 1
+        self.acquired += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        if self.in_use > self.max_size:
+            # this session has to wait for a connection to be released
+            self.saturated += 1
+
+    def release(self) -> None:
+        self.in_use -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_size": self.max_size,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "saturation": round(self.in_use / self.max_size, 3) if self.max_size else 0.0,
+            "acquired": self.acquired,
+            "saturated": self.saturated,
+            "acquisition_timeout": self.acquisition_timeout,
+            "max_connection_lifetime": self.max_connection_lifetime,
+        }
+
+
+class QueryTiming:
+    """
+    Where one request's time went, in milliseconds.
+
+    ``send`` is the client side of running the query: the time `session.run`
+    took less the server's ``available`` (result_available_after). The driver
+    opens sessions lazily and only takes a pooled connection inside `run`, so
+    ``send`` covers any wait for a connection as well as the round trip; the
+    pool's saturation is reported by `PoolStats`. ``consumed`` is the server's
+    result_consumed_after, and ``serialize`` covers turning records into the
+    response. Phases add up, so a request running several queries reports all
+    of them. `source` says where the result came from, e.g. ``neo4j`` or ``cache``.
+    """
+
+    PHASES = ("send", "available", "consumed", "serialize")
+
+    def __init__(self, source: str = "neo4j"):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        self.source = source
+        self.rows = 0
+        self.bytes = 0
+
+    def ran(self, run_started: float) -> None:
+        """Call when `session.run` returns; until the summary arrives all of it counts as send."""
+        self.source = "neo4j"
+        self.phases["send"] += (time.perf_counter() - run_started) * 1000
+
+    def summarize(self, summary) -> None:
+        available = summary.result_available_after or 0
+        self.phases["available"] += float(available)
+        self.phases["consumed"] += float(summary.result_consumed_after or 0)
+        self.phases["send"] = max(self.phases["send"] - available, 0.0)
+
+    def add(self, phase: str, started: float) -> None:
+        self.phases[phase] += (time.perf_counter() - started) * 1000
+
+    @property
+    def total(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        entries = [f"{phase};dur={ms:.1f}" for phase, ms in self.phases.items()]
+        return ", ".join(entries + [f'total;dur={self.total:.1f};desc="{self.source}"'])
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**{k: round(v, 1) for k, v in self.phases.items()}, "total": round(self.total, 1),
+                "source": self.source, "rows": self.rows, "bytes": self.bytes}
+
+
+class QueryMetrics:
+    """
+    Per-endpoint counters and phase timings, rendered in the Prometheus text format.
+
+    `unit` names what is counted: ``query`` gives ``queries_total``,
+    ``slow_queries_total`` and ``query_phase_seconds_total``; ``request``
+    gives ``requests_total``, labelled with the source of the result too,
+    ``slow_requests_total`` and ``phase_seconds_total``.
+    """
+
+    def __init__(self, prefix: str, unit: str = "query"):
+        if unit not in ("query", "request"):
+            raise ValueError(f"unit must be 'query' or 'request', not {unit!r}")
+        self.prefix = prefix
+        self.unit = unit
+        self.requests: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.slow: Dict[str, int] = defaultdict(int)
+        self.rows: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+
+    def observe(self, endpoint: str, timing: QueryTiming, slow: bool = False) -> None:
+        self.requests[(endpoint, timing.source)] += 1
+        self.rows[endpoint] += timing.rows
+        self.bytes[endpoint] += timing.bytes
+        for phase, ms in timing.phases.items():
+            self.seconds[(endpoint, phase)] += ms / 1000
+        self.seconds[(endpoint, "total")] += timing.total / 1000
+        if slow:
+            self.slow[endpoint] += 1
+
+    def error(self, endpoint: str) -> None:
+        self.errors[endpoint] += 1
+
+    def render(self, gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """`gauges` maps extra metric names to (help text, value)."""
+        p = self.prefix
+        lines = []
+
+        def family(name: str, kind: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{p}_{name}{{{label_text}}} {value}" if label_text else f"{p}_{name} {value}")
+
+        if self.unit == "request":
+            family("requests_total", "counter", "Requests, by endpoint and where the result came from.",
+                   [({"endpoint": e, "source": src}, n) for (e, src), n in sorted(self.requests.items())])
+        else:
+            by_endpoint: Dict[str, int] = defaultdict(int)
+            for (e, _), n in self.requests.items():
+                by_endpoint[e] += n
+            family("queries_total", "counter", "Queries run, by endpoint.",
+                   [({"endpoint": e}, n) for e, n in sorted(by_endpoint.items())])
+        plural = "requests" if self.unit == "request" else "queries"
+        family("query_errors_total", "counter", f"{plural.capitalize()} whose query failed, by endpoint.",
+               [({"endpoint": e}, n) for e, n in sorted(self.errors.items())])
+        family(f"slow_{plural}_total", "counter", f"{plural.capitalize()} over the slow-query threshold, by endpoint.",
+               [({"endpoint": e}, n) for e, n in sorted(self.slow.items())])
+        family("query_rows_total", "counter", "Records read from Neo4j, by endpoint.",
+               [({"endpoint": e}, n) for e, n in sorted(self.rows.items())])
+        family("response_bytes_total", "counter", "Response body bytes, by endpoint.",
+               [({"endpoint": e}, n) for e, n in sorted(self.bytes.items())])
+        phase_name = "phase_seconds_total" if self.unit == "request" else "query_phase_seconds_total"
+        family(phase_name, "counter", f"Time spent per {self.unit} phase, by endpoint.",
+               [({"endpoint": e, "phase": ph}, round(v, 6)) for (e, ph), v in sorted(self.seconds.items())])
+        for name, (help_text, value) in (gauges or {}).items():
+            family(name, "gauge", help_text, [({}, value)])
+        return "\n".join(lines) + "\n"
+
+
+class SlowQueryLog:
+    """The most recent requests over the threshold, also written to `log`."""
+
+    def __init__(self, threshold_ms: float, size: int = 100, log: Optional[logging.Logger] = None):
+        self.threshold_ms = threshold_ms
+        self.entries: deque = deque(maxlen=size)
+        self.log = log or logger
+
+    def check(self, endpoint: str, request: Dict[str, Any], timing: QueryTiming) -> bool:
+        if timing.total < self.threshold_ms:
+            return False
+        entry = {"endpoint": endpoint, **request, "at": time.time(), **timing.as_dict()}
+        self.entries.append(entry)
+        self.log.warning("slow query: %s", json.dumps(entry, default=str))
+        return True
+
+
+def profile_operators(plan: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Flatten a PROFILE plan into its operators, depth first, with db hits and rows for each."""
+    operators = []
+
+    def walk(op: Dict[str, Any], depth: int) -> None:
+        operators.append({
+            "operator": op.get("operatorType"),
+            "depth": depth,
+            "dbHits": op.get("dbHits", 0),
+            "rows": op.get("rows", 0),
+            "details": (op.get("args") or {}).get("Details"),
+        })
+        for child in op.get("children") or []:
+            walk(child, depth + 1)
+
+    if plan:
+        walk(plan, 0)
+    return {"dbHits": sum(op["dbHits"] for op in operators), "operators": operators}
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# the stub drivers and synthetic EDGAR graphs are shared with the benchmarks
+BENCHMARKS_DIR = Path(__file__).resolve().parents[2] / "benchmarks"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from harness import load_service  # noqa: E402
+from stub_driver import StubAsyncDriver  # noqa: E402
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """graphvis app.py with a stub driver, an empty cache and materialized views in `tmp_path`."""
+    service = load_service("graphvis")
+    monkeypatch.setattr(service, "driver", StubAsyncDriver(0))
+    monkeypatch.setattr(service, "graph_cache", service.GraphCache(service.GRAPH_CACHE_SIZE, service.GRAPH_CACHE_TTL))
+    monkeypatch.setattr(service, "materialized_views", service.MaterializedViews(tmp_path / "materialized", (10, 20)))
+    monkeypatch.setattr(service, "materialize_task", None)
+    return service
@@ -0,0 +1,62 @@
+import asyncio
+
+from stub_driver import StubAsyncDriver, StubDriver
+from suite import compare
+from synthetic_graph import chunk_rows, form13_rows, graph_records
+
+BASELINE = {"relative": 1.0, "seconds": 0.01, "counters": {"rows": 100, "queries": 1}}
+
+
+def test_compare_flags_slowdowns_past_the_tolerance():
+    """Test that a case is a regression once it is slower than the baseline by more than the tolerance."""
+    within = {"relative": 1.9, "seconds": 0.019, "counters": {}}
+    slower = {"relative": 2.1, "seconds": 0.021, "counters": {}}
+    assert compare("case", within, BASELINE, tolerance=1.0, min_seconds=0.005) == []
+    assert compare("case", slower, BASELINE, tolerance=1.0, min_seconds=0.005) == [
+        "case: 2.10x the baseline time (tolerance 2.00x)"
+    ]
+
+
+def test_compare_does_not_time_fast_cases():
+    """Test that cases under min_seconds are not held to a time."""
+    fast = {"relative": 10.0, "seconds": 0.001, "counters": {}}
+    assert compare("case", fast, BASELINE, tolerance=1.0, min_seconds=0.005) == []
+
+
+def test_compare_flags_any_counter_growth():
+    """Test that counters may shrink but never grow, and new counters aren't held to anything."""
+    fewer = {"relative": 1.0, "seconds": 0.01, "counters": {"rows": 90, "queries": 1, "bytes": 5}}
+    more = {"relative": 1.0, "seconds": 0.01, "counters": {"rows": 100, "queries": 2}}
+    assert compare("case", fewer, BASELINE, tolerance=1.0, min_seconds=0.005) == []
+    assert compare("case", more, BASELINE, tolerance=1.0, min_seconds=0.005) == ["case: queries grew from 1 to 2"]
+
+
+def test_synthetic_data_is_deterministic():
+    """Test that a seed always gives the same records, so counters can be held to a baseline."""
+    def element_ids(records):
+        return [{key: getattr(value, "element_id", value) for key, value in record.items()} for record in records]
+
+    for mode in ("filings", "holdings", "sections"):
+        assert element_ids(graph_records(mode, 50)) == element_ids(graph_records(mode, 50))
+    assert list(chunk_rows(20)) == list(chunk_rows(20))
+    assert list(form13_rows(20)) == list(form13_rows(20))
+    assert list(form13_rows(20, seed=1)) != list(form13_rows(20))
+
+
+def test_stub_drivers_count_round_trips_and_rows():
+    """Test that the stubs count one query per round trip, and every row of an UNWIND batch."""
+    driver = StubDriver(0)
+    with driver.session() as session:
+        session.execute_write(lambda tx: tx.run("UNWIND $rows AS row RETURN row", rows=[1, 2, 3]).consume())
+    driver.execute_query("RETURN 1")
+    assert (driver.queries, driver.rows) == (2, 4)
+
+    async_driver = StubAsyncDriver(0, lambda query, params: graph_records("holdings", params["limit"]))
+
+    async def read():
+        async with async_driver.session() as session:
+            result = await session.run("MATCH (n) RETURN n", limit=30)
+            return [record async for record in result]
+
+    assert len(asyncio.run(read())) == 30
+    assert (async_driver.queries, async_driver.sessions) == (1, 1)
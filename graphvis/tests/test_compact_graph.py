@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import httpx
+from synthetic_graph import graph_records
+
+
+def get(service, url, **params):
+    async def send():
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(url, params=params)
+    return asyncio.run(send())
+
+
+def expand(compact):
+    """The nodes and links of a compact graph, in the shape `to_graph` gives them"""
+    nodes, links = compact["nodes"], compact["links"]
+    expanded_nodes = [
+        {"id": nodes["id"][i], "label": compact["labels"][nodes["label"][i]], "name": nodes["name"][i],
+         "metric": nodes["metric"][i], "props": {f: values[i] for f, values in nodes["props"].items()}}
+        for i in range(len(nodes["id"]))
+    ]
+    expanded_links = [
+        {"source": nodes["id"][links["source"][i]], "target": nodes["id"][links["target"][i]],
+         "type": compact["types"][links["type"][i]], "props": {f: values[i] for f, values in links["props"].items()}}
+        for i in range(len(links["source"]))
+    ]
+    return expanded_nodes, expanded_links
+
+
+def test_compact_graph_matches_the_full_graph(service):
+    """Test that the compact arrays hold the same nodes and links as `to_graph`, with only the requested props."""
+    for mode in ("filings", "holdings", "sections"):
+        records = graph_records(mode, 60)
+        full = service.to_graph(records)
+        nodes, links = expand(service.to_compact_graph(records, ["cusip6", "text", "shares", "textEmbedding"]))
+
+        def pick(entity):
+            return {**entity, "props": {f: entity["props"].get(f) for f in ("cusip6", "text", "shares")}}
+
+        assert nodes == [pick(node) for node in full["nodes"]], mode
+        assert links == [pick(link) for link in full["links"]], mode
+
+
+def test_compact_graph_without_fields_sends_no_props(service):
+    """Test that no fields means no property arrays at all."""
+    compact = service.to_compact_graph(graph_records("holdings", 20))
+    assert compact["nodes"]["props"] == {} and compact["links"]["props"] == {}
+    assert sorted(compact["labels"]) == ["Company", "Form", "Manager"]
+
+
+def test_compact_format_request(service):
+    """Test that `/graph?format=compact` returns the compact graph as JSON without whitespace."""
+    service.driver.records = lambda query, params: graph_records("filings", params["limit"])
+    response = get(service, "/graph", mode="filings", limit=30, format="compact", fields="cusip6")
+    assert response.status_code == 200
+    assert b": " not in response.content and b", " not in response.content
+    graph = response.json()
+    assert graph["format"] == "compact"
+    assert graph == json.loads(json.dumps(service.to_compact_graph(graph_records("filings", 30), ["cusip6"])))
@@ -0,0 +1,108 @@
+import asyncio
+
+from graph_cache import GraphCache, cache_key
+
+
+class Clock:
+    """A monotonic clock the tests move by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_ignores_whitespace_and_param_order():
+    """Test that equal requests written differently share a key."""
+    assert cache_key("MATCH (n)\n  RETURN n", {"a": 1, "b": 2}) == cache_key("MATCH (n) RETURN n", {"b": 2, "a": 1})
+    assert cache_key("MATCH (n) RETURN n", {"a": 1}) != cache_key("MATCH (n) RETURN n", {"a": 2})
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = GraphCache(max_entries=2, ttl=60, clock=Clock())
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry():
+    """Test that an entry is served until its ttl is up and dropped after."""
+    clock = Clock()
+    cache = GraphCache(max_entries=8, ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_concurrent_misses_share_one_load():
+    """Test that concurrent misses for a key run the loader once (single-flight)."""
+    cache = GraphCache(max_entries=8, ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"nodes": []}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert (cache.misses, cache.coalesced) == (1, 4)
+    assert cache.snapshot()["inflight"] == 0
+    assert cache.get("k") is results[0]
+
+
+def test_disabled_cache_always_loads():
+    """Test that a cache with no room or no ttl calls the loader every time."""
+    cache = GraphCache(max_entries=0, ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert asyncio.run(cache.get_or_load("k", loader)) == 1
+    assert asyncio.run(cache.get_or_load("k", loader)) == 2
+
+
+def test_invalidate_during_load():
+    """Test that a load started before an invalidate is neither cached nor joined by later callers."""
+    cache = GraphCache(max_entries=8, ttl=60)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def slow_loader():
+            await release.wait()
+            return "stale"
+
+        async def loader():
+            return "fresh"
+
+        first = asyncio.ensure_future(cache.get_or_load("k", slow_loader))
+        await asyncio.sleep(0)
+        assert cache.invalidate() == 0
+        # a caller after the write must not get the load that started before it
+        second = asyncio.ensure_future(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        release.set()
+        return await first, await second
+
+    first, second = asyncio.run(run())
+    assert (first, second) == ("stale", "fresh")
+    assert (cache.misses, cache.coalesced) == (2, 0)
+    assert cache.get("k") == "fresh"
+    assert cache.snapshot()["inflight"] == 0
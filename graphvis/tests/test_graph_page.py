@@ -0,0 +1,126 @@
+import asyncio
+from collections import defaultdict
+
+import httpx
+from neo4j import Record
+from synthetic_graph import SyntheticGraph, graph_records
+
+
+def keyset_records(service, mode, records):
+    """
+    Answer a mode's page query the way Neo4j would: the records after `$after`, in
+    element id order of their driving relationship, with their `pageKey`. `LIMIT $pageSize`
+    counts rows, which are one per driving relationship only if the query collects them.
+    """
+    key, _ = service.PAGE_ANCHORS[mode]
+    by_key = defaultdict(list)
+    for record in records:
+        by_key[record[key].element_id].append(record)
+
+    def answer(query, params):
+        keys = sorted(k for k in by_key if params["after"] is None or k > params["after"])
+        if "AS keyRows" in query:
+            keys = keys[:params["pageSize"]]
+        rows = [Record({**dict(record), "pageKey": k}) for k in keys for record in by_key[k]]
+        return rows if "AS keyRows" in query else rows[:params["pageSize"]]
+
+    return answer
+
+
+def co_filed_sections(forms):
+    """Sections records of `forms` forms, each filed by two companies, so every section has two rows"""
+    synthetic = SyntheticGraph()
+    records = []
+    for i in range(forms):
+        companies = [synthetic.company(2 * i), synthetic.company(2 * i + 1)]
+        form = synthetic.form(companies[0])
+        section = synthetic.chunk(form, "item1", 0)
+        section_rel = synthetic.relationship(form, "SECTION", section, item="item1")
+        for company in companies:
+            records.append(Record({"form": form, "company": company,
+                                   "filed": synthetic.relationship(company, "FILED", form),
+                                   "sectionRel": section_rel, "section": section, "nextRel": None,
+                                   "nextChunk": None, "prevRel": None, "prevChunk": None}))
+    return records
+
+
+def walk_pages(service, mode, page_size):
+    async def walk():
+        pages = []
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            params = {"mode": mode, "pageSize": page_size}
+            while True:
+                response = await client.get("/graph/page", params=params)
+                response.raise_for_status()
+                pages.append(response.json())
+                if pages[-1]["next_cursor"] is None:
+                    return pages
+                params["cursor"] = pages[-1]["next_cursor"]
+    return asyncio.run(walk())
+
+
+def test_page_query_is_keyset_paginated_on_the_driving_relationship(service):
+    """Test that every mode orders and resumes on the element id of its driving relationship."""
+    for mode, (key, _) in service.PAGE_ANCHORS.items():
+        cypher, params = service.build_page_query(mode, None, None, "5:x:9", 50)
+        text = " ".join(cypher.split())
+        assert f"WHERE $after IS NULL OR elementId({key}) > $after" in text, mode
+        assert f"AS keyRows ORDER BY elementId({key}) LIMIT $pageSize" in text, mode
+        assert f"WITH {key}, collect([" in text, mode
+        assert f"elementId({key}) AS pageKey" in text, mode
+        assert params == {"after": "5:x:9", "pageSize": 50}
+
+
+def test_pages_cover_the_graph_once(service):
+    """Test that following the cursors returns every node and link exactly once, then ends."""
+    for mode in ("filings", "holdings", "sections"):
+        records = graph_records(mode, 120, companies=25)
+        service.driver.records = keyset_records(service, mode, records)
+        pages = walk_pages(service, mode, page_size=7)
+
+        nodes = [node["id"] for page in pages for node in page["nodes"]]
+        links = [(link["source"], link["target"], link["type"]) for page in pages for link in page["links"]]
+        full = service.to_graph(records)
+        assert sorted(nodes) == sorted(node["id"] for node in full["nodes"]), mode
+        assert sorted(links) == sorted((link["source"], link["target"], link["type"]) for link in full["links"]), mode
+
+        key, _ = service.PAGE_ANCHORS[mode]
+        driving = len({record[key].element_id for record in records})
+        assert len(pages) == driving // 7 + 1, mode
+        assert [page["page"] for page in pages] == list(range(1, len(pages) + 1))
+        assert len({page["session"] for page in pages}) == 1
+
+
+def test_page_boundary_inside_a_co_filed_section(service):
+    """Test that a section with a row per filing company is never split across pages."""
+    records = co_filed_sections(8)
+    service.driver.records = keyset_records(service, "sections", records)
+    # 3 sections, 6 rows, per page: a row limit of 3 would end each page halfway through a section
+    pages = walk_pages(service, "sections", page_size=3)
+
+    full = service.to_graph(records)
+    links = sorted((link["source"], link["target"], link["type"]) for page in pages for link in page["links"])
+    assert links == sorted((link["source"], link["target"], link["type"]) for link in full["links"])
+    assert sorted(node["id"] for page in pages for node in page["nodes"]) == sorted(node["id"] for node in full["nodes"])
+    assert len(pages) == 3
+
+
+def test_graph_stream_releases_the_session_if_the_stream_never_starts(service):
+    """Test that the response's background task releases the session when the body is never read."""
+    in_use = service.pool_stats.in_use
+    response = asyncio.run(service.graph_stream(mode="filings", limit=10, batchSize=5, focusType=None, focus=None))
+    assert service.pool_stats.in_use == in_use + 1
+
+    asyncio.run(response.background())
+    asyncio.run(response.background())
+    assert service.pool_stats.in_use == in_use
+
+
+def test_invalid_cursor_is_rejected(service):
+    """Test that a cursor that doesn't decode is a 400, not a server error."""
+    async def send():
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/graph/page", params={"cursor": "not-a-cursor"})
+    assert asyncio.run(send()).status_code == 400
@@ -0,0 +1,91 @@
+import asyncio
+import gzip
+import json
+
+from synthetic_graph import graph_records
+
+from materialized import MaterializedViews, parse_limits
+
+GRAPH = {"nodes": [{"id": "1", "label": "Company", "name": "NETAPP"}], "links": []}
+
+
+class Clock:
+    """A wall clock the tests move by hand."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_limits():
+    """Test that limit tiers are parsed, deduplicated and sorted."""
+    assert parse_limits("1000, 800,,800") == (800, 1000)
+    assert parse_limits("") == ()
+
+
+def test_write_and_serve(tmp_path):
+    """Test that a written view is served as gzipped JSON, from memory and from its file."""
+    views = MaterializedViews(tmp_path, (10,))
+    assert views.missing() == [(mode, 10) for mode in ("filings", "holdings", "sections")]
+    size = views.write("filings", 10, GRAPH)
+    assert size == views.path("filings", 10).stat().st_size
+    assert views.get_graph("filings", 10) == GRAPH
+    assert MaterializedViews(tmp_path, (10,)).get_graph("filings", 10) == GRAPH
+    assert ("filings", 10) not in views.missing()
+
+
+def test_views_expire_after_max_age(tmp_path):
+    """Test that views older than max_age are neither served nor counted as present."""
+    clock = Clock()
+    views = MaterializedViews(tmp_path, (10,), max_age=60, clock=clock)
+    views.write("filings", 10, GRAPH)
+    clock.now += 59
+    assert views.get_bytes("filings", 10) is not None
+    clock.now += 2
+    assert views.get_bytes("filings", 10) is None
+    assert ("filings", 10) in views.missing()
+    assert views.snapshot()["expired"] == 1
+
+    views.write("filings", 10, GRAPH)
+    assert views.get_graph("filings", 10) == GRAPH
+
+
+def test_write_from_before_invalidate_is_discarded(tmp_path):
+    """Test that a view built from the graph before an invalidate is never stored."""
+    views = MaterializedViews(tmp_path, (10,))
+    views.write("filings", 10, GRAPH)
+    generation = views.generation
+    assert views.invalidate() == 1
+    assert views.write("filings", 10, GRAPH, generation) is None
+    assert not views.path("filings", 10).exists()
+    assert views.get_bytes("filings", 10) is None
+    assert views.snapshot()["discarded"] == 1
+    assert views.write("filings", 10, GRAPH, views.generation) is not None
+
+
+def test_materialize_builds_every_tier(service):
+    """Test that one query per mode builds every tier from the leading records."""
+    service.driver.records = lambda query, params: graph_records("filings", params["limit"])
+    sizes = asyncio.run(service.materialize())
+    assert set(sizes) == {f"{mode}-{limit}" for mode in ("filings", "holdings", "sections") for limit in (10, 20)}
+    assert service.driver.queries == 3
+    graph = json.loads(gzip.decompress(service.materialized_views.get_bytes("filings", 10)))
+    assert graph == json.loads(json.dumps(service.to_graph(graph_records("filings", 20)[:10]), default=str))
+    assert service.materialized_views.refreshes == 1
+
+
+def test_materialize_stops_when_invalidated(service):
+    """Test that a rebuild reading the graph when a loader invalidates stores nothing."""
+    def records(query, params):
+        # a loader writes while the rebuild is reading
+        service.materialized_views.invalidate()
+        return graph_records("filings", params["limit"])
+
+    service.driver.records = records
+    assert asyncio.run(service.materialize()) == {}
+    assert service.materialized_views.missing() == [
+        (mode, limit) for mode in ("filings", "holdings", "sections") for limit in (10, 20)
+    ]
+    assert service.materialized_views.refreshes == 0
@@ -0,0 +1,36 @@
+def normalized(cypher):
+    return " ".join(cypher.split())
+
+
+SEEDED_SECTIONS = ("MATCH (company:Company) WHERE elementId(company) IN $seeds "
+                   "MATCH (company)-[filed:FILED]->(form:Form)-[sectionRel:SECTION]->(section:Chunk)")
+
+
+def test_seeded_sections_query_starts_from_the_seeds(service):
+    """Test that a company focus in sections mode starts from the seeded companies."""
+    cypher, params = service.build_query("sections", "company", "netapp", 100, seeds=["4:a:1"])
+    assert normalized(cypher).startswith(SEEDED_SECTIONS)
+    assert "OPTIONAL MATCH (company:Company)" not in cypher
+    assert params == {"limit": 100, "seeds": ["4:a:1"]}
+
+
+def test_seeded_sections_page_query_starts_from_the_seeds(service):
+    """Test that the paged sections query starts from the seeds too, before the keyset."""
+    cypher, params = service.build_page_query("sections", "company", "netapp", None, 50, seeds=["4:a:1"])
+    text = normalized(cypher)
+    assert text.startswith(SEEDED_SECTIONS)
+    assert text.index("IN $seeds") < text.index("elementId(sectionRel) > $after")
+    assert params == {"after": None, "pageSize": 50, "seeds": ["4:a:1"]}
+
+
+def test_unseeded_sections_query_filters_sections(service):
+    """Test that foci that aren't seeded keep matching every section and filtering."""
+    cypher, params = service.build_query("sections", "item", "item1", 100)
+    text = normalized(cypher)
+    assert text.startswith("MATCH (form:Form)-[sectionRel:SECTION]->(section:Chunk) "
+                           "OPTIONAL MATCH (company:Company)-[filed:FILED]->(form)")
+    assert "WHERE sectionRel.item = $focus" in text
+    assert "$seeds" not in text
+
+    cypher, _ = service.build_query("sections", None, None, 100)
+    assert "WHERE" not in normalized(cypher).split("OPTIONAL MATCH (section)")[0]
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from query_metrics import PoolStats, QueryMetrics, QueryTiming
+
+
+def test_send_phase_excludes_server_time():
+    """Test that the send phase is what `run` took beyond the server's result_available_after."""
+    timing = QueryTiming(source="cache")
+    timing.ran(timing.started - 0.05)
+    timing.summarize(SimpleNamespace(result_available_after=20, result_consumed_after=5))
+    assert timing.source == "neo4j"
+    assert 29 <= timing.phases["send"] <= 40
+    assert timing.phases["available"] == 20.0
+    assert timing.phases["consumed"] == 5.0
+
+
+def test_request_metrics_are_labelled_by_source():
+    """Test the metric names and labels of each unit."""
+    timing = QueryTiming(source="cache")
+    requests = QueryMetrics("graphvis", unit="request")
+    requests.observe("graph", timing)
+    assert 'graphvis_requests_total{endpoint="graph",source="cache"} 1' in requests.render()
+    assert 'graphvis_phase_seconds_total{endpoint="graph",phase="send"}' in requests.render()
+
+    queries = QueryMetrics("service")
+    queries.observe("cypher", QueryTiming())
+    queries.observe("cypher", timing)
+    assert 'service_queries_total{endpoint="cypher"} 2' in queries.render()
+    assert 'service_query_phase_seconds_total{endpoint="cypher",phase="send"}' in queries.render()
+
+
+def test_pool_stats_counts_saturation():
+    """Test that sessions past the pool size are counted as saturated."""
+    pool = PoolStats(1, 60.0, 3600.0)
+    pool.acquire()
+    pool.acquire()
+    pool.release()
+    snapshot = pool.snapshot()
+    assert snapshot["in_use"] == 1
+    assert snapshot["peak_in_use"] == 2
+    assert snapshot["saturated"] == 1
+    assert snapshot["acquisition_timeout"] == 60.0
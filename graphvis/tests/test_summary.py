@@ -0,0 +1,67 @@
+import asyncio
+import re
+
+from bench_summary import aggregate_row, summarize_graph
+from graph_summary import SUMMARY_AGGREGATION, TOP_HUBS, graph_stats, render_summary, summary_query
+from stub_driver import StubAsyncDriver
+from synthetic_graph import graph_records
+
+MODES = ("filings", "holdings", "sections")
+
+
+def mix(summary, heading):
+    """The `name:count` entries of one sentence of a summary, e.g. its node mix"""
+    match = re.search(rf"{heading} → ([^.]*)\.", summary)
+    return set(match.group(1).split(", ")) if match else set()
+
+
+def aggregating_driver(records):
+    """Answers the summary aggregation with the row Neo4j would return for `records`, and anything else with them"""
+    row = aggregate_row(records, TOP_HUBS)
+    return StubAsyncDriver(0, lambda query, params: [row] if "UNWIND [rel IN" in query else records)
+
+
+def test_summary_query_replaces_the_final_return(service):
+    """Test that the aggregation follows the graph query's own MATCHes and params."""
+    for mode in MODES:
+        cypher, params = service.build_query(mode, None, None, 100)
+        summary_cypher, summary_params = summary_query(mode, cypher, params)
+        head, _, _ = cypher.rpartition("RETURN ")
+        assert summary_cypher.startswith(head + "WITH "), mode
+        assert summary_cypher.count("RETURN ") == cypher.count("RETURN ") - 1 + SUMMARY_AGGREGATION.count("RETURN ")
+        assert summary_params == {**params, "topHubs": TOP_HUBS}
+
+
+def test_aggregated_summary_matches_the_full_graph(service):
+    """Test that the one-row summary counts the same nodes, links, labels and types as the full graph."""
+    for mode in MODES:
+        records = graph_records(mode, 300)
+        service.driver = aggregating_driver(records)
+        service.graph_cache.invalidate()
+        stats = asyncio.run(service.fetch_summary_stats(mode, None, None, 300))
+        assert service.driver.queries == 1, mode
+
+        graph = service.to_graph(records)
+        full_stats = graph_stats(graph)
+        for key in ("nodes", "links", "labels", "types"):
+            assert stats[key] == full_stats[key], (mode, key)
+        for label, hubs in full_stats["hubs"].items():
+            assert [degree for _, degree in stats["hubs"][label]] == [degree for _, degree in hubs], (mode, label)
+
+        # the rendered summary reports what the summary built from the full payload did
+        before = summarize_graph(mode, None, None, graph)
+        after = render_summary(mode, None, None, stats)
+        assert before.split(".")[0] == after.split(".")[0]
+        assert mix(before, "Node mix") == mix(after, "Node mix")
+        assert mix(before, "Relations") == mix(after, "Relations")
+
+
+def test_summary_of_a_cached_graph_runs_no_query(service):
+    """Test that a view already fetched for /graph is summarized from the cache."""
+    records = graph_records("filings", 100)
+    service.driver = aggregating_driver(records)
+    graph = asyncio.run(service.fetch_graph("filings", None, None, 100))
+    queries = service.driver.queries
+    stats = asyncio.run(service.fetch_summary_stats("filings", None, None, 100))
+    assert service.driver.queries == queries
+    assert stats == graph_stats(graph)
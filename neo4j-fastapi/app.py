@@ -1,16 +1,45 @@
+import base64
+import binascii
+import asyncio
+import glob
+import hashlib
+import json
+import logging
 import os
-from typing import Any, Dict, List
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field, ConfigDict
-from neo4j import GraphDatabase, basic_auth
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase, basic_auth
+
+from cypher_parser import cypher_annotated_parser
+from query_metrics import PoolStats, QueryMetrics, QueryTiming, SlowQueryLog, profile_operators
 
 APP_NAME = "neo4j-fastapi"
 BOLT_URL = os.environ.get("NEO4J_BOLT_URL", "bolt://localhost:7687")
 NEO4J_USER = os.environ.get("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD")
 MAX_ROWS = int(os.environ.get("MAX_ROWS", "1000"))
+STREAM_FETCH_SIZE = int(os.environ.get("STREAM_FETCH_SIZE", "500"))
+POOL_SIZE = int(os.environ.get("NEO4J_MAX_POOL_SIZE", "100"))
+POOL_ACQUISITION_TIMEOUT = float(os.environ.get("NEO4J_ACQUISITION_TIMEOUT", "60"))
+MAX_CONNECTION_LIFETIME = float(os.environ.get("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "1000"))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get("SLOW_QUERY_LOG_SIZE", "100"))
+SERVICE_DIR = Path(__file__).resolve().parent
+MAX_BATCH_STATEMENTS = int(os.environ.get("MAX_BATCH_STATEMENTS", "100"))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+QUERY_MODULES = os.environ.get("QUERY_MODULES", str(SERVICE_DIR / "queries" / "*.cypher"))
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "256"))
+QUERY_WARMUP = os.environ.get("QUERY_WARMUP", "1") == "1"
 
 if not NEO4J_PASSWORD:
     raise ValueError("NEO4J_PASSWORD environment variable is required")
@@ -18,19 +47,246 @@ if not NEO4J_PASSWORD:
 app = FastAPI(title="Neo4j Cypher API", version="0.1.0")
 
 _driver = None
+logger = logging.getLogger(APP_NAME)
+
+
+pool_stats = PoolStats(POOL_SIZE, POOL_ACQUISITION_TIMEOUT, MAX_CONNECTION_LIFETIME)
+query_metrics = QueryMetrics("neo4j_fastapi")
+slow_queries = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE, logger)
+
+
+def observe_query(endpoint: str, query: str, timing: QueryTiming) -> None:
+    query_metrics.observe(endpoint, timing, slow_queries.check(endpoint, {"query": query[:2000]}, timing))
+
+
+@asynccontextmanager
+async def pooled_session(**config) -> AsyncIterator[Any]:
+    pool_stats.acquire()
+    try:
+        async with _driver.session(**config) as session:
+            yield session
+    finally:
+        pool_stats.release()
+
+
+PARAM_TYPES = {
+    "string": (str,),
+    "int": (int,),
+    "float": (int, float),
+    "bool": (bool,),
+    "list": (list,),
+}
+# values used to plan each parameter type during warm-up
+PARAM_SAMPLES = {"string": "", "int": 0, "float": 0.0, "bool": False, "list": []}
+PARAM_DECLARATION = re.compile(r"^(\w+)\s*:\s*(\w+)\s*(?:=\s*(.+))?$")
+
+
+@dataclass
+class QueryParam:
+    name: str
+    type: str
+    required: bool = True
+    default: Any = None
+
+    def validate(self, value: Any) -> Any:
+        # bool is an int subclass, so it has to be ruled out explicitly
+        if (isinstance(value, bool) and self.type != "bool") or not isinstance(value, PARAM_TYPES[self.type]):
+            raise ValueError(f"parameter '{self.name}' must be of type {self.type}")
+        return float(value) if self.type == "float" else value
+
+
+@dataclass
+class NamedQuery:
+    name: str
+    cypher: str
+    params: Dict[str, QueryParam] = field(default_factory=dict)
+    ttl: float = 0.0
+    description: str = ""
+    access: str = "read"
+    source: str = ""
+
+    def bind(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Check `values` against the declared params, filling in defaults."""
+        unknown = sorted(set(values) - set(self.params))
+        if unknown:
+            raise ValueError(f"unknown parameters: {', '.join(unknown)}")
+        bound = {}
+        for name, param in self.params.items():
+            if name in values:
+                bound[name] = param.validate(values[name])
+            elif param.required:
+                raise ValueError(f"missing parameter '{name}'")
+            else:
+                bound[name] = param.default
+        return bound
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "params": {
+                p.name: {"type": p.type, "required": p.required, **({} if p.required else {"default": p.default})}
+                for p in self.params.values()
+            },
+            "ttl": self.ttl,
+            "access": self.access,
+        }
+
+
+def parse_params(declaration: str) -> Dict[str, QueryParam]:
+    """Parse a `// params:` annotation, e.g. `cusip6: string, limit: int = 10`."""
+    params: Dict[str, QueryParam] = {}
+    # split on commas outside of list defaults
+    for part in re.split(r",\s*(?![^\[]*\])", declaration):
+        if not part.strip():
+            continue
+        match = PARAM_DECLARATION.match(part.strip())
+        if not match or match.group(2) not in PARAM_TYPES:
+            raise ValueError(f"bad parameter declaration '{part.strip()}'")
+        name, type_name, default = match.groups()
+        param = QueryParam(name, type_name)
+        if default is not None:
+            param.required = False
+            param.default = param.validate(json.loads(default))
+        params[name] = param
+    return params
+
+
+def load_query_modules(pattern: str) -> Dict[str, NamedQuery]:
+    """
+    Register every named statement of the `.cypher` modules matching `pattern` (comma separated globs).
+
+    Statements without a `// name:` annotation are skipped. Every `$param`
+    a statement uses has to be declared in its `// params:` annotation, and
+    write queries can't have a `// ttl:`, since their results are never cached.
+    """
+
+    queries: Dict[str, NamedQuery] = {}
+    for path in sorted({p for g in pattern.split(",") if g.strip() for p in glob.glob(g.strip())}):
+        with open(path, "r", encoding="utf-8") as f:
+            statements = cypher_annotated_parser(f.read())
+        for annotations, cypher in statements:
+            name = annotations.get("name")
+            if not name:
+                continue
+            if name in queries:
+                raise ValueError(f"{path}: query '{name}' is already defined in {queries[name].source}")
+            params = parse_params(annotations.get("params", ""))
+            undeclared = sorted(set(re.findall(r"\$(\w+)", cypher)) - set(params))
+            if undeclared:
+                raise ValueError(f"{path}: query '{name}' uses undeclared parameters: {', '.join(undeclared)}")
+            access = annotations.get("access", "read")
+            ttl = float(annotations.get("ttl", 0))
+            if access == "write" and ttl > 0:
+                raise ValueError(f"{path}: query '{name}' has access: write, so it can't have a ttl")
+            queries[name] = NamedQuery(
+                name=name,
+                cypher=cypher,
+                params=params,
+                ttl=ttl,
+                description=annotations.get("description", ""),
+                access=access,
+                source=path,
+            )
+    return queries
+
+
+class ResultCache:
+    """Bounded LRU of named query results, each kept for its query's TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name: str, params: Dict[str, Any]) -> str:
+        return json.dumps([name, params], sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, ttl: float, payload: Dict[str, Any]) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> int:
+        dropped = len(self._entries)
+        self._entries.clear()
+        return dropped
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses}
+
+
+query_registry: Dict[str, NamedQuery] = {}
+query_registry_error: Optional[str] = None
+query_results = ResultCache(QUERY_CACHE_SIZE)
+
+
+def load_query_registry() -> None:
+    global query_registry, query_registry_error
+    try:
+        query_registry = load_query_modules(QUERY_MODULES)
+        query_registry_error = None
+    except (ImportError, OSError, ValueError) as exc:
+        query_registry = {}
+        query_registry_error = str(exc)
+        logger.warning("query registry not loaded: %s", exc)
+
+
+async def warm_queries() -> Dict[str, Optional[str]]:
+    """
+    EXPLAIN every registered query so Neo4j has planned and cached it before the first call.
+    Returns the error for each query that failed to plan, None for the rest.
+    """
+    warmed: Dict[str, Optional[str]] = {}
+    for query in query_registry.values():
+        params = {p.name: p.default if not p.required else PARAM_SAMPLES[p.type] for p in query.params.values()}
+        try:
+            async with pooled_session() as s:
+                result = await s.run(f"EXPLAIN {query.cypher}", params)
+                await result.consume()
+            warmed[query.name] = None
+        except Exception as exc:
+            warmed[query.name] = str(exc)
+            logger.warning("query %s failed to plan: %s", query.name, exc)
+    return warmed
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     global _driver
-    _driver = GraphDatabase.driver(BOLT_URL, auth=basic_auth(NEO4J_USER, NEO4J_PASSWORD))
+    _driver = AsyncGraphDatabase.driver(
+        BOLT_URL,
+        auth=basic_auth(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=POOL_SIZE,
+        connection_acquisition_timeout=POOL_ACQUISITION_TIMEOUT,
+        max_connection_lifetime=MAX_CONNECTION_LIFETIME,
+    )
+    load_query_registry()
+    if QUERY_WARMUP and query_registry:
+        asyncio.ensure_future(warm_queries())
 
 
 @app.on_event("shutdown")
-def shutdown():
+async def shutdown():
     global _driver
     if _driver is not None:
-        _driver.close()
+        await _driver.close()
 
 
 class CypherRequest(BaseModel):
@@ -41,20 +297,74 @@ class CypherRequest(BaseModel):
     })
 
     query: str = Field(..., description="Cypher query to execute")
+    profile: bool = Field(False, description="Run with PROFILE and return db hits per operator")
 
 
 class CypherResponse(BaseModel):
     rows: List[Dict[str, Any]]
     count: int
     capped: bool
+    profile: Optional[Dict[str, Any]] = None
+
+
+class NamedQueryRequest(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "params": {"cusip6": "64110D", "limit": 5},
+        }
+    })
+
+    params: Dict[str, Any] = Field(default_factory=dict, description="Values for the query's declared parameters")
+
+
+class NamedQueryResponse(CypherResponse):
+    cached: bool
+
+
+class BatchStatement(BaseModel):
+    query: str = Field(..., description="Cypher query to execute")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Query parameters")
+
+
+class CypherBatchRequest(BaseModel):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "statements": [
+                {"query": "MATCH (com:Company {cusip6: $cusip6}) RETURN com.names AS names",
+                 "params": {"cusip6": "64110D"}},
+                {"query": "MATCH (n) RETURN count(n) AS total"},
+            ],
+            "mode": "transaction",
+        }
+    })
 
+    statements: List[BatchStatement] = Field(..., min_length=1, max_length=MAX_BATCH_STATEMENTS)
+    mode: Literal["transaction", "concurrent"] = Field(
+        "transaction",
+        description="transaction: in order in one read transaction; concurrent: in parallel on pooled sessions",
+    )
 
-def neo4j_status() -> Dict[str, Any]:
+
+class CypherStreamRequest(CypherRequest):
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "query": "MATCH (c:Chunk) RETURN c.chunkId AS chunkId ORDER BY chunkId",
+            "page_size": 10000,
+        }
+    })
+
+    params: Dict[str, Any] = Field(default_factory=dict, description="Query parameters")
+    cursor: Optional[str] = Field(None, description="Opaque cursor returned by a previous page")
+    page_size: Optional[int] = Field(None, ge=1, description="Rows per page; omit to stream everything")
+
+
+async def neo4j_status() -> Dict[str, Any]:
     if _driver is None:
         return {"status": "degraded", "neo4j": False, "error": "Driver not initialized"}
     try:
-        with _driver.session() as session:
-            ok = bool(session.run("RETURN 1 AS ok").single().get("ok", 0))
+        async with pooled_session() as session:
+            result = await session.run("RETURN 1 AS ok")
+            ok = bool((await result.single()).get("ok", 0))
         return {"status": "ok", "neo4j": ok, "error": None}
     except Exception as exc:
         return {"status": "degraded", "neo4j": False, "error": str(exc)}
@@ -92,9 +402,161 @@ def record_to_dict(rec) -> Dict[str, Any]:
     return out
 
 
+def profiled(query: str) -> str:
+    if query.lstrip().upper().startswith(("PROFILE", "EXPLAIN")):
+        return query
+    return f"PROFILE {query}"
+
+
+async def read_rows(result, timing: QueryTiming) -> List[Dict[str, Any]]:
+    """Read up to MAX_ROWS records as dicts, timing their conversion."""
+    rows: List[Dict[str, Any]] = []
+    async for rec in result:
+        if len(rows) >= MAX_ROWS:
+            break
+        started = time.perf_counter()
+        rows.append(record_to_dict(rec))
+        timing.add("serialize", started)
+    timing.rows += len(rows)
+    return rows
+
+
+def rows_payload(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"rows": rows, "count": len(rows), "capped": len(rows) >= MAX_ROWS}
+
+
+def query_fingerprint(query: str, params: Dict[str, Any]) -> str:
+    """A short hash of a query and its params, so a cursor can't be replayed against another query."""
+    return hashlib.sha256(json.dumps([query, params], sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, fingerprint: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset, "query": fingerprint}).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str], fingerprint: str) -> int:
+    if not cursor:
+        return 0
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset, cursor_fingerprint = decoded["offset"], decoded["query"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_fingerprint != fingerprint:
+        raise HTTPException(status_code=400, detail="Cursor belongs to a different query or params")
+    return offset
+
+
+# strings, quoted names and comments, blanked out before looking for clauses
+CYPHER_LITERAL = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`|//[^\n]*|/\*.*?\*/""", re.S)
+# words, with any `.`, `$` or `:` in front so properties, params and labels can be told apart
+CYPHER_TOKEN = re.compile(r"(?:[.$:]\s*)?[A-Za-z_]\w*|[{(\[]|[})\]]")
+
+
+def top_level_words(query: str) -> List[str]:
+    """The upper-cased keywords and names of `query` outside strings, comments and brackets; aliases read as NAME."""
+    masked = CYPHER_LITERAL.sub(lambda m: " " * len(m.group()), query)
+    words: List[str] = []
+    depth = 0
+    for token in CYPHER_TOKEN.findall(masked):
+        if token in ("{", "(", "["):
+            depth += 1
+        elif token in ("}", ")", "]"):
+            depth -= 1
+        elif depth == 0 and token[0] not in ".$:":
+            # an alias can be named like a keyword, as in `n.limit AS limit`
+            words.append("NAME" if words and words[-1] == "AS" else token.upper())
+    return words
+
+
+def page_query(query: str) -> str:
+    """
+    Append ``SKIP``/``LIMIT`` to `query`'s final ``RETURN``, so Neo4j skips to the
+    page and stops after it instead of sending every row before the page for the
+    client to throw away. One row past the page is fetched to tell whether there
+    is a next one.
+
+    Only a query ending in a ``RETURN`` of its own can be paged this way, so
+    anything else is a 400: procedure calls without ``YIELD``, writes without
+    ``RETURN``, ``UNION`` (the page would cut only its last part), and a final
+    ``RETURN`` that already has a ``SKIP`` or ``LIMIT``.
+    """
+    statement = query.strip().rstrip(";").rstrip()
+    words = top_level_words(statement)
+    if "RETURN" not in words:
+        raise HTTPException(status_code=400, detail="page_size needs a query that ends in RETURN")
+    if "UNION" in words:
+        raise HTTPException(status_code=400, detail="page_size does not support UNION")
+    returned = words[len(words) - words[::-1].index("RETURN"):]
+    if {"SKIP", "OFFSET", "LIMIT"} & set(returned):
+        raise HTTPException(status_code=400, detail="page_size pages the query; remove its SKIP/LIMIT")
+    return f"{statement}\nSKIP $pageOffset LIMIT $pageLimit"
+
+
+def ndjson_line(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload, default=str) + "\n").encode("utf-8")
+
+
+class StreamSession:
+    """
+    A pooled session that a streaming response keeps after its handler returns.
+
+    The stream releases it when it ends, and the response's background task
+    does too, in case the client goes away before the stream starts; only the
+    first `release` closes the session and returns its pool slot.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.released = False
+
+    async def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        try:
+            await self.session.close()
+        finally:
+            pool_stats.release()
+
+
+async def stream_records(
+    stream_session: StreamSession, result, offset: int, page_size: Optional[int], query: str = "", timing: Optional[QueryTiming] = None,
+    fingerprint: str = "",
+) -> AsyncIterator[bytes]:
+    # Pull records lazily; the driver only fetches the next batch of
+    # STREAM_FETCH_SIZE records once the previous one has been written out.
+    timing = timing or QueryTiming()
+    count = 0
+    next_cursor = None
+    try:
+        # with page_size set, the result starts at offset and holds at most one row past the page
+        async for rec in result:
+            if page_size is not None and count >= page_size:
+                next_cursor = encode_cursor(offset + count, fingerprint)
+                break
+            started = time.perf_counter()
+            line = ndjson_line({"type": "row", "data": record_to_dict(rec)})
+            timing.add("serialize", started)
+            timing.bytes += len(line)
+            yield line
+            count += 1
+        timing.summarize(await result.consume())
+        timing.rows = count
+        yield ndjson_line({"type": "end", "count": count, "next_cursor": next_cursor})
+        observe_query("cypher_stream", query, timing)
+    except Exception as e:
+        query_metrics.error("cypher_stream")
+        yield ndjson_line({"type": "error", "detail": f"Cypher error: {e}", "count": count})
+    finally:
+        await stream_session.release()
+
+
 @app.get("/", response_class=HTMLResponse)
-def root():
-    status = neo4j_status()
+async def root():
+    status = await neo4j_status()
     status_label = "connected" if status["neo4j"] else "error"
     error_message = f"<p><strong>Error:</strong> {status['error']}</p>" if status["error"] else ""
     body = f"""
@@ -132,27 +594,248 @@ def root():
 
 
 @app.get("/health")
-def health():
-    status = neo4j_status()
+async def health():
+    status = await neo4j_status()
     if status["error"]:
         return {"status": status["status"], "neo4j": status["neo4j"], "error": status["error"]}
     return {"status": status["status"], "neo4j": status["neo4j"]}
 
 
 @app.post("/cypher", response_model=CypherResponse, summary="Execute a Cypher query")
-def run_cypher(body: CypherRequest):
+async def run_cypher(body: CypherRequest):
     if not body.query.strip():
         raise HTTPException(status_code=400, detail="Empty query")
 
     # Soft cap: don't stream unbounded results
-    rows: List[Dict[str, Any]] = []
+    timing = QueryTiming()
     try:
-        with _driver.session() as s:
-            result = s.run(body.query)
-            for i, rec in enumerate(result):
-                if i >= MAX_ROWS:
-                    break
-                rows.append(record_to_dict(rec))
-        return {"rows": rows, "count": len(rows), "capped": len(rows) >= MAX_ROWS}
+        async with pooled_session() as s:
+            run_started = time.perf_counter()
+            result = await s.run(profiled(body.query) if body.profile else body.query)
+            timing.ran(run_started)
+            rows = await read_rows(result, timing)
+            summary = await result.consume()
     except Exception as e:
+        query_metrics.error("cypher")
         raise HTTPException(status_code=400, detail=f"Cypher error: {e}")
+
+    timing.summarize(summary)
+    payload = rows_payload(rows)
+    if body.profile:
+        payload["profile"] = profile_operators(summary.profile)
+    return timed_response("cypher", body.query, payload, timing)
+
+
+def timed_response(endpoint: str, query: str, payload: Dict[str, Any], timing: QueryTiming) -> JSONResponse:
+    """Encode the payload, then record and report the query's timings in a `Server-Timing` header."""
+    started = time.perf_counter()
+    response = JSONResponse(payload)
+    timing.add("serialize", started)
+    timing.bytes = len(response.body)
+    response.headers["Server-Timing"] = timing.server_timing()
+    observe_query(endpoint, query, timing)
+    return response
+
+
+async def run_statement(runner, statement: BatchStatement, timing: QueryTiming) -> Dict[str, Any]:
+    """Run one batch statement on a session or transaction; errors are returned, not raised."""
+    if not statement.query.strip():
+        return {"error": "Empty query"}
+    try:
+        run_started = time.perf_counter()
+        result = await runner.run(statement.query, statement.params)
+        timing.ran(run_started)
+        rows = await read_rows(result, timing)
+        timing.summarize(await result.consume())
+    except Exception as e:
+        query_metrics.error("cypher_batch")
+        return {"error": f"Cypher error: {e}"}
+    return rows_payload(rows)
+
+
+async def run_batch_transaction(statements: List[BatchStatement], timing: QueryTiming) -> List[Dict[str, Any]]:
+    # One read transaction, so every statement sees the same snapshot; it is
+    # rolled back at the end, so nothing a statement writes is kept.
+    results: List[Dict[str, Any]] = []
+    async with pooled_session(default_access_mode=READ_ACCESS) as s:
+        tx = await s.begin_transaction()
+        try:
+            for statement in statements:
+                if results and "error" in results[-1]:
+                    # a failed statement ends the transaction
+                    results.append({"error": "Not run: an earlier statement in the transaction failed"})
+                    continue
+                results.append(await run_statement(tx, statement, timing))
+        finally:
+            await tx.close()
+    return results
+
+
+async def run_batch_concurrent(statements: List[BatchStatement], timing: QueryTiming) -> List[Dict[str, Any]]:
+    # Each statement on its own pooled session, at most BATCH_CONCURRENCY at a time.
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_one(statement: BatchStatement) -> Dict[str, Any]:
+        async with limit:
+            async with pooled_session(default_access_mode=READ_ACCESS) as s:
+                return await run_statement(s, statement, timing)
+
+    return list(await asyncio.gather(*(run_one(statement) for statement in statements)))
+
+
+@app.post("/cypher/batch", summary="Execute several Cypher queries in one request")
+async def run_cypher_batch(body: CypherBatchRequest):
+    """
+    Run a list of statements and return their results in the same order.
+
+    In ``transaction`` mode the statements run one after another in a single
+    read transaction; after a failure the rest are reported as not run. In
+    ``concurrent`` mode they run in parallel on pooled sessions and fail
+    independently. Each result is ``{rows, count, capped}`` or ``{error}``.
+    """
+    timing = QueryTiming()
+    if body.mode == "concurrent":
+        results = await run_batch_concurrent(body.statements, timing)
+    else:
+        try:
+            results = await run_batch_transaction(body.statements, timing)
+        except Exception as e:
+            query_metrics.error("cypher_batch")
+            raise HTTPException(status_code=400, detail=f"Cypher error: {e}")
+    payload = {
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+    }
+    queries = "\n;\n".join(statement.query for statement in body.statements)
+    return timed_response("cypher_batch", queries, payload, timing)
+
+
+@app.post("/cypher/stream", summary="Stream a Cypher query result as NDJSON")
+async def stream_cypher(body: CypherStreamRequest):
+    """
+    Stream rows as newline-delimited JSON while the driver fetches them.
+
+    Each line is a ``row`` object; the last line is an ``end`` object carrying
+    the row count and, when ``page_size`` cut the page short, a ``next_cursor``
+    to resume from. The page is cut on the server with ``SKIP``/``LIMIT``, and
+    the cursor only resumes the query and params it came from. Queries should
+    ``ORDER BY`` for stable pages.
+    """
+    if not body.query.strip():
+        raise HTTPException(status_code=400, detail="Empty query")
+    if body.profile:
+        raise HTTPException(status_code=400, detail="profile is not supported when streaming; use POST /cypher")
+    fingerprint = query_fingerprint(body.query, body.params)
+    offset = decode_cursor(body.cursor, fingerprint)
+    query, params = body.query, body.params
+    if body.page_size is not None:
+        query = page_query(body.query)
+        params = {**body.params, "pageOffset": offset, "pageLimit": body.page_size + 1}
+
+    # The session outlives this handler; the stream or the response's background task releases it.
+    pool_stats.acquire()
+    stream_session = StreamSession(_driver.session(fetch_size=STREAM_FETCH_SIZE))
+    timing = QueryTiming()
+    try:
+        run_started = time.perf_counter()
+        result = await stream_session.session.run(query, params)
+        timing.ran(run_started)
+    except Exception as e:
+        await stream_session.release()
+        query_metrics.error("cypher_stream")
+        raise HTTPException(status_code=400, detail=f"Cypher error: {e}")
+    return StreamingResponse(
+        stream_records(stream_session, result, offset, body.page_size, body.query, timing, fingerprint),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(stream_session.release),
+    )
+
+
+def registered_query(name: str) -> NamedQuery:
+    if query_registry_error is not None:
+        raise HTTPException(status_code=503, detail=f"Query registry unavailable: {query_registry_error}")
+    query = query_registry.get(name)
+    if query is None:
+        raise HTTPException(status_code=404, detail=f"Unknown query: {name}")
+    return query
+
+
+@app.get("/queries", summary="List the named queries")
+async def list_queries():
+    if query_registry_error is not None:
+        raise HTTPException(status_code=503, detail=f"Query registry unavailable: {query_registry_error}")
+    return {"queries": [q.describe() for q in query_registry.values()]}
+
+
+@app.post("/queries/reload", summary="Reload the named queries")
+async def reload_queries():
+    """Re-read the query modules, drop cached results and warm the new plans."""
+    load_query_registry()
+    dropped = query_results.clear()
+    warmed = await warm_queries() if query_registry else {}
+    return {"queries": len(query_registry), "error": query_registry_error, "invalidated": dropped,
+            "warm_errors": {name: err for name, err in warmed.items() if err}}
+
+
+@app.post("/queries/{name}", response_model=NamedQueryResponse, summary="Run a named query")
+async def run_named_query(name: str, body: NamedQueryRequest):
+    """
+    Run a query from the registry with `params`.
+
+    The query text never changes between calls, so Neo4j plans it once.
+    Queries with a `ttl` serve repeated calls with the same params from memory.
+    """
+    query = registered_query(name)
+    try:
+        params = query.bind(body.params)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    timing = QueryTiming()
+    key = ResultCache.key(name, params)
+    if query.ttl > 0:
+        cached = query_results.get(key)
+        if cached is not None:
+            return timed_response("queries", query.cypher, {**cached, "cached": True}, timing)
+
+    access = WRITE_ACCESS if query.access == "write" else READ_ACCESS
+    try:
+        async with pooled_session(default_access_mode=access) as s:
+            run_started = time.perf_counter()
+            result = await s.run(query.cypher, params)
+            timing.ran(run_started)
+            rows = await read_rows(result, timing)
+            timing.summarize(await result.consume())
+    except Exception as e:
+        query_metrics.error("queries")
+        raise HTTPException(status_code=400, detail=f"Cypher error: {e}")
+
+    payload = rows_payload(rows)
+    query_results.put(key, query.ttl, payload)
+    return timed_response("queries", query.cypher, {**payload, "cached": False}, timing)
+
+
+@app.get("/metrics/queries", summary="Named query result cache")
+async def named_query_metrics():
+    return query_results.snapshot()
+
+
+@app.get("/metrics/pool", summary="Connection pool usage")
+async def pool_metrics():
+    return pool_stats.snapshot()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics")
+async def prometheus_metrics():
+    """Query counts, rows, bytes and per-phase time by endpoint, plus pool gauges."""
+    gauges = {
+        "pool_in_use": ("Sessions checked out of the connection pool.", pool_stats.in_use),
+        "pool_peak_in_use": ("Most sessions checked out at once.", pool_stats.peak_in_use),
+    }
+    return PlainTextResponse(query_metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/slow-queries", summary="Recent slow queries")
+async def slow_query_log():
+    return {"threshold_ms": slow_queries.threshold_ms, "queries": list(slow_queries.entries)}
@@ -0,0 +1,291 @@
+import sys
+import argparse
+import re
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# `// key: value` comment lines annotate the statement that follows them
+ANNOTATION = re.compile(r'^//\s*(\w+)\s*:\s*(.*?)\s*$')
+# @param name::type - description
+PARAM_TAG = re.compile(r'^(\w+)\s*(?:::\s*(\S+))?\s*(?:-\s*(.*))?$')
+
+# a run of code up to the next `;`, comment, or string that doesn't close on the same line;
+# complete strings and identifiers are part of the run, so their contents are never split
+CODE_RUN = re.compile(r"""(?:[^;'"`/]+|/(?![/*])|'[^'\\\n]*(?:\\.[^'\\\n]*)*'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"|`[^`\n]*`)*""")
+STRING_END = {
+    "'": re.compile(r"[\\']"),
+    '"': re.compile(r'[\\"]'),
+    '`': re.compile(r'`'),
+}
+
+CODE, BLOCK_COMMENT, QUOTED = 0, 1, 2
+
+@dataclass
+class Statement:
+    """A statement with its comments removed, and the source lines it spans (1-based)"""
+    text: str
+    start_line: int
+    end_line: int
+    annotations: Dict[str, str] = field(default_factory=dict)
+
+@dataclass
+class ModuleHeader:
+    """The `@module` doc comment of a Cypher module"""
+    name: str
+    description: str = ''
+    params: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    plugins: List[str] = field(default_factory=list)
+
+def parse_module_header(doc:str) -> Optional[ModuleHeader]:
+    """
+    Parse a `/** ... */` doc comment; returns None unless it has a `@module` tag
+    """
+    lines = []
+    for line in doc.strip()[3:-2].splitlines():
+        line = line.strip()
+        lines.append(line[1:].strip() if line.startswith('*') else line)
+
+    header = None
+    description = []
+    params = {}
+    plugins = []
+    tagged = False
+    for line in lines:
+        if not line.startswith('@'):
+            # the description is the text before the first tag
+            if not tagged:
+                description.append(line)
+            continue
+        tagged = True
+        tag, _, value = line[1:].partition(' ')
+        value = value.strip()
+        if tag == 'module':
+            header = ModuleHeader(value)
+        elif tag == 'param':
+            match = PARAM_TAG.match(value)
+            if match:
+                params[match.group(1)] = {'type': match.group(2) or 'any', 'description': match.group(3) or ''}
+        elif tag == 'plugins':
+            plugins = [p.strip() for p in value.split(',') if p.strip()]
+    if header is None:
+        return None
+    header.description = '\n'.join(description).strip()
+    header.params = params
+    header.plugins = plugins
+    return header
+
+class CypherTokenizer:
+    """
+    Single pass Cypher tokenizer, fed blocks of whole lines, that yields statements as they end.
+
+    Understands '...' and "..." strings (with backslash escapes), `backticked`
+    identifiers, and // and /* */ comments, so semicolons and comment markers
+    inside any of them are kept as text. The first `/** */` comment with a
+    `@module` tag is parsed into `header`.
+    """
+
+    def __init__(self):
+        self.header: Optional[ModuleHeader] = None
+        self._state = CODE
+        self._quote = ''
+        self._doc: Optional[List[str]] = None
+        self._comment_start = 0
+        self._buffer: List[str] = []
+        self._start_line: Optional[int] = None
+        self._annotations: Dict[str, str] = {}
+        # line number at `_line_pos` in the current block, counted lazily
+        self._line = 1
+        self._line_pos = 0
+        self._text = ''
+
+    def _line_at(self, pos:int) -> int:
+        self._line += self._text.count('\n', self._line_pos, pos)
+        self._line_pos = pos
+        return self._line
+
+    def _code(self, start:int, end:int) -> None:
+        segment = self._text[start:end]
+        if self._start_line is None:
+            leading = len(segment) - len(segment.lstrip())
+            if leading == len(segment):
+                return
+            self._start_line = self._line_at(start + leading)
+        self._buffer.append(segment)
+
+    def _end_statement(self) -> Optional[Statement]:
+        text = ''.join(self._buffer).strip()
+        statement = None
+        if text:
+            # comments keep their line breaks in the text, so it spans the same lines as the source
+            statement = Statement(text, self._start_line, self._start_line + text.count('\n'), self._annotations)
+            self._annotations = {}
+        self._buffer = []
+        self._start_line = None
+        return statement
+
+    def _end_doc(self) -> None:
+        if self._doc is not None and self.header is None:
+            self.header = parse_module_header(''.join(self._doc))
+        self._doc = None
+
+    def _skip_comment(self, comment:str) -> None:
+        # keep the tokens on either side apart, and the statement's line count right
+        if self._start_line is not None:
+            self._buffer.append('\n' * comment.count('\n') or ' ')
+
+    def feed(self, text:str) -> Iterator[Statement]:
+        """Tokenize the next block of text, which has to end with a whole line"""
+        self._text = text
+        self._line_pos = 0
+        pos = 0
+        end = len(text)
+        while pos < end:
+            if self._state == CODE:
+                run = CODE_RUN.match(text, pos).end()
+                if run > pos:
+                    self._code(pos, run)
+                    pos = run
+                if pos >= end:
+                    break
+                token = text[pos]
+                if token == ';':
+                    pos += 1
+                    statement = self._end_statement()
+                    if statement is not None:
+                        yield statement
+                elif text.startswith('//', pos):
+                    eol = text.find('\n', pos)
+                    eol = end if eol < 0 else eol
+                    if self._start_line is None:
+                        annotation = ANNOTATION.match(text[pos:eol].strip())
+                        if annotation:
+                            self._annotations[annotation.group(1)] = annotation.group(2)
+                    pos = eol
+                elif token == '/':
+                    # the run only stops at a slash that opens a /* comment
+                    if text.startswith('/**', pos) and not text.startswith('/**/', pos):
+                        self._doc = []
+                    self._state = BLOCK_COMMENT
+                    self._comment_start = pos
+                    pos += 2
+                else:
+                    # a string or identifier that continues on the next line
+                    self._state = QUOTED
+                    self._quote = token
+                    self._code(pos, pos + 1)
+                    pos += 1
+            elif self._state == BLOCK_COMMENT:
+                close = text.find('*/', pos)
+                stop = end if close < 0 else close + 2
+                if self._doc is not None:
+                    self._doc.append(text[self._comment_start:stop])
+                self._skip_comment(text[self._comment_start:stop])
+                self._comment_start = 0
+                if close < 0:
+                    break
+                self._end_doc()
+                pos = stop
+                self._state = CODE
+            else:
+                match = STRING_END[self._quote].search(text, pos)
+                if match is None:
+                    self._code(pos, end)
+                    break
+                if match.group() == '\\':
+                    # the escaped character, even a quote, stays in the string
+                    self._code(pos, match.end() + 1)
+                    pos = match.end() + 1
+                else:
+                    self._code(pos, match.end())
+                    pos = match.end()
+                    self._state = CODE
+        self._line_at(end)
+
+    def close(self) -> Iterator[Statement]:
+        """Yield the last statement when the module doesn't end with a semicolon"""
+        statement = self._end_statement()
+        if statement is not None:
+            yield statement
+
+def read_blocks(f:TextIO, size:int=1 << 20) -> Iterator[str]:
+    """Read a file in blocks of about `size` characters, each ending with a whole line"""
+    while True:
+        block = f.read(size)
+        if not block:
+            return
+        if not block.endswith('\n'):
+            block += f.readline()
+        yield block
+
+def iter_statements(blocks:Iterable[str], tokenizer:Optional[CypherTokenizer]=None) -> Iterator[Statement]:
+    """
+    Lazily split Cypher into statements, from blocks of whole lines (or single lines)
+    """
+    tokenizer = tokenizer or CypherTokenizer()
+    for block in blocks:
+        yield from tokenizer.feed(block)
+    yield from tokenizer.close()
+
+def iter_cypher_file(filename:str, tokenizer:Optional[CypherTokenizer]=None) -> Iterator[Statement]:
+    """
+    Stream the statements of a Cypher file, reading it a block at a time
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        yield from iter_statements(read_blocks(f), tokenizer)
+
+def read_cypher_module(filename:str) -> Tuple[Optional[ModuleHeader], List[Statement]]:
+    """
+    Parse a Cypher module file into its `@module` header (if any) and statements
+    """
+    tokenizer = CypherTokenizer()
+    statements = list(iter_cypher_file(filename, tokenizer))
+    return tokenizer.header, statements
+
+def cypher_parser(cypher:str) -> List[str]:
+    """
+    Parse a Cypher module and return a list of statements
+    """
+    return [s.text for s in iter_statements([cypher])]
+
+def cypher_annotated_parser(cypher:str) -> List[Tuple[Dict[str, str], str]]:
+    """
+    Parse a Cypher module and return (annotations, statement) pairs.
+
+    Annotations are `// key: value` line comments above a statement, e.g.
+    `// name: companyFilings`; other comments are dropped as in `cypher_parser`.
+    """
+    return [(s.annotations, s.text) for s in iter_statements([cypher])]
+
+def parse_cypher_file(filename:str) -> List[str]:
+    """
+    Parse a Cypher file and return a list of statements
+    """
+    return [s.text for s in iter_cypher_file(filename)]
+
+def main() -> int:
+    """Parse cypher module and show some stats"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='CypherModuleParser',
+                    description='Parses a cypher module and shows some stats')
+    arg_parser.add_argument('filename', nargs='+', help='Cypher module files to parse')
+    arg_parser.add_argument('--statements', action='store_true', help='list each statement with its lines')
+    args = arg_parser.parse_args()
+    print(args.filename)
+
+    for filename in args.filename:
+        header, result = read_cypher_module(filename)
+        print(f"File: {filename}...")
+        if header is not None:
+            print(f"\tModule: {header.name} (params: {', '.join(header.params) or 'none'})")
+        print(f"\tNumber of statements: {len(result)}")
+        if args.statements:
+            for statement in result:
+                first_line = statement.text.splitlines()[0]
+                print(f"\t{statement.start_line:>5}-{statement.end_line:<5} {first_line[:70]}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())  # next section explains the use of sys.exit
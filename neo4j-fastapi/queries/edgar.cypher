@@ -0,0 +1,61 @@
+/**
+ * Named queries served by POST /queries/{name}.
+ *
+ * Each statement is registered under its `// name:` annotation. `// params:` declares
+ * its parameters as `name: type` or `name: type = default` (types: string, int, float,
+ * bool, list), `// ttl:` caches results for that many seconds, and `// description:`
+ * is shown by GET /queries.
+ */
+
+// name: nodeCounts
+// description: Number of nodes per label
+// ttl: 300
+MATCH (n)
+RETURN labels(n)[0] AS label, count(*) AS total
+ORDER BY total DESC;
+
+// name: companyByCusip
+// description: A company and its filings, by 6 digit CUSIP
+// params: cusip6: string
+// ttl: 300
+MATCH (com:Company {cusip6: $cusip6})
+OPTIONAL MATCH (com)-[:FILED]->(form:Form)
+RETURN com.cusip6 AS cusip6, com.names AS names, com.cusip AS cusip,
+       collect(form.formId) AS forms;
+
+// name: searchCompanies
+// description: Companies whose names match a fulltext search
+// params: search: string, limit: int = 10
+// ttl: 60
+CALL db.index.fulltext.queryNodes('fullTextCompanyNames', $search) YIELD node, score
+RETURN node.cusip6 AS cusip6, node.names AS names, score
+LIMIT $limit;
+
+// name: companySection
+// description: The chunks of one item of a company's 10-K, in order
+// params: cusip6: string, item: string = "item1", limit: int = 20
+MATCH (com:Company {cusip6: $cusip6})-[:FILED]->(form:Form)-[:SECTION {item: $item}]->(first:Chunk)
+MATCH (first)-[:NEXT*0..]->(chunk:Chunk)
+RETURN form.formId AS formId, chunk.chunkId AS chunkId, chunk.chunkSeqId AS seq, chunk.text AS text
+ORDER BY seq
+LIMIT $limit;
+
+// name: topHolders
+// description: The largest managers holding a company, by position value
+// params: cusip6: string, limit: int = 10
+// ttl: 300
+MATCH (mgr:Manager)-[owns:OWNS_STOCK_IN]->(com:Company {cusip6: $cusip6})
+RETURN mgr.cik AS managerCik, mgr.name AS managerName,
+       owns.reportCalendarOrQuarter AS quarter, owns.value AS value, owns.shares AS shares
+ORDER BY value DESC
+LIMIT $limit;
+
+// name: managerHoldings
+// description: A manager's largest positions, by position value
+// params: managerCik: int, limit: int = 25
+// ttl: 300
+MATCH (mgr:Manager {cik: $managerCik})-[owns:OWNS_STOCK_IN]->(com:Company)
+RETURN com.cusip6 AS cusip6, com.names[0] AS companyName,
+       owns.reportCalendarOrQuarter AS quarter, owns.value AS value, owns.shares AS shares
+ORDER BY value DESC
+LIMIT $limit;
@@ -1,27 +1,60 @@
+import asyncio
+import json
 import os
-from unittest.mock import Mock, patch
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
 
+class Summary:
+    """Minimal stand-in for neo4j.ResultSummary."""
+
+    def __init__(self, profile=None):
+        self.result_available_after = 3
+        self.result_consumed_after = 5
+        self.profile = profile
+
+
+class AsyncResult:
+    """Minimal stand-in for neo4j.AsyncResult over a list of records."""
+
+    def __init__(self, records, profile=None):
+        self._records = list(records)
+        self._summary = Summary(profile)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self._records:
+            yield record
+
+    async def single(self):
+        return self._records[0] if self._records else None
+
+    async def consume(self):
+        return self._summary
+
+
 @pytest.fixture
 def mock_neo4j_driver():
     """Mock Neo4j driver to avoid requiring a real database."""
-    with patch("neo4j.GraphDatabase.driver") as mock_driver:
+    with patch("neo4j.AsyncGraphDatabase.driver") as mock_driver:
         mock_session = Mock()
-        mock_result = Mock()
         mock_record = Mock()
         mock_record.get.return_value = 1
-        mock_record.single.return_value = mock_record
         mock_record.keys.return_value = ["ok"]
-        mock_result.single.return_value = mock_record
-        mock_session.run.return_value = mock_result
-        mock_session.__enter__ = Mock(return_value=mock_session)
-        mock_session.__exit__ = Mock(return_value=False)
+        mock_session.run = AsyncMock(return_value=AsyncResult([mock_record]))
+        mock_session.close = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=False)
         mock_driver_instance = Mock()
         mock_driver_instance.session.return_value = mock_session
-        mock_driver_instance.close = Mock()
+        mock_driver_instance.close = AsyncMock()
         mock_driver.return_value = mock_driver_instance
         yield mock_driver
 
@@ -60,11 +93,11 @@ def test_health_endpoint(client):
 def test_cypher_endpoint_with_valid_query(client, mock_neo4j_driver):
     """Test executing a valid Cypher query."""
     # Mock the query result
-    mock_session = mock_neo4j_driver.return_value.session.return_value.__enter__.return_value
+    mock_session = mock_neo4j_driver.return_value.session.return_value
     mock_record = Mock()
     mock_record.keys.return_value = ["count"]
     mock_record.get.return_value = 42
-    mock_session.run.return_value = [mock_record]
+    mock_session.run.return_value = AsyncResult([mock_record])
 
     response = client.post(
         "/cypher",
@@ -91,7 +124,7 @@ def test_cypher_endpoint_with_empty_query(client):
 def test_cypher_endpoint_with_invalid_query(client, mock_neo4j_driver):
     """Test handling of Cypher errors."""
     # Mock a Cypher error
-    mock_session = mock_neo4j_driver.return_value.session.return_value.__enter__.return_value
+    mock_session = mock_neo4j_driver.return_value.session.return_value
     mock_session.run.side_effect = Exception("Cypher syntax error")
 
     response = client.post(
@@ -118,3 +151,395 @@ def test_missing_password_env_var():
 
         # Import should raise ValueError
         import app
+
+
+def _ndjson(response):
+    import json
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_cypher_stream_endpoint(client, mock_neo4j_driver):
+    """Test streaming rows as NDJSON."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    records = []
+    for i in range(3):
+        mock_record = Mock()
+        mock_record.keys.return_value = ["n"]
+        mock_record.get.return_value = i
+        records.append(mock_record)
+    mock_session.run.return_value = AsyncResult(records)
+
+    response = client.post(
+        "/cypher/stream",
+        json={"query": "UNWIND range(0, 2) AS n RETURN n"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = _ndjson(response)
+    assert [line["data"]["n"] for line in lines if line["type"] == "row"] == [0, 1, 2]
+    assert lines[-1] == {"type": "end", "count": 3, "next_cursor": None}
+    mock_session.close.assert_called()
+
+
+def test_cypher_stream_endpoint_pages_with_cursor(client, mock_neo4j_driver):
+    """Test that pages are cut with SKIP/LIMIT on the server and the cursor resumes after the page."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    calls = []
+
+    def run(query, params):
+        calls.append((query, params))
+        records = []
+        for i in range(5)[params["pageOffset"]:params["pageOffset"] + params["pageLimit"]]:
+            mock_record = Mock()
+            mock_record.keys.return_value = ["n"]
+            mock_record.get.return_value = i
+            records.append(mock_record)
+        return AsyncResult(records)
+
+    mock_session.run.side_effect = run
+
+    first = _ndjson(client.post(
+        "/cypher/stream",
+        json={"query": "UNWIND range(0, 4) AS n RETURN n", "page_size": 2}
+    ))
+    assert [line["data"]["n"] for line in first if line["type"] == "row"] == [0, 1]
+    cursor = first[-1]["next_cursor"]
+    assert cursor
+
+    second = _ndjson(client.post(
+        "/cypher/stream",
+        json={"query": "UNWIND range(0, 4) AS n RETURN n", "page_size": 2, "cursor": cursor}
+    ))
+    assert [line["data"]["n"] for line in second if line["type"] == "row"] == [2, 3]
+
+    third = _ndjson(client.post(
+        "/cypher/stream",
+        json={"query": "UNWIND range(0, 4) AS n RETURN n", "page_size": 2, "cursor": second[-1]["next_cursor"]}
+    ))
+    assert [line["data"]["n"] for line in third if line["type"] == "row"] == [4]
+    assert third[-1]["next_cursor"] is None
+
+    query, params = calls[1]
+    assert query == "UNWIND range(0, 4) AS n RETURN n\nSKIP $pageOffset LIMIT $pageLimit"
+    assert params == {"pageOffset": 2, "pageLimit": 3}
+
+
+@pytest.mark.parametrize("query", [
+    "USE neo4j MATCH (n) RETURN n.name AS name, n.limit AS limit ORDER BY name",
+    "PROFILE MATCH (n) RETURN n",
+    "CALL db.labels() YIELD label RETURN label",
+    "CREATE (n:Note {text: 'RETURN 1 LIMIT 2'}) RETURN n;",
+    "MATCH (n) CALL { WITH n RETURN n.x AS x LIMIT 1 } RETURN n, x // RETURN * LIMIT 5",
+])
+def test_page_query_appends_skip_and_limit_to_the_final_return(query):
+    """Test that pageable queries keep their own columns, with SKIP/LIMIT added after the final RETURN."""
+    from app import page_query
+
+    assert page_query(query) == query.rstrip(";") + "\nSKIP $pageOffset LIMIT $pageLimit"
+
+
+@pytest.mark.parametrize("query, detail", [
+    ("CALL db.labels()", "ends in RETURN"),
+    ("MATCH (n:Note) SET n.seen = true", "ends in RETURN"),
+    ("MATCH (n) WHERE n.text = 'RETURN' DELETE n", "ends in RETURN"),
+    ("RETURN 1 AS n UNION RETURN 2 AS n", "UNION"),
+    ("MATCH (n) RETURN n ORDER BY n.name LIMIT 10", "SKIP/LIMIT"),
+    ("MATCH (n) RETURN n SKIP $offset", "SKIP/LIMIT"),
+])
+def test_cypher_stream_rejects_queries_it_cannot_page(client, mock_neo4j_driver, query, detail):
+    """Test that page_size on a query without a final RETURN of its own is a 400, before anything runs."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    mock_session.run.reset_mock()
+    response = client.post("/cypher/stream", json={"query": query, "page_size": 2})
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
+    mock_session.run.assert_not_called()
+
+
+def test_cypher_stream_rejects_profile(client, mock_neo4j_driver):
+    """Test that asking a stream for a profile is an error rather than silently ignored."""
+    response = client.post("/cypher/stream", json={"query": "RETURN 1 AS ok", "profile": True})
+    assert response.status_code == 400
+    assert "profile" in response.json()["detail"]
+
+
+def test_cypher_stream_releases_the_session_if_the_stream_never_starts(client, mock_neo4j_driver):
+    """Test that the response's background task releases the session when the body is never read."""
+    import app
+
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    mock_session.close.reset_mock()
+    in_use = app.pool_stats.in_use
+    response = asyncio.run(app.stream_cypher(app.CypherStreamRequest(query="RETURN 1 AS ok")))
+    assert app.pool_stats.in_use == in_use + 1
+
+    asyncio.run(response.background())
+    asyncio.run(response.background())
+    assert app.pool_stats.in_use == in_use
+    mock_session.close.assert_awaited_once()
+
+
+def test_cypher_stream_endpoint_rejects_cursor_of_another_query(client, mock_neo4j_driver):
+    """Test that a cursor only resumes the query and params it was issued for."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    records = []
+    for i in range(3):
+        mock_record = Mock()
+        mock_record.keys.return_value = ["n"]
+        mock_record.get.return_value = i
+        records.append(mock_record)
+    mock_session.run.return_value = AsyncResult(records)
+
+    first = _ndjson(client.post(
+        "/cypher/stream",
+        json={"query": "UNWIND range(0, $last) AS n RETURN n", "params": {"last": 2}, "page_size": 2}
+    ))
+    cursor = first[-1]["next_cursor"]
+    assert cursor
+
+    other_query = client.post(
+        "/cypher/stream",
+        json={"query": "UNWIND range(0, 9) AS n RETURN n", "page_size": 2, "cursor": cursor}
+    )
+    assert other_query.status_code == 400
+    assert "different query" in other_query.json()["detail"]
+
+    other_params = client.post(
+        "/cypher/stream",
+        json={"query": "UNWIND range(0, $last) AS n RETURN n", "params": {"last": 9}, "page_size": 2,
+              "cursor": cursor}
+    )
+    assert other_params.status_code == 400
+
+
+def test_cypher_stream_endpoint_with_invalid_cursor(client):
+    """Test that malformed cursors are rejected."""
+    response = client.post(
+        "/cypher/stream",
+        json={"query": "RETURN 1", "cursor": "not-a-cursor"}
+    )
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.json()["detail"]
+
+
+def test_cypher_stream_endpoint_with_invalid_query(client, mock_neo4j_driver):
+    """Test that errors raised before the first row still return a 400."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    mock_session.run.side_effect = Exception("Cypher syntax error")
+
+    response = client.post(
+        "/cypher/stream",
+        json={"query": "INVALID CYPHER"}
+    )
+    assert response.status_code == 400
+    assert "Cypher error" in response.json()["detail"]
+
+
+def test_pool_metrics_endpoint(client):
+    """Test that pool usage is reported and sessions are released."""
+    client.post("/cypher", json={"query": "RETURN 1 AS ok"})
+    response = client.get("/metrics/pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["in_use"] == 0
+    assert data["acquired"] >= 1
+    assert data["max_size"] > 0
+    assert 0 <= data["saturation"] <= 1
+
+
+def test_cypher_endpoint_reports_server_timing(client, mock_neo4j_driver):
+    """Test that query phases are reported in Server-Timing and the Prometheus metrics."""
+    response = client.post("/cypher", json={"query": "RETURN 1 AS ok"})
+    assert response.status_code == 200
+    phases = {entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")}
+    assert phases == {"send", "available", "consumed", "serialize", "total"}
+    assert "available;dur=3.0" in response.headers["server-timing"]
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert 'neo4j_fastapi_queries_total{endpoint="cypher"}' in metrics.text
+    assert 'neo4j_fastapi_query_phase_seconds_total{endpoint="cypher",phase="available"}' in metrics.text
+
+
+def test_cypher_endpoint_with_profile(client, mock_neo4j_driver):
+    """Test that profile=true runs PROFILE and returns db hits per operator."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    plan = {
+        "operatorType": "ProduceResults@neo4j", "dbHits": 0, "rows": 1,
+        "children": [{"operatorType": "NodeCountFromCountStore@neo4j", "dbHits": 1, "rows": 1}],
+    }
+    mock_session.run.return_value = AsyncResult([], profile=plan)
+
+    response = client.post("/cypher", json={"query": "MATCH (n) RETURN count(n)", "profile": True})
+    assert response.status_code == 200
+    assert mock_session.run.call_args[0][0] == "PROFILE MATCH (n) RETURN count(n)"
+    profile = response.json()["profile"]
+    assert profile["dbHits"] == 1
+    assert [(op["operator"], op["depth"]) for op in profile["operators"]] == [
+        ("ProduceResults@neo4j", 0), ("NodeCountFromCountStore@neo4j", 1)
+    ]
+
+
+def test_list_named_queries(client):
+    """Test that the queries in queries/*.cypher are registered with their params."""
+    response = client.get("/queries")
+    assert response.status_code == 200
+    queries = {q["name"]: q for q in response.json()["queries"]}
+    assert "topHolders" in queries
+    assert queries["topHolders"]["params"]["cusip6"] == {"type": "string", "required": True}
+    assert queries["topHolders"]["params"]["limit"] == {"type": "int", "required": False, "default": 10}
+
+
+def test_named_query_runs_with_bound_params(client, mock_neo4j_driver):
+    """Test that a named query runs its registered text with validated params and defaults."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    mock_session.run.reset_mock()
+
+    response = client.post("/queries/companySection", json={"params": {"cusip6": "64110D"}})
+    assert response.status_code == 200
+    assert response.json()["cached"] is False
+    query, params = mock_session.run.call_args[0]
+    assert "MATCH (com:Company {cusip6: $cusip6})" in query
+    assert params == {"cusip6": "64110D", "item": "item1", "limit": 20}
+
+
+def test_named_query_rejects_bad_params(client):
+    """Test that missing, unknown and mistyped params are rejected before querying."""
+    assert client.post("/queries/topHolders", json={"params": {}}).status_code == 422
+    assert client.post("/queries/topHolders", json={"params": {"cusip6": "1", "other": 1}}).status_code == 422
+    response = client.post("/queries/topHolders", json={"params": {"cusip6": "1", "limit": "10"}})
+    assert response.status_code == 422
+    assert "must be of type int" in response.json()["detail"]
+    assert client.post("/queries/noSuchQuery", json={"params": {}}).status_code == 404
+
+
+def test_named_query_results_are_cached_for_ttl(client, mock_neo4j_driver):
+    """Test that a query with a ttl serves repeated calls from the result cache."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    body = {"params": {"cusip6": "037833", "limit": 3}}
+    first = client.post("/queries/topHolders", json=body)
+    calls = mock_session.run.call_count
+    second = client.post("/queries/topHolders", json=body)
+    assert first.json()["cached"] is False
+    assert second.json()["cached"] is True
+    assert second.json()["rows"] == first.json()["rows"]
+    assert mock_session.run.call_count == calls
+
+
+def test_query_registry_loads_without_notebooks():
+    """Test that the registry builds from queries/edgar.cypher with the parser shipped next to app.py."""
+    service_dir = Path(__file__).resolve().parent.parent
+    script = (
+        "import json, sys\n"
+        "sys.path[:] = [p for p in sys.path if 'kg-construction' not in p]\n"
+        "import app, cypher_parser\n"
+        "queries = app.load_query_modules('queries/edgar.cypher')\n"
+        "print(json.dumps({'parser': cypher_parser.__file__, 'queries': sorted(queries)}))\n"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+    env["NEO4J_PASSWORD"] = "test_password"
+    result = subprocess.run([sys.executable, "-c", script], cwd=service_dir, env=env,
+                            capture_output=True, text=True, check=True)
+    loaded = json.loads(result.stdout)
+    assert Path(loaded["parser"]).resolve().parent == service_dir
+    assert {"topHolders", "companySection", "managerHoldings"} <= set(loaded["queries"])
+
+
+def test_shipped_cypher_parser_matches_notebooks():
+    """Test that the copy of cypher_parser.py in the service is the kg-construction one."""
+    service_dir = Path(__file__).resolve().parent.parent
+    notebooks_parser = service_dir.parent / "notebooks" / "kg-construction" / "cypher_parser.py"
+    if not notebooks_parser.exists():
+        pytest.skip("kg-construction notebooks not checked out")
+    assert (service_dir / "cypher_parser.py").read_text() == notebooks_parser.read_text()
+
+
+def test_shipped_query_metrics_matches_graphvis():
+    """Test that the copy of query_metrics.py in the service is the graphvis one."""
+    service_dir = Path(__file__).resolve().parent.parent
+    graphvis_metrics = service_dir.parent / "graphvis" / "query_metrics.py"
+    if not graphvis_metrics.exists():
+        pytest.skip("graphvis not checked out")
+    assert (service_dir / "query_metrics.py").read_text() == graphvis_metrics.read_text()
+
+
+def test_write_queries_cannot_have_a_ttl(client, tmp_path):
+    """Test that a write query with a ttl is rejected when the module loads."""
+    from app import load_query_modules
+
+    module = tmp_path / "writes.cypher"
+    module.write_text(
+        "// name: renameCompany\n"
+        "// params: cusip6: string, name: string\n"
+        "// access: write\n"
+        "// ttl: 60\n"
+        "MATCH (com:Company {cusip6: $cusip6}) SET com.name = $name;\n"
+    )
+    with pytest.raises(ValueError, match="can't have a ttl"):
+        load_query_modules(str(module))
+
+    module.write_text(module.read_text().replace("// ttl: 60\n", ""))
+    assert load_query_modules(str(module))["renameCompany"].access == "write"
+
+
+def _records(key, values):
+    records = []
+    for value in values:
+        mock_record = Mock()
+        mock_record.keys.return_value = [key]
+        mock_record.get.return_value = value
+        records.append(mock_record)
+    return records
+
+
+def test_cypher_batch_in_one_transaction(client, mock_neo4j_driver):
+    """Test that a batch runs in order in one transaction and stops after a failed statement."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+    tx = Mock()
+    tx.run = AsyncMock(side_effect=[
+        AsyncResult(_records("n", [1])),
+        Exception("Cypher syntax error"),
+    ])
+    tx.close = AsyncMock()
+    mock_session.begin_transaction = AsyncMock(return_value=tx)
+
+    response = client.post("/cypher/batch", json={"statements": [
+        {"query": "RETURN $n AS n", "params": {"n": 1}},
+        {"query": "INVALID CYPHER"},
+        {"query": "RETURN 3 AS n"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3
+    assert data["errors"] == 2
+    assert data["results"][0]["rows"] == [{"n": 1}]
+    assert "Cypher error" in data["results"][1]["error"]
+    assert "Not run" in data["results"][2]["error"]
+    assert tx.run.call_count == 2
+    assert tx.run.call_args_list[0][0] == ("RETURN $n AS n", {"n": 1})
+    tx.close.assert_called_once()
+
+
+def test_cypher_batch_concurrent(client, mock_neo4j_driver):
+    """Test that concurrent batches keep statement order and fail per statement."""
+    mock_session = mock_neo4j_driver.return_value.session.return_value
+
+    async def run(query, params):
+        if query == "INVALID CYPHER":
+            raise Exception("Cypher syntax error")
+        return AsyncResult(_records("n", [params["n"]]))
+
+    mock_session.run = AsyncMock(side_effect=run)
+    statements = [{"query": "RETURN $n AS n", "params": {"n": i}} for i in range(5)]
+    statements.insert(2, {"query": "INVALID CYPHER"})
+
+    response = client.post("/cypher/batch", json={"statements": statements, "mode": "concurrent"})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["rows"][0]["n"] if "rows" in r else None for r in results] == [0, 1, None, 2, 3, 4]
+    assert client.get("/metrics/pool").json()["in_use"] == 0
+
+
+def test_cypher_batch_requires_statements(client):
+    """Test that an empty batch is rejected."""
+    assert client.post("/cypher/batch", json={"statements": []}).status_code == 422
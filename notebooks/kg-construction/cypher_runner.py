@@ -0,0 +1,333 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from cypher_parser import ModuleHeader, Statement, read_cypher_module
+from kg_loader import notify_graph_changed
+
+KG_NAME = 'EdgarKG'
+
+# Index and constraint creation only touch the schema, so consecutive schema
+# statements don't depend on each other and can be sent together.
+SCHEMA_STATEMENT = re.compile(r'^(?:CREATE|DROP)\s+(?:OR\s+REPLACE\s+)?(?:CONSTRAINT|(?:\w+\s+)?INDEX)\b', re.IGNORECASE)
+# `:auto` sends the rest of the statement as an auto-commit transaction, which `CALL {} IN TRANSACTIONS` needs
+AUTO_PREFIX = re.compile(r'^:auto\b\s*', re.IGNORECASE)
+CLIENT_COMMAND = re.compile(r'^:(\w+)\s*(.*)$', re.DOTALL)
+ARROW_PARAM = re.compile(r'^(\w+)\s*=>\s*(.*)$', re.DOTALL)
+PARAM_REFERENCE = re.compile(r'\$(\w+)')
+
+# the pieces of a Cypher map literal that differ from JSON: unquoted or backticked keys,
+# single-quoted strings and upper case literals
+MAP_TOKEN = re.compile(r'''"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|`[^`]*`(?=\s*:)|[A-Za-z_]\w*(?=\s*:)|[A-Za-z_]\w*|[^"'`A-Za-z_]+''')
+LITERALS = {'true': 'true', 'false': 'false', 'null': 'null'}
+
+LOAD_CHECKPOINT_QUERY = """
+MATCH (kg:KnowledgeGraph {name: $name})
+RETURN coalesce(kg.completedStatements, []) AS completed
+"""
+
+RECORD_CHECKPOINT_QUERY = """
+MERGE (kg:KnowledgeGraph {name: $name})
+  ON CREATE SET kg.createdAt = datetime()
+SET kg.completedStatements = [h IN coalesce(kg.completedStatements, []) WHERE NOT h IN $hashes] + $hashes,
+    kg.lastOperation = datetime(),
+    kg.lastModule = $module
+"""
+
+CLEAR_CHECKPOINT_QUERY = """
+MATCH (kg:KnowledgeGraph {name: $name})
+SET kg.completedStatements = [h IN coalesce(kg.completedStatements, []) WHERE NOT h IN $hashes]
+"""
+
+
+@dataclass
+class ModuleStatement:
+    """A statement of a module, ready to send"""
+    index: int
+    source: Statement
+    query: str
+    kind: str  # 'schema', 'write' or 'auto'
+    hash: str
+
+    @property
+    def first_line(self) -> str:
+        return self.query.splitlines()[0][:60]
+
+
+@dataclass
+class StatementTiming:
+    """How one statement went, and what it wrote"""
+    index: int
+    start_line: int
+    kind: str
+    status: str = 'ran'  # 'ran', 'skipped' or 'failed'
+    seconds: float = 0.0
+    counters: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    text: str = ''
+
+    def __str__(self) -> str:
+        written = ', '.join(f"{name.replace('_', ' ')} {count}" for name, count in self.counters.items())
+        detail = self.error if self.status == 'failed' else written
+        return (f"[{self.index:>3}] line {self.start_line:<5} {self.kind:<6} {self.status:<7} "
+                f"{self.seconds:8.2f}s  {self.text}{'  (' + detail + ')' if detail else ''}")
+
+
+def parse_map_literal(text:str) -> Dict[str, Any]:
+    """
+    Parse a Cypher map of literal values, e.g. `{ name: "x", size: 10 }`, as `:params` takes it.
+
+    Raises ValueError for anything that isn't a literal, such as an expression.
+    """
+    parts = []
+    for token in MAP_TOKEN.findall(text.strip()):
+        if token.startswith("'"):
+            token = json.dumps(json.loads('"' + token[1:-1].replace('"', '\\"').replace("\\'", "'") + '"'))
+        elif token.startswith('`'):
+            token = json.dumps(token[1:-1])
+        elif token[0].isalpha() or token[0] == '_':
+            if token.lower() in LITERALS:
+                token = LITERALS[token.lower()]
+            else:
+                token = json.dumps(token)
+        parts.append(token)
+    try:
+        value = json.loads(''.join(parts))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"not a map of literal values: {text[:60]!r}") from e
+    if not isinstance(value, dict):
+        raise ValueError(f"not a map: {text[:60]!r}")
+    return value
+
+
+def client_params(command:str) -> Dict[str, Any]:
+    """
+    Parameters set by a `:param` or `:params` client command, either `{map}` or `name => value`
+    """
+    arrow = ARROW_PARAM.match(command)
+    if arrow:
+        return parse_map_literal(f"{{{arrow.group(1)}: {arrow.group(2)}}}")
+    return parse_map_literal(command)
+
+
+def statement_hash(module:str, query:str, params:Optional[Dict[str, Any]] = None) -> str:
+    """
+    Identify a statement by its module, its text, ignoring differences in whitespace,
+    and the values of the `params` it references, so it runs again when they change
+    """
+    key = f"{module}\n{' '.join(query.split())}"
+    used = {name: params[name] for name in set(PARAM_REFERENCE.findall(query)) if name in (params or {})}
+    if used:
+        key += '\n' + json.dumps(used, sort_keys=True, default=str)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def plan_module(header:Optional[ModuleHeader], statements:List[Statement],
+                overrides:Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[ModuleStatement]]:
+    """
+    Split a parsed module into the parameters its client commands set, overridden by
+    `overrides`, and the statements to send, hashed with the parameter values they use
+    """
+    module = header.name if header else ''
+    params: Dict[str, Any] = {}
+    planned = []
+    for statement in statements:
+        text = statement.text
+        auto = AUTO_PREFIX.match(text)
+        if auto:
+            query = text[auto.end():]
+            kind = 'auto'
+        elif text.startswith(':'):
+            command = CLIENT_COMMAND.match(text)
+            name = command.group(1).lower() if command else text
+            if name not in ('param', 'params'):
+                raise ValueError(f"line {statement.start_line}: unsupported client command :{name}")
+            params.update(client_params(command.group(2)))
+            continue
+        else:
+            query = text
+            kind = 'schema' if SCHEMA_STATEMENT.match(query) else 'write'
+        planned.append(ModuleStatement(len(planned) + 1, statement, query, kind, ''))
+    params.update(overrides or {})
+    for statement in planned:
+        statement.hash = statement_hash(module, statement.query, params)
+    return params, planned
+
+
+def stages(statements:List[ModuleStatement]) -> List[List[ModuleStatement]]:
+    """
+    Group statements into stages run one after another: a run of schema statements
+    is one stage, and every other statement is a stage of its own
+    """
+    grouped: List[List[ModuleStatement]] = []
+    for statement in statements:
+        if statement.kind == 'schema' and grouped and grouped[-1][0].kind == 'schema':
+            grouped[-1].append(statement)
+        else:
+            grouped.append([statement])
+    return grouped
+
+
+def load_checkpoint(driver, kg_name:str = KG_NAME, database:Optional[str] = None) -> Set[str]:
+    """Hashes of the statements already completed, from the `(:KnowledgeGraph)` node"""
+    records, _, _ = driver.execute_query(LOAD_CHECKPOINT_QUERY, name=kg_name, database_=database)
+    return set(records[0].get('completed') or []) if records else set()
+
+
+def run_statement(driver, statement:ModuleStatement, params:Dict[str, Any],
+                  database:Optional[str] = None) -> StatementTiming:
+    """
+    Send one statement with the module parameters; `:auto` statements as auto-commit transactions,
+    the rest in a retried write transaction as the Browser runs them
+    """
+    timing = StatementTiming(statement.index, statement.source.start_line, statement.kind, text=statement.first_line)
+    start = time.perf_counter()
+    try:
+        with driver.session(database=database) as session:
+            if statement.kind == 'auto':
+                summary = session.run(statement.query, params).consume()
+            else:
+                summary = session.execute_write(lambda tx: tx.run(statement.query, params).consume())
+    except Exception as e:
+        timing.status = 'failed'
+        timing.error = f"{type(e).__name__}: {e}"
+    else:
+        timing.counters = {name: count for name, count in vars(summary.counters).items()
+                           if count and not name.startswith('_')}
+    timing.seconds = time.perf_counter() - start
+    return timing
+
+
+def run_module(driver, filename:str, params:Optional[Dict[str, Any]] = None, kg_name:str = KG_NAME,
+               database:Optional[str] = None, parallelism:int = 4, restart:bool = False,
+               index_timeout:int = 300, notify:bool = True,
+               on_statement:Optional[Callable[[StatementTiming], None]] = None) -> List[StatementTiming]:
+    """
+    Run the statements of a Cypher module in order, resuming after the last completed one.
+
+    Parameters set by the module's `:params` command are overridden by `params`.
+    Each completed statement's hash, which covers the values of the parameters
+    it references, is added to `completedStatements` on the
+    `(:KnowledgeGraph {name: kg_name})` node, and statements already listed there
+    are skipped; `restart` clears this module's hashes first. Runs of consecutive
+    index and constraint statements are sent `parallelism` at a time, then the
+    runner waits for the indexes to come online before the next statement.
+    Stops at the first failure. Each statement's timing is passed to
+    `on_statement` as it finishes, and the timings are returned. If any statement ran, graphvis is
+    told the graph changed (see `kg_loader.notify_graph_changed`) unless `notify` is False.
+    """
+    header, statements = read_cypher_module(filename)
+    module_params, planned = plan_module(header, statements, params)
+    missing = [name for name in (header.params if header else {}) if name not in module_params]
+    if missing:
+        raise ValueError(f"missing module parameters: {', '.join(missing)}")
+    module = header.name if header else os.path.basename(filename)
+
+    if restart:
+        driver.execute_query(CLEAR_CHECKPOINT_QUERY, name=kg_name, hashes=[s.hash for s in planned], database_=database)
+    completed = load_checkpoint(driver, kg_name, database)
+
+    timings = []
+    with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as executor:
+        for stage in stages(planned):
+            pending = [s for s in stage if s.hash not in completed]
+            for statement in stage:
+                if statement.hash in completed:
+                    timing = StatementTiming(statement.index, statement.source.start_line, statement.kind,
+                                             'skipped', text=statement.first_line)
+                    if on_statement:
+                        on_statement(timing)
+                    timings.append(timing)
+            if not pending:
+                continue
+            stage_timings = list(executor.map(lambda s: run_statement(driver, s, module_params, database), pending))
+            for timing in stage_timings:
+                if on_statement:
+                    on_statement(timing)
+                timings.append(timing)
+            done = [s.hash for s, timing in zip(pending, stage_timings) if timing.status == 'ran']
+            if done:
+                driver.execute_query(RECORD_CHECKPOINT_QUERY, name=kg_name, hashes=done,
+                                     module=module, database_=database)
+            if any(timing.status == 'failed' for timing in stage_timings):
+                break
+            if stage[0].kind == 'schema':
+                driver.execute_query('CALL db.awaitIndexes($timeout)', timeout=index_timeout, database_=database)
+    if notify and any(timing.status == 'ran' for timing in timings):
+        notify_graph_changed()
+    return timings
+
+
+def parse_param_args(values:List[str]) -> Dict[str, Any]:
+    """`name=value` pairs; values that parse as JSON (numbers, lists, ...) are used as such"""
+    params = {}
+    for value in values:
+        name, sep, raw = value.partition('=')
+        if not sep:
+            raise ValueError(f"expected name=value, got {value!r}")
+        try:
+            params[name] = json.loads(raw)
+        except json.JSONDecodeError:
+            params[name] = raw
+    return params
+
+
+def main() -> int:
+    """Run a Cypher module against Neo4j, resuming where the last run stopped"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='CypherModuleRunner',
+                    description='Runs the statements of a cypher module with checkpoints and per-statement timing')
+    arg_parser.add_argument('filename', nargs='?', default='kg-construction.cypher', help='Cypher module to run')
+    arg_parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE',
+                            help='Set or override a module parameter, e.g. openAiApiKey=sk-...')
+    arg_parser.add_argument('--kg-name', default=KG_NAME, help='KnowledgeGraph node that records progress')
+    arg_parser.add_argument('--parallelism', type=int, default=4, help='Index and constraint statements sent at once')
+    arg_parser.add_argument('--restart', action='store_true', help='Forget completed statements and run them all')
+    arg_parser.add_argument('--dry-run', action='store_true', help='List the stages to run without connecting')
+    arg_parser.add_argument('--report', help='Write the statement timings to this JSON file')
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    params = parse_param_args(args.param)
+    if os.getenv('OPENAI_API_KEY') and 'openAiApiKey' not in params:
+        params['openAiApiKey'] = os.getenv('OPENAI_API_KEY')
+
+    if args.dry_run:
+        header, statements = read_cypher_module(args.filename)
+        module_params, planned = plan_module(header, statements, params)
+        print(f"Module: {header.name if header else args.filename} (params: {', '.join(module_params)})")
+        for number, stage in enumerate(stages(planned), 1):
+            for statement in stage:
+                print(f"\tstage {number:>3} line {statement.source.start_line:<5} {statement.kind:<6} {statement.first_line}")
+        return 0
+
+    from neo4j import GraphDatabase
+
+    driver = GraphDatabase.driver(os.getenv('NEO4J_URI'),
+                                  auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')))
+    start = time.perf_counter()
+    with driver:
+        timings = run_module(driver, args.filename, params, args.kg_name, os.getenv('NEO4J_DATABASE') or 'neo4j',
+                             args.parallelism, args.restart, on_statement=lambda timing: print(f"\t{timing}"))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump([vars(timing) for timing in timings], f, indent=2)
+    failed = [timing for timing in timings if timing.status == 'failed']
+    ran = sum(timing.status == 'ran' for timing in timings)
+    print(f"Ran {ran} statements, skipped {sum(t.status == 'skipped' for t in timings)} "
+          f"in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_MAX_ENTRIES = 500_000
+
+
+def content_key(model: str, text: str) -> str:
+    """
+    Cache key for the embedding of `text` by `model`
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache in a local SQLite file, keyed by a hash of (model, text).
+
+    Vectors are stored as float32 blobs. Once the cache holds more than
+    `max_entries` vectors, the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # the embedding pipeline reads and writes from its worker threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        keys = [content_key(model, text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # stay well under SQLite's limit on query parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array('f', blob).tolist()
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                     [(now, key) for key in found])
+                self._db.commit()
+            self.hits += len([key for key in keys if key in found])
+            self.misses += len([key for key in keys if key not in found])
+        return [found.get(key) for key in keys]
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        now = time.time()
+        rows = [(content_key(model, text), array('f', vector).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._db.execute("SELECT count(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute("""
+                DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+                )
+            """, (excess,))
+            self.evictions += excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class CachedEmbeddings:
+    """
+    Wrap LangChain-style embeddings so texts already in `cache` are never embedded again
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache, model: Optional[str] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, 'model', None) or type(embeddings).__name__
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(self.model, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            embedded = self.embeddings.embed_documents(missing_texts)
+            self.cache.put_many(self.model, missing_texts, embedded)
+            for i, vector in zip(missing, embedded):
+                vectors[i] = list(vector)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from kg_loader import batched, load_batches
+
+FIND_CHUNKS_TO_EMBED_QUERY = """
+MATCH (chunk:Chunk) WHERE chunk.textEmbedding IS NULL
+RETURN chunk.chunkId AS chunkId, chunk.text AS text
+"""
+
+SET_CHUNK_EMBEDDINGS_QUERY = """
+UNWIND $rows AS row
+MATCH (chunk:Chunk {chunkId: row.chunkId})
+CALL db.create.setNodeVectorProperty(chunk, "textEmbedding", row.embedding)
+"""
+
+
+class FakeEmbeddings:
+    """
+    Deterministic local embeddings, for tests and offline runs.
+
+    Implements the `embed_documents` / `embed_query` interface of LangChain embeddings.
+    The same text always gets the same unit-length vector.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency: float = 0.0, model: str = 'fake'):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.model = model
+        self.calls = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        values = []
+        counter = 0
+        while len(values) < self.dimensions:
+            digest = hashlib.sha256(f"{counter}:{text}".encode('utf-8')).digest()
+            values.extend(v / 2**31 for v in struct.unpack('<8i', digest))
+            counter += 1
+        values = values[:self.dimensions]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self.embed_query(text) for text in texts]
+
+
+class RateLimiter:
+    """
+    Space calls at least 1/rate seconds apart, across threads
+    """
+
+    def __init__(self, requests_per_second: Optional[float]):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+@dataclass
+class EmbeddingStats:
+    """Chunks embedded by a pipeline run, and how fast"""
+    found: int = 0
+    chunks: int = 0
+    requests: int = 0
+    resumed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.chunks} of {self.found} chunks in {self.requests} embedding requests, {self.seconds:.2f}s "
+                f"({self.chunks_per_second:,.1f} chunks/s, {self.resumed} resumed from checkpoint)")
+
+
+class Checkpoint:
+    """
+    Append-only file of embeddings that have been computed but not yet written to the graph.
+
+    Written before each graph write and cleared after it, so a crash loses
+    at most the embedding requests that were still in flight.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+
+    def load(self) -> List[Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return []
+        rows = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # a torn final line from a crash mid-write
+        return rows
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        if not self.path:
+            return
+        with open(self.path, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def embed_chunks(driver, embeddings_api, batch_size: int = 64, max_workers: int = 4,
+                 requests_per_second: Optional[float] = None, write_batch_size: int = 500,
+                 checkpoint_path: Optional[str] = None, database: Optional[str] = None,
+                 on_progress: Optional[Callable[[EmbeddingStats], None]] = None) -> EmbeddingStats:
+    """
+    Embed every `(:Chunk)` without a `textEmbedding`, and write the vectors back.
+
+    Texts are sent to `embeddings_api.embed_documents` in batches of `batch_size`,
+    with up to `max_workers` requests in flight and at most `requests_per_second` started.
+    Vectors are written back in `UNWIND` batches as requests complete, so a rerun
+    only picks up chunks that are still missing an embedding. `on_progress` is
+    called with the stats after each write.
+    """
+    stats = EmbeddingStats()
+    start = time.perf_counter()
+    checkpoint = Checkpoint(checkpoint_path)
+
+    # finish writing anything embedded by a previous, interrupted run
+    pending_writes = checkpoint.load()
+    if pending_writes:
+        load_batches(driver, SET_CHUNK_EMBEDDINGS_QUERY, pending_writes,
+                     batch_size=write_batch_size, database=database)
+        stats.resumed = len(pending_writes)
+        checkpoint.clear()
+        pending_writes = []
+
+    chunks = driver.execute_query(FIND_CHUNKS_TO_EMBED_QUERY, database_=database).records
+    stats.found = len(chunks)
+
+    limiter = RateLimiter(requests_per_second)
+
+    def embed_batch(batch):
+        limiter.wait()
+        vectors = embeddings_api.embed_documents([chunk['text'] for chunk in batch])
+        return [{'chunkId': chunk['chunkId'], 'embedding': vector} for chunk, vector in zip(batch, vectors)]
+
+    def flush():
+        load_batches(driver, SET_CHUNK_EMBEDDINGS_QUERY, pending_writes,
+                     batch_size=write_batch_size, database=database)
+        stats.chunks += len(pending_writes)
+        pending_writes.clear()
+        checkpoint.clear()
+        if on_progress:
+            on_progress(stats)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        batches = batched(chunks, batch_size)
+        in_flight = set()
+        while True:
+            # keep a bounded number of requests queued, rather than submitting every batch up front
+            for batch in batches:
+                in_flight.add(executor.submit(embed_batch, batch))
+                if len(in_flight) >= max_workers * 2:
+                    break
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                rows = future.result()
+                stats.requests += 1
+                checkpoint.append(rows)
+                pending_writes.extend(rows)
+            if len(pending_writes) >= write_batch_size:
+                flush()
+        if pending_writes:
+            flush()
+
+    stats.seconds = time.perf_counter() - start
+    return stats
@@ -0,0 +1,161 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+FORM10K_ITEMS = ['item1', 'item1a', 'item7', 'item7a']
+
+
+def form10k_files(data_dir: str) -> List[str]:
+    """
+    List the form 10-K json files under a data directory, e.g. `data/all`
+    """
+    return sorted(glob.glob(os.path.join(data_dir, 'form10k', '*.json')))
+
+
+def form_id_from_file(file: str) -> str:
+    """
+    The form id is the file name without its extension
+    """
+    return os.path.splitext(os.path.basename(file))[0]
+
+
+@lru_cache(maxsize=None)
+def text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    # one splitter per worker process and configuration
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        is_separator_regex=False,
+    )
+
+
+def chunk_form10k_file(file: str, chunk_size: int = 2000, chunk_overlap: int = 200,
+                       max_chunks_per_item: Optional[int] = 20) -> List[Dict[str, Any]]:
+    """
+    Split the items of one form 10-K file into chunk records, in the shape `1-mvg.ipynb` loads.
+
+    Each item is split on its own, straight from the parsed json, and only
+    the first `max_chunks_per_item` chunks of each item are kept.
+    """
+    with open(file, 'r') as f:
+        form = json.load(f)
+    form_id = form_id_from_file(file)
+    splitter = text_splitter(chunk_size, chunk_overlap)
+
+    chunks = []
+    for item in FORM10K_ITEMS:
+        item_text = form.get(item)
+        if not item_text:
+            continue
+        for chunk_seq_id, chunk in enumerate(splitter.split_text(item_text)[:max_chunks_per_item]):
+            chunks.append({
+                'text': chunk,
+                'item': item,
+                'chunkSeqId': chunk_seq_id,
+                'formId': form_id,
+                'chunkId': f'{form_id}-{item}-chunk{chunk_seq_id:04d}',
+                'names': form['names'],
+                'cik': form['cik'],
+                'cusip6': form['cusip6'],
+                'source': form['source'],
+            })
+    return chunks
+
+
+def read_form10k_form(file: str) -> Dict[str, Any]:
+    """
+    Read the form record `2-expand-context.ipynb` loads, with the items joined into `fullText`
+    """
+    with open(file, 'r') as f:
+        form = json.load(f)
+    items = [form[item] for item in FORM10K_ITEMS if item in form]
+    return {
+        'formId': form_id_from_file(file),
+        'names': form['names'],
+        'cik': form['cik'],
+        'cusip6': form['cusip6'],
+        'source': form['source'],
+        'fullText': '\n'.join([f"About {form['names']}...", *items]),
+    }
+
+
+def bounded_map(fn: Callable[[str], Any], files: Iterable[str], processes: Optional[int] = None) -> Iterator[Any]:
+    """
+    Like `ProcessPoolExecutor.map`, in order, but with only a few files in flight per worker.
+
+    `Executor.map` submits everything up front, so a slow consumer would let
+    finished results pile up in memory; this keeps at most 2 per worker.
+    """
+    if processes == 1:
+        yield from map(fn, files)
+        return
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        window = 2 * processes
+        in_flight = deque()
+        for file in files:
+            in_flight.append(executor.submit(fn, file))
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def iter_chunks(files: Iterable[str], processes: Optional[int] = None, **options) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield chunk records for many form 10-K files, splitting files in a process pool.
+
+    Chunks are yielded in file order, and memory holds only the files in flight.
+    `options` are passed on to `chunk_form10k_file`.
+    """
+    for chunks in bounded_map(partial(chunk_form10k_file, **options), files, processes):
+        yield from chunks
+
+
+def iter_forms(files: Iterable[str], processes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield form records for many form 10-K files, reading them in a process pool
+    """
+    yield from bounded_map(read_form10k_form, files, processes)
+
+
+def main() -> int:
+    """Chunk a directory of form 10-K files and show throughput"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='Form10kChunker',
+                    description='Splits form 10-K json files into chunks and shows throughput')
+    arg_parser.add_argument('data_dir', help='Data directory containing a form10k/ directory, e.g. data/all')
+    arg_parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: one per core)')
+    arg_parser.add_argument('--chunk-size', type=int, default=2000)
+    arg_parser.add_argument('--chunk-overlap', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    files = form10k_files(args.data_dir)
+    start = time.perf_counter()
+    chunk_count = 0
+    char_count = 0
+    for chunk in iter_chunks(files, processes=args.processes,
+                             chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap):
+        chunk_count += 1
+        char_count += len(chunk['text'])
+    seconds = time.perf_counter() - start
+
+    print(f"Chunked {len(files)} files into {chunk_count} chunks in {seconds:.2f}s")
+    print(f"\t{len(files) / seconds:,.1f} files/s, {chunk_count / seconds:,.0f} chunks/s, "
+          f"{char_count / seconds / 1e6:,.1f} MB/s of chunk text")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
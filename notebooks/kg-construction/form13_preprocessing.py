@@ -0,0 +1,190 @@
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+from holder_rollups import rollup_holders
+from kg_loader import MERGE_COMPANIES_QUERY, MERGE_MANAGERS_QUERY, load_batches, notify_graph_changed
+
+FORM13_COLUMNS = ['source', 'managerCik', 'managerAddress', 'managerName', 'reportCalendarOrQuarter',
+                  'cusip6', 'cusip', 'companyName', 'value', 'shares']
+
+HOLDING_KEY = ['managerCik', 'cusip6', 'reportCalendarOrQuarter']
+
+# Holdings arrive already typed and aggregated, so no conversion happens in Cypher
+MERGE_AGGREGATED_HOLDINGS_QUERY = """
+UNWIND $rows AS row
+MATCH (mgr:Manager {cik: row.managerCik}),
+      (com:Company {cusip6: row.cusip6})
+MERGE (mgr)-[owns:OWNS_STOCK_IN { reportCalendarOrQuarter: row.reportCalendarOrQuarter }]->(com)
+  ON CREATE
+    SET owns.value  = row.value,
+        owns.shares = row.shares
+"""
+
+
+def cusip_check_digit(cusip8: str) -> str:
+    """
+    The check digit of a CUSIP, computed from its first 8 characters
+    """
+    total = 0
+    for i, char in enumerate(cusip8):
+        if char.isdigit():
+            value = int(char)
+        elif char.isalpha():
+            value = ord(char) - ord('A') + 10
+        else:
+            value = {'*': 36, '@': 37, '#': 38}.get(char, 0)
+        if i % 2 == 1:
+            value *= 2
+        total += value // 10 + value % 10
+    return str((10 - total % 10) % 10)
+
+
+@dataclass
+class Form13Batches:
+    """Deduplicated Companies and Managers, and aggregated holdings, ready to load"""
+    companies: List[Dict[str, Any]] = field(default_factory=list)
+    managers: List[Dict[str, Any]] = field(default_factory=list)
+    holdings: List[Dict[str, Any]] = field(default_factory=list)
+    rows: int = 0
+    rejected: Optional[pd.DataFrame] = None
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        rejected = 0 if self.rejected is None else len(self.rejected)
+        return (f"{self.rows} rows -> {len(self.companies)} companies, {len(self.managers)} managers, "
+                f"{len(self.holdings)} holdings ({rejected} rejected) in {self.seconds:.2f}s")
+
+
+def read_form13(form13: Union[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Read form 13 rows with every column as a string, so identifiers keep their leading zeros
+    """
+    if isinstance(form13, pd.DataFrame):
+        return form13.astype(str)
+    return pd.read_csv(form13, dtype=str, keep_default_na=False, usecols=FORM13_COLUMNS)
+
+
+def parse_form13(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize identifiers and parse `value` and `shares`, once, for the whole frame
+    """
+    df = df.copy()
+    for column in ['managerCik', 'cusip', 'cusip6', 'reportCalendarOrQuarter']:
+        df[column] = df[column].str.strip()
+    df['cusip'] = df['cusip'].str.upper()
+    df['cusip6'] = df['cusip6'].str.upper()
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df['shares'] = pd.to_numeric(df['shares'], errors='coerce').round().astype('Int64')
+    return df
+
+
+def validate_form13(df: pd.DataFrame, check_digits: bool = False) -> pd.DataFrame:
+    """
+    Add a `rejected` column naming the first problem with each row, or empty if the row is valid.
+
+    A CIK is 1 to 10 digits, a CUSIP is 9 characters, and `cusip6` must be
+    the CUSIP's first 6 characters. 13F filings report options with CUSIPs
+    whose check digit doesn't verify, so `check_digits` is off by default.
+    """
+    problems = [
+        ('invalid managerCik', ~df['managerCik'].str.fullmatch(r'\d{1,10}', na=False)),
+        ('invalid cusip', ~df['cusip'].str.fullmatch(r'[0-9A-Z*@#]{9}', na=False)),
+    ]
+    if check_digits:
+        expected = {cusip: cusip_check_digit(cusip[:8]) for cusip in df['cusip'].dropna().unique() if len(cusip) == 9}
+        problems.append(('invalid cusip check digit', df['cusip'].str[8] != df['cusip'].map(expected)))
+    problems += [
+        ('cusip6 does not match cusip', df['cusip6'] != df['cusip'].str[:6]),
+        ('missing reportCalendarOrQuarter', df['reportCalendarOrQuarter'].fillna('') == ''),
+        ('invalid value', df['value'].isna()),
+        ('invalid shares', df['shares'].isna()),
+    ]
+    rejected = pd.Series('', index=df.index)
+    # apply in reverse so the first problem in the list wins
+    for reason, mask in reversed(problems):
+        rejected = rejected.mask(mask.fillna(True).astype(bool), reason)
+    return df.assign(rejected=rejected)
+
+
+def aggregate_holdings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One holding per (manager, cusip6, quarter), summing value and shares across reported rows.
+
+    Rows repeated verbatim are counted once.
+    """
+    return (df.drop_duplicates().groupby(HOLDING_KEY, sort=False, as_index=False)
+              .agg(value=('value', 'sum'), shares=('shares', 'sum'), source=('source', 'first')))
+
+
+def records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    # plain python types, which the Neo4j driver can send as parameters
+    return [{key: (value.item() if hasattr(value, 'item') else value) for key, value in row.items()}
+            for row in df.astype(object).to_dict(orient='records')]
+
+
+def preprocess_form13(form13: Union[str, pd.DataFrame], check_digits: bool = False) -> Form13Batches:
+    """
+    Parse, validate and deduplicate form 13 rows from a csv file (or a DataFrame).
+
+    Rows that fail validation are set aside in `rejected`, with a reason.
+    """
+    start = time.perf_counter()
+    df = validate_form13(parse_form13(read_form13(form13)), check_digits)
+    valid = df[df['rejected'] == '']
+
+    batches = Form13Batches(
+        companies=records(valid.drop_duplicates('cusip6')[['cusip6', 'cusip', 'companyName']]),
+        managers=records(valid.drop_duplicates('managerCik')[['managerCik', 'managerName', 'managerAddress']]),
+        holdings=records(aggregate_holdings(valid)),
+        rows=len(df),
+        rejected=df[df['rejected'] != ''],
+    )
+    batches.seconds = time.perf_counter() - start
+    return batches
+
+
+def load_preprocessed_form13(driver, batches: Form13Batches, notify: bool = True, **kwargs) -> Dict[str, Any]:
+    """
+    Merge each Company, Manager and holding exactly once, companies and managers first,
+    then refresh the holder rollups of the loaded companies, under `rollups`.
+    Then graphvis is told the graph changed, unless `notify` is False.
+    """
+    stats = {
+        'companies': load_batches(driver, MERGE_COMPANIES_QUERY, batches.companies, **kwargs),
+        'managers': load_batches(driver, MERGE_MANAGERS_QUERY, batches.managers, **kwargs),
+        'holdings': load_batches(driver, MERGE_AGGREGATED_HOLDINGS_QUERY, batches.holdings, **kwargs),
+    }
+    stats['rollups'] = rollup_holders(driver, [company['cusip6'] for company in batches.companies],
+                                      database=kwargs.get('database'))
+    if notify:
+        notify_graph_changed()
+    return stats
+
+
+def main() -> int:
+    """Preprocess a form 13 csv file and report what would be loaded"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='Form13Preprocessing',
+                    description='Validates, deduplicates and aggregates form 13 rows')
+    arg_parser.add_argument('form13', help='Form 13 csv file, e.g. data/sample/form13.csv')
+    arg_parser.add_argument('--rejected', help='Write rejected rows to this csv file')
+    arg_parser.add_argument('--check-digits', action='store_true', help='Also reject CUSIPs with a bad check digit')
+    args = arg_parser.parse_args()
+
+    batches = preprocess_form13(args.form13, args.check_digits)
+    print(batches)
+    if args.rejected and batches.rejected is not None:
+        batches.rejected.to_csv(args.rejected, index=False)
+    elif batches.rejected is not None and len(batches.rejected):
+        print(batches.rejected['rejected'].value_counts().to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from embedding_cache import content_key
+from embedding_pipeline import RateLimiter
+from kg_loader import load_batches
+
+DEFAULT_PART_SIZE = 60000
+
+MAP_PROMPT = """Write a single, very brief sentence summary of {name}'s business
+       based on the following information...\n {text}
+      """
+
+REDUCE_PROMPT = """Combine these sentences about {name}'s business into a single, very brief summary
+       of a few sentences, without repeating yourself...\n {text}
+      """
+
+SET_FORM_SUMMARIES_QUERY = """
+UNWIND $rows AS row
+MATCH (f:Form {formId: row.formId})
+  SET f.summary = row.summary
+WITH f, row
+  CALL db.create.setNodeVectorProperty(f, "summaryEmbedding", row.summaryEmbedding)
+"""
+
+
+class FakeMessage:
+    """The part of a LangChain chat message the summarizer reads"""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeChat:
+    """
+    Deterministic local chat model, for tests and offline runs.
+
+    Implements `invoke` of LangChain chat models. The reply quotes the start of the
+    text after the prompt's instructions, so different parts get different summaries.
+    """
+
+    def __init__(self, latency: float = 0.0, model: str = 'fake'):
+        self.latency = latency
+        self.model = model
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str) -> FakeMessage:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        text = ' '.join(prompt.split('...', 1)[-1].split())
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        return FakeMessage(f"{text[:100]} [{digest}]")
+
+
+class SummaryCache:
+    """
+    Persistent cache of LLM replies in a local SQLite file, keyed by a hash of (model, prompt).
+
+    A form whose text hasn't changed builds the same prompts, so reruns answer
+    its summary without calling the model again.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # the summarizer reads and writes from its worker threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE key = ?",
+                                   (content_key(model, prompt),)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, model: str, prompt: str, summary: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO summaries (key, summary, updated) VALUES (?, ?, ?)",
+                             (content_key(model, prompt), summary, time.time()))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM summaries").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+@dataclass
+class SummaryStats:
+    """Forms summarized by a run, how fast, and the forms that failed, with their error, by formId"""
+    forms: int = 0
+    parts: int = 0
+    calls: int = 0
+    cached: int = 0
+    seconds: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    def __str__(self) -> str:
+        return (f"{self.forms} forms from {self.parts} parts in {self.seconds:.2f}s "
+                f"({self.calls} LLM calls, {self.cached} answered from cache, {self.failed} failed)")
+
+
+def model_name(chat_api) -> str:
+    return (getattr(chat_api, 'model_name', None) or getattr(chat_api, 'model', None)
+            or type(chat_api).__name__)
+
+
+def split_parts(text: str, part_size: int = DEFAULT_PART_SIZE) -> List[str]:
+    """The parts of a form's `fullText` that are each summarized on their own"""
+    from form10k_chunker import text_splitter
+    return text_splitter(part_size, 0).split_text(text)
+
+
+def summarize_forms(driver, chat_api, embeddings_api, forms: Iterable[Dict[str, Any]],
+                    part_size: int = DEFAULT_PART_SIZE, max_workers: int = 16,
+                    requests_per_second: Optional[float] = None, cache: Optional[SummaryCache] = None,
+                    reduce: bool = True, write_batch_size: int = 20, database: Optional[str] = None) -> SummaryStats:
+    """
+    Summarize the `fullText` of each form, embed the summaries, and write both to its `(:Form)`.
+
+    Every form is split into parts of `part_size` characters and each part is
+    summarized in one `chat_api.invoke` (map). The parts of all forms share one
+    pool of `max_workers` calls, at most `requests_per_second` started, so the run
+    takes about as long as the slowest calls rather than their sum. Once all parts
+    of a form are back, one more call combines them (reduce); with `reduce=False`,
+    or a single part, the part summaries are the summary. Replies are cached by
+    prompt in `cache`, and summaries are embedded and written in batches of
+    `write_batch_size` forms as they finish.
+
+    A form whose text can't be split, or whose calls fail, is left out and
+    its error recorded in `stats.errors`; the other forms are still
+    summarized and written. Errors embedding or writing a batch are raised.
+    """
+    stats = SummaryStats()
+    start = time.perf_counter()
+    model = model_name(chat_api)
+    limiter = RateLimiter(requests_per_second)
+    stats_lock = threading.Lock()
+    # part summaries of the forms still being mapped, by formId
+    partials: Dict[str, List[Optional[str]]] = {}
+    finished: List[Tuple[Dict[str, Any], str]] = []
+
+    def complete(prompt: str) -> str:
+        if cache is not None:
+            summary = cache.get(model, prompt)
+            if summary is not None:
+                with stats_lock:
+                    stats.cached += 1
+                return summary
+        limiter.wait()
+        response = chat_api.invoke(prompt)
+        summary = getattr(response, 'content', response)
+        with stats_lock:
+            stats.calls += 1
+        if cache is not None:
+            cache.put(model, prompt, summary)
+        return summary
+
+    def fail(form: Dict[str, Any], error: BaseException) -> None:
+        stats.errors[form['formId']] = f"{type(error).__name__}: {error}"
+        partials.pop(form['formId'], None)
+
+    def map_tasks() -> Iterator[Tuple[Dict[str, Any], int, str]]:
+        for form in forms:
+            try:
+                parts = split_parts(form['fullText'], part_size)
+            except Exception as e:
+                fail(form, e)
+                continue
+            if not parts:
+                continue
+            partials[form['formId']] = [None] * len(parts)
+            stats.parts += len(parts)
+            for index, part in enumerate(parts):
+                yield form, index, MAP_PROMPT.format(name=form['names'][0], text=part)
+
+    def flush():
+        summaries = [summary for _, summary in finished]
+        vectors = embeddings_api.embed_documents(summaries)
+        rows = []
+        for (form, summary), vector in zip(finished, vectors):
+            form['summary'] = summary
+            form['summaryEmbedding'] = vector
+            rows.append({'formId': form['formId'], 'summary': summary, 'summaryEmbedding': vector})
+        load_batches(driver, SET_FORM_SUMMARIES_QUERY, rows, batch_size=write_batch_size, database=database)
+        stats.forms += len(rows)
+        finished.clear()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tasks = map_tasks()
+        # future -> (form, part index), with None for a form's reduce call
+        in_flight: Dict[Any, Tuple[Dict[str, Any], Optional[int]]] = {}
+        while True:
+            # keep a bounded number of calls queued, rather than splitting every form up front
+            for form, index, prompt in tasks:
+                in_flight[executor.submit(complete, prompt)] = (form, index)
+                if len(in_flight) >= max_workers * 2:
+                    break
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                form, index = in_flight.pop(future)
+                if form['formId'] in stats.errors:
+                    # another call of this form failed
+                    continue
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    fail(form, e)
+                    continue
+                if index is None:
+                    finished.append((form, summary))
+                    continue
+                parts = partials[form['formId']]
+                parts[index] = summary
+                if any(part is None for part in parts):
+                    continue
+                del partials[form['formId']]
+                if reduce and len(parts) > 1:
+                    prompt = REDUCE_PROMPT.format(name=form['names'][0], text='\n'.join(parts))
+                    in_flight[executor.submit(complete, prompt)] = (form, None)
+                else:
+                    finished.append((form, '\n\n'.join(parts)))
+            if len(finished) >= write_batch_size:
+                flush()
+        if finished:
+            flush()
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main() -> int:
+    """Summarize the form 10-K files of a data directory into their Form nodes"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='FormSummarizer',
+                    description='Sets Form.summary and Form.summaryEmbedding with an LLM, many calls at a time')
+    arg_parser.add_argument('data_dir', help='Data directory containing a form10k/ directory, e.g. data/all')
+    arg_parser.add_argument('--chat', choices=['openai', 'ollama', 'fake'], default='openai')
+    arg_parser.add_argument('--cache', default=os.path.join('..', '..', '.cache', 'summaries.sqlite'),
+                            help='SQLite summary cache')
+    arg_parser.add_argument('--workers', type=int, default=16, help='LLM calls in flight')
+    arg_parser.add_argument('--requests-per-second', type=float, default=None, help='Rate limit for LLM calls')
+    arg_parser.add_argument('--no-reduce', action='store_true', help='Join the part summaries instead of combining them')
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+    from neo4j import GraphDatabase
+
+    from embedding_cache import CachedEmbeddings, EmbeddingCache
+    from embedding_pipeline import FakeEmbeddings
+    from form10k_chunker import form10k_files, iter_forms
+
+    load_dotenv()
+    if args.chat == 'openai':
+        from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+        chat_api = ChatOpenAI()
+        embeddings_api = OpenAIEmbeddings(api_key=os.getenv('OPENAI_API_KEY'))
+    elif args.chat == 'ollama':
+        from langchain_community.chat_models import ChatOllama
+        from langchain_community.embeddings import OllamaEmbeddings
+        chat_api = ChatOllama(model=os.getenv('CHAT_MODEL'))
+        embeddings_api = OllamaEmbeddings(model=os.getenv('EMBEDDING_MODEL'))
+    else:
+        chat_api = FakeChat()
+        embeddings_api = FakeEmbeddings()
+    embedding_cache = EmbeddingCache(os.getenv('EMBEDDING_CACHE_PATH') or
+                                     os.path.join('..', '..', '.cache', 'embeddings.sqlite'))
+
+    cache = SummaryCache(args.cache)
+    driver = GraphDatabase.driver(os.getenv('NEO4J_URI'),
+                                  auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')))
+    with driver:
+        stats = summarize_forms(driver, chat_api, CachedEmbeddings(embeddings_api, embedding_cache),
+                                iter_forms(form10k_files(args.data_dir)), max_workers=args.workers,
+                                requests_per_second=args.requests_per_second, cache=cache,
+                                reduce=not args.no_reduce, database=os.getenv('NEO4J_DATABASE') or 'neo4j')
+    cache.close()
+    embedding_cache.close()
+    print(stats)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,381 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from embedding_pipeline import RateLimiter
+from kg_loader import load_batches
+
+# Lookups the stage relies on: the MERGE on (city, state) and distance queries on locations
+INDEXES = [
+    'CREATE INDEX composite_address_index IF NOT EXISTS FOR (n:Address) ON (n.city, n.state)',
+    'CREATE POINT INDEX address_locations IF NOT EXISTS FOR (n:Address) ON (n.location)',
+    'CREATE POINT INDEX manager_locations IF NOT EXISTS FOR (n:Manager) ON (n.location)',
+]
+
+FIND_MANAGERS_QUERY = """
+MATCH (mgr:Manager) WHERE mgr.address IS NOT NULL AND ($all OR mgr.location IS NULL)
+RETURN mgr.cik AS managerCik, mgr.address AS address
+"""
+
+SET_MANAGER_LOCATIONS_QUERY = """
+UNWIND $rows AS row
+MATCH (mgr:Manager {cik: row.managerCik})
+SET mgr.location = point({latitude: row.latitude, longitude: row.longitude})
+MERGE (addr:Address {city: row.city, state: row.state})
+  ON CREATE SET addr.country = row.country,
+                addr.location = point({latitude: row.latitude, longitude: row.longitude})
+MERGE (mgr)-[:LOCATED_AT]->(addr)
+"""
+
+# Address words spelled more than one way in EDGAR filings
+ABBREVIATIONS = {
+    'STREET': 'ST', 'AVENUE': 'AVE', 'ROAD': 'RD', 'BOULEVARD': 'BLVD', 'DRIVE': 'DR',
+    'PLACE': 'PL', 'LANE': 'LN', 'COURT': 'CT', 'PARKWAY': 'PKWY', 'HIGHWAY': 'HWY',
+    'SUITE': 'STE', 'FLOOR': 'FL', 'BUILDING': 'BLDG', 'PLAZA': 'PLZ', 'CENTER': 'CTR',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+}
+WORD = re.compile(r'[A-Z0-9]+')
+US_ZIP = re.compile(r'^(\d{5})(?:-?\d{4})?$')
+
+
+def normalize_address(address: str) -> str:
+    """
+    Cache key for an address: upper case, without punctuation, with common words abbreviated
+    and ZIP+4 codes cut to five digits, so spellings of one address share a lookup
+    """
+    parts = []
+    for part in address.upper().split(','):
+        words = [ABBREVIATIONS.get(word, word) for word in WORD.findall(part)]
+        if words:
+            parts.append(' '.join(words))
+    if parts:
+        zip_code = US_ZIP.match(parts[-1].replace(' ', ''))
+        if zip_code:
+            parts[-1] = zip_code.group(1)
+    return ', '.join(parts)
+
+
+def address_parts(address: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    (city, state, zip) of an EDGAR address, "STREET..., CITY, STATE, ZIP"; state is
+    the EDGAR state or country code, and zip is None unless it's a US ZIP code
+    """
+    parts = [part.strip() for part in address.upper().split(',') if part.strip()]
+    zip_code = US_ZIP.match(parts[-1].replace(' ', '')) if parts else None
+    if len(parts) < 3:
+        return None, None, zip_code.group(1) if zip_code else None
+    return parts[-3], parts[-2], zip_code.group(1) if zip_code else None
+
+
+@dataclass
+class Geocode:
+    """Where an address is, at the level the graph records it"""
+    latitude: float
+    longitude: float
+    city: str
+    state: str
+    country: Optional[str] = None
+    postal_code: Optional[str] = None
+
+
+class GoogleMapsGeocoder:
+    """
+    Geocode with a `googlemaps.Client`, taking the first result
+    """
+
+    name = 'google'
+
+    # city components in order of preference
+    CITY_TYPES = [
+        ['locality', 'political'],
+        ['administrative_area_level_3', 'political'],
+        ['political', 'sublocality', 'sublocality_level_1'],
+        ['postal_town'],
+        ['neighborhood', 'political'],
+    ]
+
+    def __init__(self, client):
+        self.client = client
+
+    def geocode(self, address: str) -> Optional[Geocode]:
+        results = self.client.geocode(address)
+        return self.from_result(results[0]) if results else None
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> Optional[Geocode]:
+        components = {tuple(c['types']): c.get('long_name') for c in result.get('address_components', [])}
+        city = next((components[tuple(types)] for types in cls.CITY_TYPES if components.get(tuple(types))), None)
+        state = components.get(('administrative_area_level_1', 'political'))
+        country = components.get(('country', 'political'))
+        location = result.get('geometry', {}).get('location')
+        # as in the notebook, fall back to the state for the city and the country for the state
+        city, state = city or state, state or country
+        if not (location and city and state):
+            return None
+        return Geocode(location['lat'], location['lng'], city, state, country, components.get(('postal_code',)))
+
+
+class GazetteerGeocoder:
+    """
+    Offline geocoding from a GeoNames postal code file (e.g. US.txt from
+    https://download.geonames.org/export/zip/): by ZIP code, then by city and state
+    """
+
+    name = 'gazetteer'
+
+    def __init__(self, path: str):
+        self.by_zip: Dict[str, Geocode] = {}
+        self.by_city: Dict[Tuple[str, str], Geocode] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.reader(f, delimiter='\t'):
+                if len(row) < 11:
+                    continue
+                country, postal_code, place, state_name, state_code = row[:5]
+                geocode = Geocode(float(row[9]), float(row[10]), place, state_name, country, postal_code)
+                self.by_zip.setdefault(postal_code, geocode)
+                self.by_city.setdefault((place.upper(), state_code.upper()), geocode)
+
+    def geocode(self, address: str) -> Optional[Geocode]:
+        city, state, zip_code = address_parts(address)
+        if zip_code and zip_code in self.by_zip:
+            return self.by_zip[zip_code]
+        if city and state:
+            return self.by_city.get((city, state))
+        return None
+
+
+class StubGeocoder:
+    """
+    Deterministic offline geocoder, for tests and trying out the stage without an API key.
+
+    City and state come from the address itself and the location from a hash of it,
+    somewhere in the contiguous United States.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def geocode(self, address: str) -> Optional[Geocode]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        city, state, zip_code = address_parts(address)
+        if not (city and state):
+            return None
+        digest = hashlib.sha256(normalize_address(address).encode('utf-8')).digest()
+        latitude = 25 + 24 * int.from_bytes(digest[:4], 'big') / 2**32
+        longitude = -124 + 57 * int.from_bytes(digest[4:8], 'big') / 2**32
+        return Geocode(round(latitude, 6), round(longitude, 6), city.title(), state, None, zip_code)
+
+
+class GeocodeCache:
+    """
+    Persistent geocode cache in a local SQLite file, keyed by provider and normalized address.
+
+    Addresses the provider couldn't place are cached too, so reruns don't ask again.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                provider TEXT NOT NULL,
+                address TEXT NOT NULL,
+                geocode TEXT,
+                updated REAL NOT NULL,
+                PRIMARY KEY (provider, address)
+            )
+        """)
+        self._db.commit()
+
+    def get_many(self, provider: str, keys: List[str]) -> Dict[str, Optional[Geocode]]:
+        """Cached geocodes of the normalized addresses in `keys`; None for ones known not to be found"""
+        found: Dict[str, Optional[Geocode]] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT address, geocode FROM geocodes WHERE provider = ? AND address IN ({','.join('?' * len(chunk))})",
+                    [provider, *chunk]
+                ).fetchall()
+                for address, geocode in rows:
+                    found[address] = Geocode(**json.loads(geocode)) if geocode else None
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, provider: str, geocodes: Dict[str, Optional[Geocode]]) -> None:
+        now = time.time()
+        rows = [(provider, key, json.dumps(asdict(geocode)) if geocode else None, now)
+                for key, geocode in geocodes.items()]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO geocodes (provider, address, geocode, updated) VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM geocodes").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+@dataclass
+class GeocodeStats:
+    """What a geocoding run looked up and wrote"""
+    managers: int = 0
+    addresses: int = 0
+    cached: int = 0
+    lookups: int = 0
+    not_found: int = 0
+    failed: int = 0
+    written: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.managers} managers at {self.addresses} distinct addresses: {self.cached} cached, "
+                f"{self.lookups} looked up ({self.not_found} not found, {self.failed} failed), "
+                f"{self.written} locations written in {self.seconds:.2f}s")
+
+
+def geocode_addresses(addresses: Iterable[str], geocoder, cache: Optional[GeocodeCache] = None,
+                      max_workers: int = 8, requests_per_second: Optional[float] = None,
+                      stats: Optional[GeocodeStats] = None) -> Dict[str, Optional[Geocode]]:
+    """
+    Geocode addresses, returning a geocode (or None) per normalized address.
+
+    Each normalized address is looked up once, from `cache` if it's there, otherwise
+    with `geocoder.geocode`, up to `max_workers` at a time and at most
+    `requests_per_second` started. Lookups that raise are counted as failed and
+    left out of the cache, so the next run tries them again.
+    """
+    stats = stats if stats is not None else GeocodeStats()
+    originals: Dict[str, str] = {}
+    for address in addresses:
+        originals.setdefault(normalize_address(address), address)
+    stats.addresses = len(originals)
+
+    results = cache.get_many(geocoder.name, list(originals)) if cache is not None else {}
+    stats.cached = len(results)
+    missing = [key for key in originals if key not in results]
+    limiter = RateLimiter(requests_per_second)
+
+    def lookup(key):
+        limiter.wait()
+        try:
+            return key, geocoder.geocode(originals[key]), None
+        except Exception as e:
+            return key, None, e
+
+    looked_up: Dict[str, Optional[Geocode]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for key, geocode, error in executor.map(lookup, missing):
+            stats.lookups += 1
+            if error is not None:
+                stats.failed += 1
+                continue
+            stats.not_found += geocode is None
+            looked_up[key] = geocode
+    if cache is not None and looked_up:
+        cache.put_many(geocoder.name, looked_up)
+    results.update(looked_up)
+    return results
+
+
+def ensure_indexes(driver, database: Optional[str] = None) -> None:
+    for index in INDEXES:
+        driver.execute_query(index, database_=database)
+
+
+def geocode_managers(driver, geocoder, cache: Optional[GeocodeCache] = None, max_workers: int = 8,
+                     requests_per_second: Optional[float] = None, write_batch_size: int = 500,
+                     all_managers: bool = False, database: Optional[str] = None) -> GeocodeStats:
+    """
+    Set `location` on each `(:Manager)` without one, and link it to its `(:Address)`.
+
+    Managers sharing an address share one lookup, and locations are written
+    back in `UNWIND` batches of `write_batch_size`. `all_managers` includes
+    managers that already have a location.
+    """
+    stats = GeocodeStats()
+    start = time.perf_counter()
+    ensure_indexes(driver, database)
+    managers = driver.execute_query(FIND_MANAGERS_QUERY, all=all_managers, database_=database).records
+    stats.managers = len(managers)
+    geocodes = geocode_addresses((m['address'] for m in managers), geocoder, cache,
+                                 max_workers, requests_per_second, stats)
+    rows = []
+    for manager in managers:
+        geocode = geocodes.get(normalize_address(manager['address']))
+        if geocode is not None:
+            rows.append({'managerCik': manager['managerCik'], **asdict(geocode)})
+    load_batches(driver, SET_MANAGER_LOCATIONS_QUERY, rows, batch_size=write_batch_size, database=database)
+    stats.written = len(rows)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main() -> int:
+    """Geocode manager addresses and write their locations to Neo4j"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='Geocoding',
+                    description='Sets Manager.location and LOCATED_AT Address relationships from manager addresses')
+    arg_parser.add_argument('--provider', choices=['google', 'gazetteer', 'stub'], default='google',
+                            help='google needs GOOGLE_MAPS_API_KEY; gazetteer needs --gazetteer')
+    arg_parser.add_argument('--gazetteer', help='GeoNames postal code file, e.g. US.txt')
+    arg_parser.add_argument('--cache', default=os.path.join('..', '..', '.cache', 'geocodes.sqlite'),
+                            help='SQLite geocode cache')
+    arg_parser.add_argument('--workers', type=int, default=8, help='Lookups in flight')
+    arg_parser.add_argument('--requests-per-second', type=float, default=None, help='Rate limit for lookups')
+    arg_parser.add_argument('--all', action='store_true', help='Also geocode managers that have a location')
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+    from neo4j import GraphDatabase
+
+    load_dotenv()
+    if args.provider == 'google':
+        import googlemaps
+        geocoder = GoogleMapsGeocoder(googlemaps.Client(key=os.getenv('GOOGLE_MAPS_API_KEY')))
+    elif args.provider == 'gazetteer':
+        if not args.gazetteer:
+            arg_parser.error('--provider gazetteer needs --gazetteer')
+        geocoder = GazetteerGeocoder(args.gazetteer)
+    else:
+        geocoder = StubGeocoder()
+
+    cache = GeocodeCache(args.cache)
+    driver = GraphDatabase.driver(os.getenv('NEO4J_URI'),
+                                  auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')))
+    with driver:
+        stats = geocode_managers(driver, geocoder, cache, args.workers, args.requests_per_second,
+                                 all_managers=args.all, database=os.getenv('NEO4J_DATABASE') or 'neo4j')
+    cache.close()
+    print(stats)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
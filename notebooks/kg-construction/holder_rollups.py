@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from kg_loader import load_batches
+
+DEFAULT_TOP_HOLDERS = 10
+
+ALL_COMPANIES_QUERY = """
+MATCH (com:Company) RETURN com.cusip6 AS cusip6
+"""
+
+# The investment sentences the retrieval query used to build for every vector hit,
+# computed once per company: its top holders by shares, best first.
+ROLLUP_HOLDERS_QUERY = """
+UNWIND $rows AS cusip6
+MATCH (com:Company {cusip6: cusip6})
+CALL {
+  WITH com
+  OPTIONAL MATCH (com)<-[owns:OWNS_STOCK_IN]-(:Manager)
+  WITH owns ORDER BY owns.shares DESC
+  RETURN count(owns) AS holderCount, collect(owns)[..$topN] AS top
+}
+WITH com, holderCount,
+     [owns IN top | startNode(owns).name + " owns " + owns.shares + " of " + com.name +
+                    " at a value of $" + apoc.number.format(owns.value) + "."] AS statements
+SET com.topHolders = statements,
+    com.investmentStatements = CASE WHEN size(statements) > 0 THEN apoc.text.join(statements, "\\n") END,
+    com.holderCount = holderCount,
+    com.holdersRolledUpAt = datetime()
+"""
+
+# Retrieval query for `Neo4jVector`: the chunk's text after its company's precomputed
+# investment sentences, one property read per hit instead of an expansion to every holder
+INVESTMENT_RETRIEVAL_QUERY = """
+OPTIONAL MATCH (node)-[:PART_OF]->(:Form)<-[:FILED]-(com:Company)
+WITH node, score, head(collect(com)) AS com
+RETURN coalesce(com.investmentStatements + "\\n", "") + node.text AS text,
+    score,
+    {
+      source: node.source
+    } AS metadata
+"""
+
+
+@dataclass
+class RollupStats:
+    """Companies whose holder rollups were refreshed, and how fast"""
+    companies: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return f"{self.companies} company holder rollups refreshed in {self.seconds:.2f}s"
+
+
+def rollup_holders(driver, cusip6s: Optional[Iterable[str]] = None, top_n: int = DEFAULT_TOP_HOLDERS,
+                   batch_size: int = 100, database: Optional[str] = None) -> RollupStats:
+    """
+    Store the top `top_n` holders of each `(:Company)` as `topHolders` sentences, joined in
+    `investmentStatements`, along with `holderCount`.
+
+    Only the companies in `cusip6s` are refreshed, e.g. those whose holdings a
+    form 13 load changed; None refreshes every company.
+    """
+    start = time.perf_counter()
+    if cusip6s is None:
+        cusip6s = [record['cusip6'] for record in driver.execute_query(ALL_COMPANIES_QUERY, database_=database).records]
+    stats = load_batches(driver, ROLLUP_HOLDERS_QUERY, sorted(set(cusip6s)), batch_size=batch_size,
+                         database=database, params={'topN': top_n})
+    return RollupStats(stats.rows, time.perf_counter() - start)
+
+
+def main() -> int:
+    """Refresh the precomputed top holders of companies"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='HolderRollups',
+                    description='Materializes the top holders and investment sentences of each Company')
+    arg_parser.add_argument('cusip6', nargs='*', help='Companies to refresh (default: all)')
+    arg_parser.add_argument('--top', type=int, default=DEFAULT_TOP_HOLDERS, help='Holders kept per company')
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+    from neo4j import GraphDatabase
+
+    load_dotenv()
+    driver = GraphDatabase.driver(os.getenv('NEO4J_URI'),
+                                  auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')))
+    with driver:
+        stats = rollup_holders(driver, args.cusip6 or None, args.top, database=os.getenv('NEO4J_DATABASE') or 'neo4j')
+    print(stats)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
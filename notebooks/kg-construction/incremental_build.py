@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from kg_loader import MERGE_COMPANIES_QUERY, MERGE_MANAGERS_QUERY, load_batches, load_chunks, notify_graph_changed
+from form10k_chunker import form10k_files, form_id_from_file, iter_chunks, read_form10k_form
+from kg_linker import link_graph
+from form13_preprocessing import Form13Batches, preprocess_form13
+from holder_rollups import rollup_holders
+
+KG_NAME = 'EdgarKG'
+
+CONSTRAINTS = [
+    'CREATE CONSTRAINT unique_form IF NOT EXISTS FOR (n:Form) REQUIRE n.formId IS UNIQUE',
+    'CREATE CONSTRAINT unique_chunk IF NOT EXISTS FOR (c:Chunk) REQUIRE c.chunkId IS UNIQUE',
+    'CREATE CONSTRAINT unique_company IF NOT EXISTS FOR (n:Company) REQUIRE n.cusip6 IS UNIQUE',
+    'CREATE CONSTRAINT unique_manager IF NOT EXISTS FOR (n:Manager) REQUIRE n.cik IS UNIQUE',
+]
+
+FORM_FINGERPRINTS_QUERY = """
+MATCH (f:Form) WHERE f.formId IN $formIds
+RETURN f.formId AS formId, f.fingerprint AS fingerprint
+"""
+
+HOLDING_FINGERPRINTS_QUERY = """
+MATCH (mgr:Manager)-[owns:OWNS_STOCK_IN]->(com:Company)
+  WHERE owns.reportCalendarOrQuarter IN $quarters
+RETURN mgr.cik AS managerCik, com.cusip6 AS cusip6,
+       owns.reportCalendarOrQuarter AS reportCalendarOrQuarter, owns.fingerprint AS fingerprint
+"""
+
+DELETE_FORM_CHUNKS_QUERY = """
+UNWIND $rows AS formId
+MATCH (c:Chunk {formId: formId})
+DETACH DELETE c
+"""
+
+MERGE_FORMS_QUERY = """
+UNWIND $rows AS row
+MERGE (f:Form {formId: row.formId})
+SET f.names = row.names,
+    f.source = row.source,
+    f.cik = row.cik,
+    f.cusip6 = row.cusip6,
+    f.fingerprint = row.fingerprint,
+    f.summary = null,
+    f.summaryEmbedding = null
+"""
+
+LINK_COMPANY_FILINGS_QUERY = """
+UNWIND $rows AS cusip6
+MATCH (com:Company {cusip6: cusip6}), (f:Form {cusip6: cusip6})
+SET com.names = f.names
+MERGE (com)-[:FILED]->(f)
+"""
+
+UPSERT_HOLDINGS_QUERY = """
+UNWIND $rows AS row
+MATCH (mgr:Manager {cik: row.managerCik}),
+      (com:Company {cusip6: row.cusip6})
+MERGE (mgr)-[owns:OWNS_STOCK_IN { reportCalendarOrQuarter: row.reportCalendarOrQuarter }]->(com)
+SET owns.value  = row.value,
+    owns.shares = row.shares,
+    owns.fingerprint = row.fingerprint
+"""
+
+RECORD_MANIFEST_QUERY = """
+MERGE (kg:KnowledgeGraph {name: $name})
+  ON CREATE SET kg.createdAt = datetime()
+SET kg.lastOperation = datetime(),
+    kg.lastIncrementalLoad = datetime(),
+    kg.form10kDigest = coalesce($manifest.form10kDigest, kg.form10kDigest),
+    kg.form10kFiles = coalesce($manifest.form10kFiles, kg.form10kFiles),
+    kg.form13Digest = coalesce($manifest.form13Digest, kg.form13Digest),
+    kg.form13Rows = coalesce($manifest.form13Rows, kg.form13Rows),
+    kg.loadManifest = $manifest.json
+"""
+
+
+def fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_fingerprint(file: str) -> str:
+    """
+    Fingerprint of a form 10-K file's contents
+    """
+    with open(file, 'rb') as f:
+        return fingerprint(f.read())
+
+
+def row_fingerprint(row: Dict[str, Any]) -> str:
+    """
+    Fingerprint of an aggregated form 13 holding, independent of column order
+    """
+    return fingerprint(json.dumps(row, sort_keys=True).encode('utf-8'))
+
+
+def holding_key(row: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    The identity of an `OWNS_STOCK_IN` relationship, matching its MERGE pattern
+    """
+    return (str(row['managerCik']), row['cusip6'], row['reportCalendarOrQuarter'])
+
+
+def digest(fingerprints: Iterable[str]) -> str:
+    """
+    A single fingerprint for a whole set of fingerprints
+    """
+    return fingerprint('\n'.join(sorted(fingerprints)).encode('utf-8'))
+
+
+def form10k_delta(driver, files: List[str], database: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Find the form 10-K files that are new, or changed since they were loaded.
+
+    Returns `(changed, fingerprints)`, where each changed entry has the file,
+    formId and fingerprint, and whether the form was loaded before, and
+    `fingerprints` maps every formId to the fingerprint of its file.
+    """
+    current = {form_id_from_file(file): (file, file_fingerprint(file)) for file in files}
+    loaded = {
+        record['formId']: record['fingerprint']
+        for record in driver.execute_query(FORM_FINGERPRINTS_QUERY, formIds=list(current), database_=database).records
+    }
+    changed = [
+        {'file': file, 'formId': form_id, 'fingerprint': file_fp, 'replaces': form_id in loaded}
+        for form_id, (file, file_fp) in current.items()
+        if loaded.get(form_id) != file_fp
+    ]
+    return changed, {form_id: file_fp for form_id, (_, file_fp) in current.items()}
+
+
+def apply_form10k_delta(driver, changed: List[Dict[str, Any]], database: Optional[str] = None,
+                        processes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Load the Forms and Chunks of changed files, replacing the chunks of forms that were loaded before.
+
+    The new chunks have no `textEmbedding` yet, and the summary of a replaced form
+    described its old text, so `summary` and `summaryEmbedding` are cleared.
+    The formIds returned under `needsEmbedding` are out of vector search until the
+    embedding pipeline and the form summarizer have run for them.
+    """
+    form_ids = [entry['formId'] for entry in changed]
+    replaced = [entry['formId'] for entry in changed if entry['replaces']]
+    options = {'database': database}
+
+    if replaced:
+        load_batches(driver, DELETE_FORM_CHUNKS_QUERY, replaced, batch_size=50, **options)
+
+    forms = []
+    for entry in changed:
+        form = read_form10k_form(entry['file'])
+        del form['fullText']
+        forms.append({**form, 'fingerprint': entry['fingerprint']})
+    load_batches(driver, MERGE_FORMS_QUERY, forms, **options)
+
+    chunk_stats = load_chunks(driver, iter_chunks([entry['file'] for entry in changed], processes=processes),
+                              notify=False, **options)
+    link_graph(driver, form_ids=form_ids, database=database)
+
+    return {'forms': len(forms), 'replaced': len(replaced), 'chunks': chunk_stats.rows, 'needsEmbedding': form_ids}
+
+
+def form13_delta(driver, rows: List[Dict[str, Any]], database: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Find the holdings that are new, or whose values changed since they were loaded.
+
+    `rows` are aggregated holdings, one per `holding_key`, as `preprocess_form13`
+    returns them; fingerprinting raw rows would let the last of several rows
+    for one holding overwrite the others. Only the quarters present in `rows`
+    are read back from the graph. Returns `(changed_rows, unchanged_count)`,
+    each changed row carrying its fingerprint.
+    """
+    quarters = sorted({row['reportCalendarOrQuarter'] for row in rows})
+    loaded = {
+        holding_key(record): record['fingerprint']
+        for record in driver.execute_query(HOLDING_FINGERPRINTS_QUERY, quarters=quarters, database_=database).records
+    }
+    changed = []
+    for row in rows:
+        row_fp = row_fingerprint(row)
+        if loaded.get(holding_key(row)) != row_fp:
+            changed.append({**row, 'fingerprint': row_fp})
+    return changed, len(rows) - len(changed)
+
+
+def apply_form13_delta(driver, changed: List[Dict[str, Any]], batches: Form13Batches,
+                       database: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Merge the Companies and Managers of changed holdings, from `batches`, upsert
+    the holdings, and refresh the holder rollups of the companies whose holdings changed
+    """
+    options = {'database': database}
+    cusip6s = {row['cusip6'] for row in changed}
+    manager_ciks = {row['managerCik'] for row in changed}
+    companies = [company for company in batches.companies if company['cusip6'] in cusip6s]
+    managers = [manager for manager in batches.managers if manager['managerCik'] in manager_ciks]
+    load_batches(driver, MERGE_COMPANIES_QUERY, companies, **options)
+    load_batches(driver, MERGE_MANAGERS_QUERY, managers, **options)
+    holdings = load_batches(driver, UPSERT_HOLDINGS_QUERY, changed, **options)
+    # a company seen for the first time may have filed a form 10-K that is already loaded
+    load_batches(driver, LINK_COMPANY_FILINGS_QUERY, [row['cusip6'] for row in companies], **options)
+    rollups = rollup_holders(driver, [row['cusip6'] for row in companies], database=database)
+    return {'companies': len(companies), 'managers': len(managers), 'holdings': holdings.rows,
+            'rollups': rollups.companies}
+
+
+def incremental_build(driver, data_dir: Optional[str] = None, form13_file: Optional[str] = None,
+                      database: Optional[str] = None, processes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Apply only the new or changed form 10-K files and form 13 rows, then record a manifest.
+
+    `data_dir` is a directory holding a `form10k/` directory, e.g. `data/all`.
+    The manifest on the `(:KnowledgeGraph)` node records digests of everything
+    loaded and a summary of this run.
+    """
+    start = time.perf_counter()
+    summary: Dict[str, Any] = {}
+    manifest: Dict[str, Any] = {}
+
+    for constraint in CONSTRAINTS:
+        driver.execute_query(constraint, database_=database)
+
+    if data_dir:
+        files = form10k_files(data_dir)
+        changed, fingerprints = form10k_delta(driver, files, database)
+        unchanged = len(fingerprints) - len(changed)
+        print(f"Form 10-K: {len(changed)} new or changed files, {unchanged} unchanged")
+        summary['form10k'] = {'unchanged': unchanged, **(apply_form10k_delta(driver, changed, database, processes) if changed else {})}
+        manifest['form10kFiles'] = len(files)
+        manifest['form10kDigest'] = digest(fingerprints.values())
+
+    if form13_file:
+        batches = preprocess_form13(form13_file)
+        changed_rows, unchanged_rows = form13_delta(driver, batches.holdings, database)
+        print(f"Form 13: {len(changed_rows)} new or changed holdings, {unchanged_rows} unchanged, "
+              f"{len(batches.rejected)} rows rejected")
+        summary['form13'] = {'unchanged': unchanged_rows, 'rejected': len(batches.rejected),
+                             **(apply_form13_delta(driver, changed_rows, batches, database) if changed_rows else {})}
+        manifest['form13Rows'] = batches.rows
+        manifest['form13Digest'] = digest(row_fingerprint(row) for row in batches.holdings)
+
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    manifest['json'] = json.dumps(summary)
+    driver.execute_query(RECORD_MANIFEST_QUERY, name=KG_NAME, manifest=manifest, database_=database)
+    return summary
+
+
+def main() -> int:
+    """Incrementally load form 10-K files and form 13 rows into Neo4j"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='IncrementalBuild',
+                    description='Loads only new or changed form 10-K files and form 13 rows')
+    arg_parser.add_argument('--data-dir', help='Directory containing a form10k/ directory, e.g. data/all')
+    arg_parser.add_argument('--form13', help='Form 13 csv file, e.g. data/sample/form13.csv')
+    arg_parser.add_argument('--processes', type=int, default=None, help='Worker processes for chunking')
+    arg_parser.add_argument('--invalidate-url', help='graphvis cache invalidation URL to call after loading '
+                                                          '(default: $GRAPHVIS_INVALIDATE_URL)')
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+    from neo4j import GraphDatabase
+
+    load_dotenv()
+    driver = GraphDatabase.driver(os.getenv('NEO4J_URI'),
+                                  auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')))
+    with driver:
+        summary = incremental_build(driver, args.data_dir, args.form13,
+                                    database=os.getenv('NEO4J_DATABASE') or 'neo4j', processes=args.processes)
+    print(json.dumps(summary, indent=2))
+    notify_graph_changed(args.invalidate_url)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -179,17 +179,25 @@ MERGE (mgr)-[owns:OWNS_STOCK_IN {
       SET owns.value  = toFloat(row.value), 
           owns.shares = toInteger(row.shares)
 ;
-// Connect the Form 10-K to the Company, migrating some properties from Form to Company
-MATCH (com:Company), (form:Form)
-  WHERE com.cusip6 = form.cusip6
-SET com.names = form.names,
-    com.cik = toInteger(form.cik)
-SET form.names = null,
-    form.cik = null,
-    form.cusip6 = null,
-    form.cusip = null
-MERGE (com)-[:FILED]->(form)
-;
+// Connect the Form 10-K to the Company, migrating some properties from Form to Company.
+// Each form looks up its company through the unique_company constraint, in batches.
+:auto
+MATCH (form:Form) WHERE form.cusip6 IS NOT NULL
+CALL {
+  WITH form
+  MATCH (com:Company {cusip6: form.cusip6})
+  SET com.names = form.names,
+      com.cik = toInteger(form.cik)
+  SET form.names = null,
+      form.cik = null,
+      form.cusip6 = null,
+      form.cusip = null
+  MERGE (com)-[:FILED]->(form)
+} IN TRANSACTIONS OF 100 ROWS
+;
+// Each company's top holders are precomputed as investment sentences by holder_rollups.py,
+// which holds the rollup query: run `python holder_rollups.py` after this module.
+// load_form13, load_preprocessed_form13 and incremental_build.py refresh them as they load.
 // Generate embeddings for each chunk. This may take a while.
 :auto  
 MATCH (chunk:Chunk) WHERE chunk.textEmbedding IS NULL
@@ -0,0 +1,173 @@
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Lookups the linking steps rely on, so each step is an index seek per form
+# rather than a join of every Chunk (or Company) with every Form.
+INDEXES = [
+    'CREATE CONSTRAINT unique_form IF NOT EXISTS FOR (n:Form) REQUIRE n.formId IS UNIQUE',
+    'CREATE CONSTRAINT unique_company IF NOT EXISTS FOR (n:Company) REQUIRE n.cusip6 IS UNIQUE',
+    'CREATE INDEX chunk_form_id IF NOT EXISTS FOR (c:Chunk) ON (c.formId)',
+    'CREATE INDEX chunk_item IF NOT EXISTS FOR (c:Chunk) ON (c.item)',
+]
+
+# Each step drives from one row per form, optionally limited to `$formIds`,
+# and commits every `$batchSize` forms. `CALL {} IN TRANSACTIONS` needs an
+# auto-commit transaction, so these are sent with `session.run`.
+#
+# NEXT runs before the Form nodes exist (in 1-mvg), so it takes the formIds
+# themselves; `run_link_step` reads them from the `chunk_form_id` index when
+# none are given, rather than the step scanning every Chunk for them.
+
+CHUNK_FORM_IDS_QUERY = """
+MATCH (c:Chunk) WHERE c.formId IS NOT NULL
+RETURN DISTINCT c.formId AS formId
+"""
+
+LINK_NEXT_QUERY = """
+UNWIND $formIds AS formId
+CALL {
+  WITH formId
+  MATCH (c:Chunk {formId: formId})
+  WITH c ORDER BY c.item, c.chunkSeqId
+  WITH c.item AS item, collect(c) AS section
+  UNWIND range(0, size(section) - 2) AS i
+  WITH section[i] AS this, section[i + 1] AS next
+  MERGE (this)-[:NEXT]->(next)
+} IN TRANSACTIONS OF $batchSize ROWS
+"""
+
+LINK_PART_OF_QUERY = """
+MATCH (f:Form) WHERE $formIds IS NULL OR f.formId IN $formIds
+CALL {
+  WITH f
+  MATCH (c:Chunk {formId: f.formId})
+  MERGE (c)-[:PART_OF]->(f)
+} IN TRANSACTIONS OF $batchSize ROWS
+"""
+
+LINK_SECTION_QUERY = """
+MATCH (f:Form) WHERE $formIds IS NULL OR f.formId IN $formIds
+CALL {
+  WITH f
+  MATCH (headOfSection:Chunk {formId: f.formId})
+    WHERE headOfSection.chunkSeqId = 0
+  MERGE (f)-[:SECTION {item: headOfSection.item}]->(headOfSection)
+} IN TRANSACTIONS OF $batchSize ROWS
+"""
+
+SET_COMPANY_NAMES_QUERY = """
+MATCH (f:Form) WHERE $formIds IS NULL OR f.formId IN $formIds
+CALL {
+  WITH f
+  MATCH (com:Company {cusip6: f.cusip6})
+  SET com.names = f.names
+} IN TRANSACTIONS OF $batchSize ROWS
+"""
+
+LINK_FILED_QUERY = """
+MATCH (f:Form) WHERE $formIds IS NULL OR f.formId IN $formIds
+CALL {
+  WITH f
+  MATCH (com:Company {cusip6: f.cusip6})
+  MERGE (com)-[:FILED]->(f)
+} IN TRANSACTIONS OF $batchSize ROWS
+"""
+
+LINK_STEPS: Dict[str, str] = {
+    'NEXT': LINK_NEXT_QUERY,
+    'PART_OF': LINK_PART_OF_QUERY,
+    'SECTION': LINK_SECTION_QUERY,
+    'COMPANY_NAMES': SET_COMPANY_NAMES_QUERY,
+    'FILED': LINK_FILED_QUERY,
+}
+
+DEFAULT_LINK_BATCH_SIZE = 100
+
+
+@dataclass
+class LinkTiming:
+    """How long one linking step took, and what it wrote"""
+    step: str
+    seconds: float = 0.0
+    relationships_created: int = 0
+    properties_set: int = 0
+
+    def __str__(self) -> str:
+        return (f"{self.step}: {self.seconds:.2f}s, {self.relationships_created} relationships created, "
+                f"{self.properties_set} properties set")
+
+
+def ensure_indexes(driver, database: Optional[str] = None, timeout: int = 300) -> None:
+    """
+    Create the indexes the linking steps rely on, and wait until they are online
+    """
+    for index in INDEXES:
+        driver.execute_query(index, database_=database)
+    driver.execute_query('CALL db.awaitIndexes($timeout)', timeout=timeout, database_=database)
+
+
+def run_link_step(driver, step: str, form_ids: Optional[List[str]] = None,
+                  batch_size: int = DEFAULT_LINK_BATCH_SIZE, database: Optional[str] = None) -> LinkTiming:
+    """
+    Run one linking step, for every form or only for `form_ids`
+    """
+    timing = LinkTiming(step)
+    start = time.perf_counter()
+    if step == 'NEXT' and form_ids is None:
+        form_ids = [record['formId']
+                    for record in driver.execute_query(CHUNK_FORM_IDS_QUERY, database_=database).records]
+    with driver.session(database=database) as session:
+        summary = session.run(LINK_STEPS[step], formIds=form_ids, batchSize=batch_size).consume()
+    timing.seconds = time.perf_counter() - start
+    timing.relationships_created = summary.counters.relationships_created
+    timing.properties_set = summary.counters.properties_set
+    return timing
+
+
+def link_graph(driver, steps: Optional[List[str]] = None, form_ids: Optional[List[str]] = None,
+               batch_size: int = DEFAULT_LINK_BATCH_SIZE, database: Optional[str] = None) -> List[LinkTiming]:
+    """
+    Make sure the supporting indexes exist, then run the linking steps in order.
+
+    `steps` defaults to all of `LINK_STEPS`. Each step's timing is printed
+    as it finishes and the timings are returned.
+    """
+    ensure_indexes(driver, database)
+    timings = []
+    for step in steps or list(LINK_STEPS):
+        timing = run_link_step(driver, step, form_ids, batch_size, database)
+        print(f"\t{timing}")
+        timings.append(timing)
+    return timings
+
+
+def main() -> int:
+    """Link the chunks, forms and companies of a loaded graph"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='KgLinker',
+                    description='Creates NEXT, PART_OF, SECTION and FILED relationships in batches')
+    arg_parser.add_argument('steps', nargs='*', choices=list(LINK_STEPS), help='Steps to run (default: all)')
+    arg_parser.add_argument('--batch-size', type=int, default=DEFAULT_LINK_BATCH_SIZE,
+                            help='Forms linked per transaction')
+    args = arg_parser.parse_args()
+
+    from dotenv import load_dotenv
+    from neo4j import GraphDatabase
+
+    load_dotenv()
+    driver = GraphDatabase.driver(os.getenv('NEO4J_URI'),
+                                  auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')))
+    with driver:
+        timings = link_graph(driver, args.steps or None, batch_size=args.batch_size,
+                             database=os.getenv('NEO4J_DATABASE') or 'neo4j')
+    print(f"Linked in {sum(timing.seconds for timing in timings):.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import os
+import time
+import urllib.request
+import warnings
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Each query receives a batch of records as `$rows` and
+# turns it back into one row per record with UNWIND.
+
+MERGE_CHUNKS_QUERY = """
+UNWIND $rows AS row
+MERGE (mergedChunk:Chunk {chunkId: row.chunkId})
+    ON CREATE SET
+        mergedChunk.names = row.names,
+        mergedChunk.formId = row.formId,
+        mergedChunk.cik = row.cik,
+        mergedChunk.cusip6 = row.cusip6,
+        mergedChunk.source = row.source,
+        mergedChunk.item = row.item,
+        mergedChunk.chunkSeqId = row.chunkSeqId,
+        mergedChunk.text = row.text
+"""
+
+MERGE_COMPANIES_QUERY = """
+UNWIND $rows AS row
+MERGE (com:Company {cusip6: row.cusip6})
+  ON CREATE
+    SET com.name = row.companyName,
+        com.cusip = row.cusip
+"""
+
+MERGE_MANAGERS_QUERY = """
+UNWIND $rows AS row
+MERGE (mgr:Manager {cik: row.managerCik})
+  ON CREATE
+    SET mgr.name = row.managerName,
+        mgr.address = row.managerAddress
+"""
+
+MERGE_HOLDINGS_QUERY = """
+UNWIND $rows AS row
+MATCH (mgr:Manager {cik: row.managerCik}),
+      (com:Company {cusip6: row.cusip6})
+MERGE (mgr)-[owns:OWNS_STOCK_IN { reportCalendarOrQuarter: row.reportCalendarOrQuarter }]->(com)
+  ON CREATE
+    SET owns.value  = toFloat(row.value),
+        owns.shares = toInteger(row.shares)
+"""
+
+DEFAULT_BATCH_SIZE = 1000
+
+# graphvis `/cache/invalidate` endpoint told about loads, e.g. http://localhost:8000/cache/invalidate
+GRAPHVIS_INVALIDATE_URL = 'GRAPHVIS_INVALIDATE_URL'
+
+
+@dataclass
+class LoadStats:
+    """Rows written by a batched load, and how fast"""
+    rows: int = 0
+    batches: int = 0
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def retries(self) -> int:
+        return self.attempts - self.batches
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.rows} rows in {self.batches} batches, {self.seconds:.2f}s "
+                f"({self.rows_per_second:,.0f} rows/s, {self.retries} retries)")
+
+
+def batched(rows: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """
+    Split an iterable into lists of at most batch_size items
+    """
+    iterator = iter(rows)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def load_batches(driver, query: str, rows: Iterable[Dict[str, Any]],
+                 batch_size: int = DEFAULT_BATCH_SIZE, database: Optional[str] = None,
+                 params: Optional[Dict[str, Any]] = None) -> LoadStats:
+    """
+    Send rows to an `UNWIND $rows` query, one managed write transaction per batch.
+    `params` are passed to every batch alongside `$rows`.
+
+    Managed transactions are retried by the driver on transient errors,
+    so a deadlock or leader switch only replays the batch that hit it.
+    """
+    stats = LoadStats()
+    start = time.perf_counter()
+
+    with driver.session(database=database) as session:
+        for batch in batched(rows, batch_size):
+            def write_batch(tx):
+                stats.attempts += 1
+                tx.run(query, params, rows=batch).consume()
+            session.execute_write(write_batch)
+            stats.batches += 1
+            stats.rows += len(batch)
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def notify_graph_changed(url: Optional[str] = None) -> bool:
+    """
+    POST to a graphvis `/cache/invalidate` endpoint so it drops cached graphs and
+    materialized views of the old graph, and rebuilds the views.
+
+    `url` defaults to the `GRAPHVIS_INVALIDATE_URL` environment variable; with
+    neither set this does nothing. A graphvis that can't be reached doesn't fail
+    the load, it only warns. Returns whether graphvis was told.
+    """
+    url = url or os.getenv(GRAPHVIS_INVALIDATE_URL)
+    if not url:
+        return False
+    try:
+        urllib.request.urlopen(urllib.request.Request(url, method='POST'), timeout=10).close()
+    except OSError as e:
+        warnings.warn(f"graphvis cache at {url} not invalidated: {e}")
+        return False
+    return True
+
+
+def load_chunks(driver, chunks: Iterable[Dict[str, Any]], notify: bool = True, **kwargs) -> LoadStats:
+    """
+    Merge `(:Chunk)` nodes from records produced by the form 10-K splitter,
+    then tell graphvis the graph changed (see `notify_graph_changed`) unless `notify` is False
+    """
+    stats = load_batches(driver, MERGE_CHUNKS_QUERY, chunks, **kwargs)
+    if notify:
+        notify_graph_changed()
+    return stats
+
+
+def load_form13(driver, form13s: List[Dict[str, Any]], notify: bool = True, **kwargs) -> Dict[str, Any]:
+    """
+    Merge `(:Company)`, `(:Manager)` and `[:OWNS_STOCK_IN]` from form 13 rows.
+
+    Companies and managers are loaded first, so every holding batch can MATCH both ends.
+    The holder rollups of the loaded companies are refreshed after the holdings, under
+    `rollups`. Then graphvis is told the graph changed, unless `notify` is False.
+    """
+    # holder_rollups loads its batches with this module
+    from holder_rollups import rollup_holders
+
+    stats = {
+        'companies': load_batches(driver, MERGE_COMPANIES_QUERY, form13s, **kwargs),
+        'managers': load_batches(driver, MERGE_MANAGERS_QUERY, form13s, **kwargs),
+        'holdings': load_batches(driver, MERGE_HOLDINGS_QUERY, form13s, **kwargs),
+    }
+    stats['rollups'] = rollup_holders(driver, (row['cusip6'] for row in form13s), database=kwargs.get('database'))
+    if notify:
+        notify_graph_changed()
+    return stats
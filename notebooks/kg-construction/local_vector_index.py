@@ -0,0 +1,359 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# An index directory holds one directory per version of the index, and a
+# CURRENT file naming the version to open. A new version is written in full
+# before CURRENT is replaced, in one rename, so an index being opened never
+# sees files from two versions; indexes already open keep reading theirs.
+CURRENT_FILE = 'CURRENT'
+VERSION_PREFIX = 'v-'
+# versions kept: the current one, and the one before it, which open indexes may still map
+KEEP_VERSIONS = 2
+
+# Files of a version directory
+VECTORS_FILE = 'vectors.f32'      # count x dimensions float32 matrix, rows scaled to unit length
+CHUNKS_FILE = 'chunks.json'       # chunkId, formId and cusip6 of each row
+INDEX_FILE = 'index.json'         # dimensions, count, and the number of IVF lists
+CENTROIDS_FILE = 'centroids.npy'  # IVF list centroids
+OFFSETS_FILE = 'offsets.npy'      # first row of each IVF list, plus the row count
+
+EXPORT_EMBEDDINGS_QUERY = """
+MATCH (c:Chunk) WHERE c.textEmbedding IS NOT NULL
+OPTIONAL MATCH (c)-[:PART_OF]->(f:Form)
+OPTIONAL MATCH (f)<-[:FILED]-(com:Company)
+RETURN c.chunkId AS chunkId, coalesce(c.formId, f.formId) AS formId,
+       coalesce(c.cusip6, com.cusip6) AS cusip6, c.textEmbedding AS embedding
+"""
+
+# Expand hits into the text and source the notebooks' retrievers return
+CHUNKS_BY_ID_QUERY = """
+UNWIND $chunkIds AS chunkId
+MATCH (c:Chunk {chunkId: chunkId})
+RETURN c.chunkId AS chunkId, c.text AS text, c.source AS source
+"""
+
+# rows scored per matrix multiply, so a full scan never holds more than this many scores per query
+SCAN_BLOCK_ROWS = 1 << 16
+
+
+@dataclass
+class Hit:
+    """A chunk close to a query"""
+    chunk_id: str
+    score: float
+    form_id: Optional[str] = None
+    cusip6: Optional[str] = None
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, highest first"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind='stable')]
+
+
+def current_dir(index_dir: str) -> str:
+    """The directory holding the files of the index's current version"""
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE)) as f:
+            return os.path.join(index_dir, f.read().strip())
+    except FileNotFoundError:
+        # an index written before versions, with its files in index_dir itself
+        return index_dir
+
+
+def new_version(index_dir: str) -> str:
+    """An empty directory for the next version of the index"""
+    os.makedirs(index_dir, exist_ok=True)
+    version_dir = os.path.join(index_dir, f"{VERSION_PREFIX}{time.time_ns()}")
+    os.mkdir(version_dir)
+    return version_dir
+
+
+def publish_version(index_dir: str, version_dir: str) -> None:
+    """
+    Make `version_dir` the current version with one rename, then remove the versions before the one it replaced
+    """
+    pointer_tmp = os.path.join(index_dir, CURRENT_FILE + '.tmp')
+    with open(pointer_tmp, 'w') as f:
+        f.write(os.path.basename(version_dir))
+    os.replace(pointer_tmp, os.path.join(index_dir, CURRENT_FILE))
+    versions = sorted(name for name in os.listdir(index_dir) if name.startswith(VERSION_PREFIX))
+    for name in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+    # files of an index written before versions; an index open on them may keep them on some platforms
+    for name in (VECTORS_FILE, CHUNKS_FILE, INDEX_FILE, CENTROIDS_FILE, OFFSETS_FILE):
+        with contextlib.suppress(OSError):
+            os.remove(os.path.join(index_dir, name))
+
+
+def write_index(index_dir: str, rows: Iterable[Dict[str, Any]], batch_size: int = 1024) -> int:
+    """
+    Write rows of `chunkId`, `formId`, `cusip6` and `embedding` as a new version of an index directory.
+
+    Vectors are appended to the matrix file a batch at a time, so the export
+    never holds more than `batch_size` of them. The version only becomes
+    current once all its files are written; if the export fails, the
+    current version is left as it was.
+    """
+    version_dir = new_version(index_dir)
+    try:
+        count = _write_version(version_dir, rows, batch_size)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    publish_version(index_dir, version_dir)
+    return count
+
+
+def _write_version(version_dir: str, rows: Iterable[Dict[str, Any]], batch_size: int) -> int:
+    sidecar: Dict[str, List[Any]] = {'chunkId': [], 'formId': [], 'cusip6': []}
+    dimensions = None
+    batch: List[Sequence[float]] = []
+    with open(os.path.join(version_dir, VECTORS_FILE), 'wb') as f:
+        def flush():
+            normalized(batch).tofile(f)
+            batch.clear()
+
+        for row in rows:
+            if dimensions is None:
+                dimensions = len(row['embedding'])
+            elif len(row['embedding']) != dimensions:
+                raise ValueError(f"chunk {row['chunkId']} has {len(row['embedding'])} dimensions, expected {dimensions}")
+            for name in sidecar:
+                sidecar[name].append(row.get(name))
+            batch.append(row['embedding'])
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    count = len(sidecar['chunkId'])
+    with open(os.path.join(version_dir, CHUNKS_FILE), 'w') as f:
+        json.dump(sidecar, f)
+    with open(os.path.join(version_dir, INDEX_FILE), 'w') as f:
+        json.dump({'dimensions': dimensions or 0, 'count': count, 'lists': 0, 'exportedAt': time.time()}, f)
+    return count
+
+
+def export_index(driver, index_dir: str, database: Optional[str] = None) -> int:
+    """
+    Export every chunk's `textEmbedding` from Neo4j into `index_dir`, streaming the records
+    """
+    with driver.session(database=database) as session:
+        result = session.run(EXPORT_EMBEDDINGS_QUERY)
+        return write_index(index_dir, (record.data() for record in result))
+
+
+def partition_index(index_dir: str, lists: int, iterations: int = 10, sample_size: Optional[int] = None,
+                    seed: int = 0) -> None:
+    """
+    Partition an index into `lists` IVF lists with spherical k-means.
+
+    Centroids are trained on a sample (256 rows per list by default), then the
+    rows are rewritten grouped by their nearest centroid, so each list is one
+    contiguous slice of the memory-mapped matrix. The partitioned index is
+    written as a new version, like `write_index` does.
+    """
+    index = LocalVectorIndex(index_dir)
+    vectors = index.vectors
+    rng = np.random.default_rng(seed)
+    lists = max(1, min(lists, len(index)))
+    sample_size = min(len(index), sample_size or lists * 256)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(index), sample_size, replace=False))])
+
+    centroids = sample[rng.choice(len(sample), lists, replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for i in range(lists):
+            members = sample[assignment == i]
+            # an empty list takes a random sample row, rather than keeping a centroid nothing is near
+            centroids[i] = members.sum(axis=0) if len(members) else sample[rng.integers(len(sample))]
+        centroids = normalized(centroids)
+
+    assignment = np.concatenate([np.argmax(np.asarray(vectors[start:start + SCAN_BLOCK_ROWS]) @ centroids.T, axis=1)
+                                 for start in range(0, len(index), SCAN_BLOCK_ROWS)])
+    order = np.argsort(assignment, kind='stable')
+    offsets = np.searchsorted(assignment[order], np.arange(lists + 1))
+
+    version_dir = new_version(index_dir)
+    try:
+        with open(os.path.join(version_dir, VECTORS_FILE), 'wb') as f:
+            for start in range(0, len(order), SCAN_BLOCK_ROWS):
+                np.asarray(vectors[order[start:start + SCAN_BLOCK_ROWS]]).tofile(f)
+        sidecar = {name: [values[i] for i in order] for name, values in index.chunks.items()}
+        with open(os.path.join(version_dir, CHUNKS_FILE), 'w') as f:
+            json.dump(sidecar, f)
+        np.save(os.path.join(version_dir, CENTROIDS_FILE), centroids)
+        np.save(os.path.join(version_dir, OFFSETS_FILE), offsets)
+        with open(os.path.join(version_dir, INDEX_FILE), 'w') as f:
+            json.dump({**index.meta, 'lists': lists}, f)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    del index, vectors
+    publish_version(index_dir, version_dir)
+
+
+class LocalVectorIndex:
+    """
+    Exact top-k cosine search over a memory-mapped matrix of chunk embeddings.
+
+    The matrix isn't read into memory: pages are loaded by the OS as they are
+    scanned and shared between processes that open the same index. Queries
+    are scored with one matrix multiply per batch, which NumPy's BLAS spreads
+    across cores. When the index is partitioned, `nprobe` limits the scan to
+    the lists with the nearest centroids.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        # the version current when the index is opened, read in full even if a newer one is published meanwhile
+        self.version_dir = version_dir = current_dir(index_dir)
+        with open(os.path.join(version_dir, INDEX_FILE)) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(version_dir, CHUNKS_FILE)) as f:
+            self.chunks: Dict[str, List[Any]] = json.load(f)
+        self.dimensions = self.meta['dimensions']
+        self.vectors = np.memmap(os.path.join(version_dir, VECTORS_FILE), dtype=np.float32, mode='r',
+                                 shape=(self.meta['count'], self.dimensions)) if self.meta['count'] else \
+            np.zeros((0, self.dimensions), dtype=np.float32)
+        self.centroids = self.offsets = None
+        if self.meta.get('lists'):
+            self.centroids = np.load(os.path.join(version_dir, CENTROIDS_FILE))
+            self.offsets = np.load(os.path.join(version_dir, OFFSETS_FILE))
+        self.rows = {name: self._rows_by(name) for name in ('formId', 'cusip6')}
+
+    def _rows_by(self, name: str) -> Dict[str, np.ndarray]:
+        rows: Dict[str, List[int]] = {}
+        for i, value in enumerate(self.chunks[name]):
+            if value is not None:
+                rows.setdefault(value, []).append(i)
+        return {value: np.array(positions, dtype=np.int64) for value, positions in rows.items()}
+
+    def __len__(self) -> int:
+        return len(self.chunks['chunkId'])
+
+    def filter_rows(self, form_ids: Optional[Sequence[str]] = None,
+                    cusip6: Optional[Sequence[str]] = None) -> Optional[np.ndarray]:
+        """Rows of chunks in any of `form_ids` and of any of the `cusip6` companies; None when unfiltered"""
+        selected = None
+        for name, values in (('formId', form_ids), ('cusip6', cusip6)):
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            found = [self.rows[name][v] for v in values if v in self.rows[name]]
+            rows = np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        return selected
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray, k: int) -> List[Hit]:
+        best = top_k(scores, k)
+        return [Hit(self.chunks['chunkId'][r], float(scores[b]), self.chunks['formId'][r], self.chunks['cusip6'][r])
+                for b, r in zip(best, rows[best])]
+
+    def _scan(self, queries: np.ndarray, k: int) -> List[List[Hit]]:
+        # keep the k best of each block, so a scan holds k candidates per query rather than every score
+        candidates = [[] for _ in queries]
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SCAN_BLOCK_ROWS])
+            scores = block @ queries.T
+            for q in range(len(queries)):
+                best = top_k(scores[:, q], k)
+                candidates[q].append((best + start, scores[best, q]))
+        hits = []
+        for blocks in candidates:
+            rows = np.concatenate([rows for rows, _ in blocks]) if blocks else np.zeros(0, dtype=np.int64)
+            scores = np.concatenate([scores for _, scores in blocks]) if blocks else np.zeros(0, dtype=np.float32)
+            hits.append(self._hits(rows, scores, k))
+        return hits
+
+    def _probe(self, query: np.ndarray, k: int, nprobe: int) -> List[Hit]:
+        lists = top_k(self.centroids @ query, nprobe)
+        rows = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+        # the lists are contiguous, so this reads nprobe slices of the matrix
+        scores = np.concatenate([np.asarray(self.vectors[self.offsets[i]:self.offsets[i + 1]]) @ query for i in lists])
+        return self._hits(rows, scores, k)
+
+    def search(self, queries, k: int = 4, form_ids: Optional[Sequence[str]] = None,
+               cusip6: Optional[Sequence[str]] = None, nprobe: Optional[int] = None) -> List[List[Hit]]:
+        """
+        The `k` chunks most similar to each query vector, best first.
+
+        `queries` is one vector or a batch of them; a batch is scored together.
+        `form_ids` and `cusip6` restrict the search to those forms and companies,
+        scanning only their chunks. `nprobe` searches that many IVF lists of a
+        partitioned index instead of every row; filtered searches are always exact.
+        """
+        queries = normalized(np.atleast_2d(queries))
+        if queries.shape[1] != self.dimensions:
+            raise ValueError(f"queries have {queries.shape[1]} dimensions, the index has {self.dimensions}")
+        rows = self.filter_rows(form_ids, cusip6)
+        if rows is not None:
+            scores = np.asarray(self.vectors[rows]) @ queries.T
+            return [self._hits(rows, scores[:, q], k) for q in range(len(queries))]
+        if nprobe and self.centroids is not None and nprobe < len(self.centroids):
+            return [self._probe(query, k, nprobe) for query in queries]
+        return self._scan(queries, k)
+
+
+def expand_hits(driver, hits: List[Hit], database: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Fetch the text and source of each hit's chunk from the graph, in hit order, with its score"""
+    records = driver.execute_query(CHUNKS_BY_ID_QUERY, chunkIds=[hit.chunk_id for hit in hits],
+                                   database_=database).records
+    by_id = {record['chunkId']: record.data() for record in records}
+    return [{**by_id[hit.chunk_id], 'score': hit.score} for hit in hits if hit.chunk_id in by_id]
+
+
+def main() -> int:
+    """Export chunk embeddings from Neo4j into a local vector index"""
+
+    arg_parser = argparse.ArgumentParser(
+                    prog='LocalVectorIndex',
+                    description='Exports chunk embeddings to a memory-mapped index and optionally partitions it')
+    arg_parser.add_argument('index_dir', help='Directory for the index files, e.g. ../../.cache/vector-index')
+    arg_parser.add_argument('--export', action='store_true', help='Export the embeddings from Neo4j first')
+    arg_parser.add_argument('--lists', type=int, default=0, help='Partition into this many IVF lists')
+    args = arg_parser.parse_args()
+
+    if args.export:
+        from dotenv import load_dotenv
+        from neo4j import GraphDatabase
+
+        load_dotenv()
+        driver = GraphDatabase.driver(os.getenv('NEO4J_URI'),
+                                      auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD')))
+        start = time.perf_counter()
+        with driver:
+            count = export_index(driver, args.index_dir, os.getenv('NEO4J_DATABASE') or 'neo4j')
+        print(f"Exported {count} chunk embeddings in {time.perf_counter() - start:.2f}s")
+    if args.lists:
+        start = time.perf_counter()
+        partition_index(args.index_dir, args.lists)
+        print(f"Partitioned into {args.lists} lists in {time.perf_counter() - start:.2f}s")
+
+    index = LocalVectorIndex(args.index_dir)
+    print(f"Index: {len(index)} chunks, {index.dimensions} dimensions, {index.meta.get('lists') or 'no'} IVF lists, "
+          f"{len(index.rows['formId'])} forms, {len(index.rows['cusip6'])} companies")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
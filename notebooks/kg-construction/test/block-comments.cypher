@@ -0,0 +1,8 @@
+/* a block comment that isn't a doc comment ; */
+RETURN 1; /* trailing ; */
+// statement 2
+RETURN /* inline ; */ 2;
+/*
+ * statement 3 ; with semicolon
+ */
+RETURN 3;
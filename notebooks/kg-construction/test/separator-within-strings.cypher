@@ -0,0 +1,6 @@
+// statement 1 ; semicolon in a string
+RETURN 'a;b' AS value;
+// statement 2 ; URL in a string
+RETURN "https://www.sec.gov/Archives/edgar/data/" AS url;
+// statement 3 ; backticked identifier
+RETURN 3 AS `three;3`;
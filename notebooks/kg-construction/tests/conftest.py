@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+# the stub drivers and synthetic EDGAR data are shared with the benchmarks
+BENCHMARKS_DIR = Path(__file__).resolve().parents[3] / "benchmarks"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+import pytest  # noqa: E402
+from stub_driver import StubDriver  # noqa: E402
+
+
+@pytest.fixture
+def recording_driver():
+    """
+    Make StubDrivers that record the (query, params) of every query they run, in order.
+
+    `recording_driver(responder=None)` returns the driver and its list of queries;
+    `responder(query, params)` gives the records a query returns, none if it returns None.
+    """
+    def make(responder=None):
+        queries = []
+
+        def records(query, params):
+            queries.append((query, params))
+            return (responder(query, params) if responder else None) or []
+
+        return StubDriver(0, records), queries
+
+    return make
@@ -0,0 +1,142 @@
+from pathlib import Path
+
+import pytest
+
+from cypher_parser import (
+    CypherTokenizer, cypher_annotated_parser, cypher_parser, iter_statements, read_cypher_module,
+)
+
+MODULE_DIR = Path(__file__).resolve().parent.parent
+TEST_DIR = MODULE_DIR / "test"
+
+# file -> (text, start line, end line) of each statement
+EXPECTED_STATEMENTS = {
+    "block-comments.cypher": [("RETURN 1", 2, 2), ("RETURN   2", 4, 4), ("RETURN 3", 8, 8)],
+    "module-comment.cypher": [("RETURN 1", 5, 5), ("RETURN 2", 7, 7), ("RETURN 3", 9, 9)],
+    "multi-line-multi-statement-with-comments.cypher": [("RETURN 1", 2, 2), ("RETURN 2", 4, 4), ("RETURN 3", 6, 6)],
+    "multi-line-multi-statement.cypher": [("RETURN 1", 1, 1), ("RETURN 2", 2, 2), ("RETURN 3", 3, 3)],
+    "multi-statement.cypher": [("RETURN 1", 1, 1), ("RETURN 2", 1, 1), ("RETURN 3", 1, 1)],
+    "separator-within-comments.cypher": [("RETURN 1", 6, 6), ("RETURN 2", 8, 8), ("RETURN 3", 12, 12)],
+    "separator-within-strings.cypher": [
+        ("RETURN 'a;b' AS value", 2, 2),
+        ('RETURN "https://www.sec.gov/Archives/edgar/data/" AS url', 4, 4),
+        ("RETURN 3 AS `three;3`", 6, 6),
+    ],
+    "single-statement.cypher": [('RETURN "hello" as message', 1, 1)],
+}
+
+# (start line, end line, first line) of each statement in kg-construction.cypher
+KG_CONSTRUCTION_STATEMENTS = [
+    (2, 6, ":params {"),
+    (74, 78, 'MERGE (kg:KnowledgeGraph {name: "EdgarKG"})'),
+    (84, 84, "CREATE CONSTRAINT unique_form IF NOT EXISTS FOR (n:Form) REQUIRE n.formId IS UNIQUE"),
+    (86, 87, "CREATE CONSTRAINT unique_chunk IF NOT EXISTS"),
+    (90, 95, "CREATE VECTOR INDEX `form_10k_chunks` IF NOT EXISTS"),
+    (98, 106, "LOAD CSV WITH HEADERS from $baseURL + 'form10k/index.csv' AS row"),
+    (109, 121, "WITH ['item1','item1a','item7','item7a'] as items"),
+    (124, 125, "MATCH (f:Form)"),
+    (128, 146, "MATCH (f:Form)-[s:SECTION]->(first:Chunk)"),
+    (150, 152, "CREATE CONSTRAINT unique_company"),
+    (154, 157, "CREATE FULLTEXT INDEX fullTextCompanyNames"),
+    (159, 162, "CREATE CONSTRAINT unique_manager"),
+    (164, 167, "CREATE FULLTEXT INDEX fullTextManagerNames"),
+    (169, 180, 'LOAD CSV WITH HEADERS FROM $baseURL + "form13.csv" as row'),
+    (184, 196, ":auto"),
+    (202, 208, ":auto"),
+]
+
+
+def test_every_test_module_is_covered():
+    """Test that each test/*.cypher file has its expected statements listed here."""
+    assert sorted(path.name for path in TEST_DIR.glob("*.cypher")) == sorted(EXPECTED_STATEMENTS)
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED_STATEMENTS))
+def test_test_modules(name):
+    """Test the statement texts and the source lines they span, with comments and separators in the way."""
+    header, statements = read_cypher_module(str(TEST_DIR / name))
+    assert [(s.text, s.start_line, s.end_line) for s in statements] == EXPECTED_STATEMENTS[name]
+    # none of the test modules' doc comments has a @module tag
+    assert header is None
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED_STATEMENTS))
+def test_line_at_a_time_matches_whole_file(name):
+    """Test that feeding a module a line at a time gives the same statements as one block."""
+    text = (TEST_DIR / name).read_text()
+    whole = [(s.text, s.start_line, s.end_line) for s in iter_statements([text])]
+    lines = [(s.text, s.start_line, s.end_line) for s in iter_statements(text.splitlines(keepends=True))]
+    assert lines == whole
+
+
+def test_kg_construction_module():
+    """Test the statements of kg-construction.cypher, their lines, and its @module header."""
+    header, statements = read_cypher_module(str(MODULE_DIR / "kg-construction.cypher"))
+    assert [(s.start_line, s.end_line, s.text.splitlines()[0].strip()) for s in statements] == KG_CONSTRUCTION_STATEMENTS
+    for statement in statements:
+        assert statement.end_line - statement.start_line == statement.text.count("\n")
+
+    assert header.name == "LoadEdgarKG"
+    assert header.description.startswith("Load Form 10-K and Form 13 data from remote CSV files.")
+    assert header.params == {
+        "openAiApiKey": {"type": "string", "description": "OpenAI API key"},
+        "baseURL": {"type": "string", "description": "Base URL for the data files"},
+    }
+    assert header.plugins == ["apoc", "genai"]
+
+
+def test_kg_construction_auto_blocks():
+    """Test that the `:auto` statements keep their prefix and their whole `CALL {} IN TRANSACTIONS` body."""
+    _, statements = read_cypher_module(str(MODULE_DIR / "kg-construction.cypher"))
+    auto = [s for s in statements if s.text.startswith(":auto")]
+    assert [s.start_line for s in auto] == [184, 202]
+    for statement in auto:
+        assert statement.text.rstrip().endswith("ROWS")
+        assert "IN TRANSACTIONS OF" in statement.text
+        assert "//" not in statement.text
+
+
+def test_module_header_tags():
+    """Test @module, @param (with and without a type or description) and @plugins."""
+    tokenizer = CypherTokenizer()
+    statements = list(iter_statements([
+        "/**\n"
+        " * Loads things.\n"
+        " * More about it.\n"
+        " * @module Things\n"
+        " * @plugins apoc, genai ,\n"
+        " * @param limit::int - how many\n"
+        " * @param name\n"
+        " */\n"
+        "RETURN $limit, $name;\n"
+    ], tokenizer))
+    assert [s.text for s in statements] == ["RETURN $limit, $name"]
+    assert statements[0].start_line == 9
+    header = tokenizer.header
+    assert (header.name, header.description, header.plugins) == ("Things", "Loads things.\nMore about it.", ["apoc", "genai"])
+    assert header.params == {
+        "limit": {"type": "int", "description": "how many"},
+        "name": {"type": "any", "description": ""},
+    }
+
+
+def test_annotations():
+    """Test that `// key: value` comments annotate the next statement only, and are dropped from its text."""
+    pairs = cypher_annotated_parser(
+        "// name: first\n"
+        "// ttl: 60\n"
+        "RETURN 1;\n"
+        "// just a comment\n"
+        "RETURN 2 // name: not an annotation\n"
+        ";\n"
+    )
+    assert pairs == [({"name": "first", "ttl": "60"}, "RETURN 1"), ({}, "RETURN 2")]
+    assert cypher_parser("RETURN 1; RETURN 2") == ["RETURN 1", "RETURN 2"]
+
+
+def test_multi_line_strings():
+    """Test that a string spanning lines keeps its semicolons and comment markers, even across blocks."""
+    blocks = ["RETURN 'a;\n", "// b /* c\n", "d' AS s;\n", "RETURN 2;\n"]
+    statements = list(iter_statements(blocks))
+    assert [s.text for s in statements] == ["RETURN 'a;\n// b /* c\nd' AS s", "RETURN 2"]
+    assert [(s.start_line, s.end_line) for s in statements] == [(1, 3), (4, 4)]
@@ -0,0 +1,121 @@
+from neo4j import Record
+from stub_driver import StubDriver
+
+from cypher_runner import (
+    CLEAR_CHECKPOINT_QUERY, LOAD_CHECKPOINT_QUERY, RECORD_CHECKPOINT_QUERY, plan_module, run_module, stages,
+    statement_hash,
+)
+from cypher_parser import read_cypher_module
+
+MODULE = """
+:params { baseURL: "https://example.com/data/", unused: 1 }
+;
+CREATE CONSTRAINT unique_a IF NOT EXISTS FOR (n:A) REQUIRE n.id IS UNIQUE;
+CREATE INDEX b_id IF NOT EXISTS FOR (n:B) ON (n.id);
+LOAD CSV FROM $baseURL + 'a.csv' AS row MERGE (:A {id: row[0]});
+:auto LOAD CSV FROM $baseURL + 'b.csv' AS row CALL { WITH row MERGE (:B {id: row[0]}) } IN TRANSACTIONS;
+MATCH (a:A), (b:B) WHERE a.id = b.id MERGE (a)-[:SAME]->(b);
+"""
+
+
+class CheckpointGraph:
+    """Answers the runner's checkpoint queries from a set, records the statements sent and fails one when asked."""
+
+    def __init__(self, fail_at=""):
+        self.completed = set()
+        self.fail_at = fail_at
+        self.sent = []
+
+    def __call__(self, query, params):
+        if query == LOAD_CHECKPOINT_QUERY:
+            return [Record({"completed": sorted(self.completed)})]
+        if query == RECORD_CHECKPOINT_QUERY:
+            self.completed.update(params["hashes"])
+            return []
+        if query == CLEAR_CHECKPOINT_QUERY:
+            self.completed.difference_update(params["hashes"])
+            return []
+        self.sent.append(query)
+        if self.fail_at and self.fail_at in query:
+            raise RuntimeError("simulated failure")
+        return []
+
+
+def module_file(tmp_path):
+    path = tmp_path / "module.cypher"
+    path.write_text(MODULE)
+    return str(path)
+
+
+def run(graph, filename, **kwargs):
+    return run_module(StubDriver(0, graph), filename, notify=False, **kwargs)
+
+
+def test_statement_hash_covers_referenced_param_values():
+    """Test that a statement's hash changes with the values of the params it uses, and only those."""
+    query = "LOAD CSV FROM $baseURL + 'a.csv' AS row RETURN row"
+    base = statement_hash("m", query, {"baseURL": "https://a/", "other": 1})
+    assert statement_hash("m", query, {"baseURL": "https://a/", "other": 2}) == base
+    assert statement_hash("m", query, {"baseURL": "https://b/", "other": 1}) != base
+    assert statement_hash("m", "RETURN   1", {"baseURL": "x"}) == statement_hash("m", "RETURN 1")
+
+
+def test_schema_statements_share_a_stage(tmp_path):
+    """Test that consecutive schema statements form one stage, and every other statement its own."""
+    header, statements = read_cypher_module(module_file(tmp_path))
+    params, planned = plan_module(header, statements, {"unused": 2})
+    assert params == {"baseURL": "https://example.com/data/", "unused": 2}
+    assert [[s.kind for s in stage] for stage in stages(planned)] == [["schema", "schema"], ["write"], ["auto"],
+                                                                       ["write"]]
+
+
+def test_schema_stage_is_sent_before_waiting_for_indexes(tmp_path):
+    """Test that both schema statements are sent before the runner waits for the indexes, once."""
+    graph = CheckpointGraph()
+    timings = run(graph, module_file(tmp_path))
+    assert [t.status for t in timings] == ["ran"] * 5
+    await_at = graph.sent.index("CALL db.awaitIndexes($timeout)")
+    assert await_at == 2
+    assert all(query.startswith("CREATE") for query in graph.sent[:await_at])
+    assert graph.sent.count("CALL db.awaitIndexes($timeout)") == 1
+
+
+def test_failure_stops_the_run_and_a_rerun_resumes_after_the_completed(tmp_path):
+    """Test that a failed statement stops the run, and the next run skips what completed and retries the rest."""
+    filename = module_file(tmp_path)
+    graph = CheckpointGraph(fail_at="IN TRANSACTIONS")
+    first = run(graph, filename)
+    assert [t.status for t in first] == ["ran", "ran", "ran", "failed"]
+    assert "RuntimeError: simulated failure" in first[-1].error
+
+    graph.fail_at = ""
+    graph.sent.clear()
+    second = run(graph, filename)
+    assert [t.status for t in second] == ["skipped", "skipped", "skipped", "ran", "ran"]
+    assert len(graph.sent) == 2
+
+
+def test_changed_param_reruns_the_statements_using_it(tmp_path):
+    """Test that a statement whose parameter value changed is not skipped on resume."""
+    filename = module_file(tmp_path)
+    graph = CheckpointGraph()
+    run(graph, filename)
+    timings = run(graph, filename, params={"baseURL": "https://mirror.example.com/"})
+    assert [t.status for t in timings] == ["skipped", "skipped", "ran", "ran", "skipped"]
+
+
+def test_restart_runs_every_statement_again(tmp_path):
+    """Test that restart forgets this module's completed statements."""
+    filename = module_file(tmp_path)
+    graph = CheckpointGraph()
+    run(graph, filename)
+    timings = run(graph, filename, restart=True)
+    assert [t.status for t in timings] == ["ran"] * 5
+
+
+def test_timings_go_to_on_statement_not_stdout(tmp_path, capsys):
+    """Test that the runner reports each statement through on_statement and prints nothing."""
+    reported = []
+    timings = run(CheckpointGraph(), module_file(tmp_path), on_statement=reported.append)
+    assert reported == timings
+    assert capsys.readouterr().out == ""
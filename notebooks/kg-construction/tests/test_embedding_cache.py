@@ -0,0 +1,65 @@
+import itertools
+from array import array
+
+import embedding_cache
+from embedding_cache import CachedEmbeddings, EmbeddingCache, content_key
+from embedding_pipeline import FakeEmbeddings
+
+
+def float32(vector):
+    """`vector` as the cache stores it"""
+    return array("f", vector).tolist()
+
+
+def test_content_key_covers_the_model():
+    """Test that the same text embedded by another model gets another key."""
+    assert content_key("small", "revenue") == content_key("small", "revenue")
+    assert content_key("small", "revenue") != content_key("large", "revenue")
+
+
+def test_cached_texts_are_not_embedded_again(tmp_path):
+    """Test that a rerun over the same texts, even from a new process, never calls the embeddings API."""
+    path = str(tmp_path / "embeddings.sqlite")
+    embeddings = FakeEmbeddings(dimensions=8)
+    cached = CachedEmbeddings(embeddings, EmbeddingCache(path))
+    first = cached.embed_documents(["a", "b", "c"])
+    assert embeddings.calls == 1
+    assert first[1] == embeddings.embed_query("b")
+    cached.cache.close()
+
+    reopened = CachedEmbeddings(embeddings, EmbeddingCache(path))
+    assert reopened.embed_documents(["c", "a", "b"]) == [float32(first[i]) for i in (2, 0, 1)]
+    assert embeddings.calls == 1
+    assert reopened.cache.stats()["hits"] == 3
+
+
+def test_only_missing_texts_are_embedded(tmp_path):
+    """Test that a batch mixing cached and new texts only sends the new ones, and keeps their order."""
+    class Recording(FakeEmbeddings):
+        def embed_documents(self, texts):
+            sent.append(list(texts))
+            return super().embed_documents(texts)
+
+    sent = []
+    embeddings = Recording(dimensions=8)
+    cached = CachedEmbeddings(embeddings, EmbeddingCache(str(tmp_path / "embeddings.sqlite")))
+    cached.embed_documents(["a", "b"])
+    vectors = cached.embed_documents(["x", "a", "y", "b"])
+    assert sent == [["a", "b"], ["x", "y"]]
+    assert vectors[0::2] == [embeddings.embed_query(text) for text in ["x", "y"]]
+    assert vectors[1::2] == [float32(embeddings.embed_query(text)) for text in ["a", "b"]]
+    assert cached.cache.stats()["misses"] == 4
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    """Test that past max_entries the vectors read or written longest ago go first."""
+    ticks = itertools.count()
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: next(ticks))
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=2)
+    cache.put_many("m", ["a"], [[1.0]])
+    cache.put_many("m", ["b"], [[2.0]])
+    cache.get_many("m", ["a"])
+    cache.put_many("m", ["c"], [[3.0]])
+    assert cache.get_many("m", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
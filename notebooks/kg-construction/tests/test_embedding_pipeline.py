@@ -0,0 +1,121 @@
+import math
+import threading
+import time
+
+import pytest
+from neo4j import Record
+
+from embedding_pipeline import (
+    FIND_CHUNKS_TO_EMBED_QUERY, SET_CHUNK_EMBEDDINGS_QUERY, Checkpoint, FakeEmbeddings, RateLimiter, embed_chunks,
+)
+
+
+def chunks_to_embed(chunks, fail_writes=False):
+    """Answers the lookup of chunks to embed with `chunks`, failing every write back if asked to"""
+    def responder(query, params):
+        if query == FIND_CHUNKS_TO_EMBED_QUERY:
+            return [Record({"chunkId": chunk_id, "text": f"text of {chunk_id}"}) for chunk_id in chunks]
+        if query == SET_CHUNK_EMBEDDINGS_QUERY and fail_writes:
+            raise ConnectionError("connection lost")
+    return responder
+
+
+def rows_written(queries):
+    """The embedding rows written back, in the order they were written"""
+    return [row for query, params in queries if query == SET_CHUNK_EMBEDDINGS_QUERY for row in params["rows"]]
+
+
+def test_fake_embeddings_are_deterministic_unit_vectors():
+    """Test that the same text always gets the same unit-length vector, and different texts don't."""
+    embeddings = FakeEmbeddings(dimensions=20)
+    vector = embeddings.embed_query("risk factors")
+    assert len(vector) == 20
+    assert math.isclose(sum(v * v for v in vector), 1.0)
+    assert FakeEmbeddings(dimensions=20).embed_query("risk factors") == vector
+    assert embeddings.embed_query("revenue") != vector
+
+
+def test_fake_embeddings_count_document_calls():
+    """Test that one `embed_documents` call counts as one request, however many texts it embeds."""
+    embeddings = FakeEmbeddings(dimensions=8)
+    vectors = embeddings.embed_documents(["a", "b", "c"])
+    assert vectors == [embeddings.embed_query(text) for text in ["a", "b", "c"]]
+    assert embeddings.calls == 1
+
+
+def test_rate_limiter_spaces_calls_across_threads():
+    """Test that calls from several threads start at least 1/rate seconds apart."""
+    limiter = RateLimiter(50)
+    started = []
+
+    def call():
+        limiter.wait()
+        started.append(time.monotonic())
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    started.sort()
+    gaps = [b - a for a, b in zip(started, started[1:])]
+    assert min(gaps) >= 0.02 * 0.9
+    assert started[-1] - started[0] >= 5 * 0.02 * 0.9
+
+
+def test_rate_limiter_without_a_rate_does_not_wait():
+    """Test that no rate means no spacing."""
+    limiter = RateLimiter(None)
+    start = time.monotonic()
+    for _ in range(100):
+        limiter.wait()
+    assert time.monotonic() - start < 0.05
+
+
+def test_checkpoint_skips_a_torn_final_line(tmp_path):
+    """Test that rows are read back up to a line cut short by a crash."""
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    checkpoint.append([{"chunkId": "a", "embedding": [0.5]}, {"chunkId": "b", "embedding": [0.25]}])
+    with open(checkpoint.path, "a") as f:
+        f.write('{"chunkId": "c", "embe')
+    assert [row["chunkId"] for row in checkpoint.load()] == ["a", "b"]
+    checkpoint.clear()
+    assert checkpoint.load() == []
+
+
+def test_embed_chunks_writes_every_chunk_and_reports_progress(recording_driver):
+    """Test that every chunk is embedded in batches, written back, and reported as each write lands."""
+    chunks = [f"chunk-{i}" for i in range(10)]
+    driver, queries = recording_driver(chunks_to_embed(chunks))
+    embeddings = FakeEmbeddings(dimensions=4)
+    progress = []
+
+    stats = embed_chunks(driver, embeddings, batch_size=3, max_workers=2, write_batch_size=4,
+                         on_progress=lambda s: progress.append(s.chunks))
+    written = rows_written(queries)
+
+    assert sorted(row["chunkId"] for row in written) == chunks
+    assert all(row["embedding"] == embeddings.embed_query(f"text of {row['chunkId']}") for row in written)
+    assert (stats.found, stats.chunks, stats.requests, stats.resumed) == (10, 10, 4, 0)
+    assert embeddings.calls == 4
+    assert progress == sorted(progress) and progress[-1] == 10
+
+
+def test_embed_chunks_resumes_from_the_checkpoint(recording_driver, tmp_path):
+    """Test that embeddings computed before a failed write are written by the next run without re-embedding."""
+    path = str(tmp_path / "checkpoint.jsonl")
+    chunks = ["a", "b", "c", "d"]
+    failing_driver, _ = recording_driver(chunks_to_embed(chunks, fail_writes=True))
+    with pytest.raises(ConnectionError):
+        embed_chunks(failing_driver, FakeEmbeddings(dimensions=4), batch_size=2, max_workers=1,
+                     write_batch_size=10, checkpoint_path=path)
+    assert sorted(row["chunkId"] for row in Checkpoint(path).load()) == chunks
+
+    # once the checkpoint is written no chunk is missing an embedding any more
+    driver, queries = recording_driver(chunks_to_embed([]))
+    embeddings = FakeEmbeddings(dimensions=4)
+    stats = embed_chunks(driver, embeddings, checkpoint_path=path)
+
+    assert sorted(row["chunkId"] for row in rows_written(queries)) == chunks
+    assert (stats.resumed, stats.chunks, embeddings.calls) == (4, 0, 0)
+    assert Checkpoint(path).load() == []
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter  # noqa: E402
+
+from form10k_chunker import (  # noqa: E402
+    FORM10K_ITEMS, chunk_form10k_file, form10k_files, iter_chunks, iter_forms, read_form10k_form,
+)
+
+SAMPLE_DIR = Path(__file__).resolve().parents[3] / "data" / "sample"
+
+
+def write_form(directory, form_id="0000000001-23-000001", **items):
+    form = {"names": ["Example Inc", "EXAMPLE INC"], "cik": "1", "cusip6": "123456",
+            "source": "https://www.sec.gov/Archives/edgar/data/1.txt", **items}
+    path = directory / f"{form_id}.json"
+    path.write_text(json.dumps(form))
+    return str(path)
+
+
+def test_chunks_match_splitting_each_item():
+    """Test that each item is split on its own, keeping the first chunks, with ids numbered per item."""
+    file = form10k_files(str(SAMPLE_DIR))[0]
+    form = json.loads(Path(file).read_text())
+    splitter = RecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=200, length_function=len,
+                                              is_separator_regex=False)
+    expected = [(item, seq, text) for item in FORM10K_ITEMS if form.get(item)
+                for seq, text in enumerate(splitter.split_text(form[item])[:20])]
+
+    chunks = chunk_form10k_file(file)
+    assert [(c["item"], c["chunkSeqId"], c["text"]) for c in chunks] == expected
+    form_id = Path(file).stem
+    assert {c["formId"] for c in chunks} == {form_id}
+    assert chunks[0]["chunkId"] == f"{form_id}-{chunks[0]['item']}-chunk0000"
+    assert all(c["names"] == form["names"] and c["cusip6"] == form["cusip6"] for c in chunks)
+
+
+def test_missing_and_empty_items_are_skipped(tmp_path):
+    """Test that items absent from the file, or empty, produce no chunks."""
+    file = write_form(tmp_path, item1="Business. " * 50, item7="")
+    chunks = chunk_form10k_file(file, chunk_size=100, chunk_overlap=0, max_chunks_per_item=None)
+    assert {c["item"] for c in chunks} == {"item1"}
+    assert [c["chunkSeqId"] for c in chunks] == list(range(len(chunks)))
+    assert all(len(c["text"]) <= 100 for c in chunks)
+
+
+def test_process_pool_keeps_file_order():
+    """Test that chunks and forms read in a process pool come out as if read one file at a time."""
+    files = form10k_files(str(SAMPLE_DIR))[:4]
+    in_order = [chunk for file in files for chunk in chunk_form10k_file(file, max_chunks_per_item=3)]
+    assert list(iter_chunks(files, processes=2, max_chunks_per_item=3)) == in_order
+    assert list(iter_forms(files, processes=2)) == [read_form10k_form(file) for file in files]
+
+
+def test_read_form_joins_the_items(tmp_path):
+    """Test that the form record's fullText leads with the names, then each item present, in order."""
+    file = write_form(tmp_path, item7="Discussion.", item1="Business.")
+    form = read_form10k_form(file)
+    assert form["formId"] == "0000000001-23-000001"
+    assert form["fullText"] == "About ['Example Inc', 'EXAMPLE INC']...\nBusiness.\nDiscussion."
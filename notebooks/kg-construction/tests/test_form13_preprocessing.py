@@ -0,0 +1,18 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from synthetic_graph import form13_rows  # noqa: E402
+
+from form13_preprocessing import load_preprocessed_form13, preprocess_form13  # noqa: E402
+
+
+def test_load_preprocessed_form13_rolls_up_loaded_companies(recording_driver):
+    """Test that the holder rollups of exactly the loaded companies are refreshed, after the holdings."""
+    batches = preprocess_form13(pd.DataFrame(list(form13_rows(40))))
+    driver, queries = recording_driver()
+    stats = load_preprocessed_form13(driver, batches, notify=False)
+    rollup_batches = [params["rows"] for query, params in queries if "com.topHolders" in query]
+    assert rollup_batches == [sorted(company["cusip6"] for company in batches.companies)]
+    assert "com.topHolders" in queries[-1][0]
+    assert stats["rollups"].companies == len(batches.companies)
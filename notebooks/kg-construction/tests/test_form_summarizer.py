@@ -0,0 +1,64 @@
+import pytest
+
+# the summarizer splits forms with the chunker's langchain text splitter
+pytest.importorskip("langchain")
+
+from embedding_pipeline import FakeEmbeddings  # noqa: E402
+from form_summarizer import REDUCE_PROMPT, SET_FORM_SUMMARIES_QUERY, FakeChat, summarize_forms  # noqa: E402
+
+
+class FailingChat(FakeChat):
+    """FakeChat that raises for prompts containing `marker`"""
+
+    def __init__(self, marker: str):
+        super().__init__()
+        self.marker = marker
+
+    def invoke(self, prompt):
+        if self.marker in prompt:
+            raise RuntimeError("rate limited")
+        return super().invoke(prompt)
+
+
+def form(form_id, text="Widgets and gadgets. " * 20):
+    return {"formId": form_id, "names": [f"{form_id} Inc"], "fullText": text}
+
+
+def summaries_written(queries):
+    """The formIds whose summaries were written, in the order they were written"""
+    return [row["formId"] for query, params in queries if query == SET_FORM_SUMMARIES_QUERY for row in params["rows"]]
+
+
+def test_failed_form_is_counted_and_the_others_are_written(recording_driver, capsys):
+    """Test that one form's failing call is recorded, and the forms that finished are still written."""
+    forms = [form("a"), form("b", "Broken form. " * 20), form("c")]
+    driver, queries = recording_driver()
+    stats = summarize_forms(driver, FailingChat("Broken"), FakeEmbeddings(8), forms, max_workers=2,
+                            write_batch_size=1)
+    assert sorted(summaries_written(queries)) == ["a", "c"]
+    assert stats.forms == 2
+    assert stats.failed == 1
+    assert stats.errors == {"b": "RuntimeError: rate limited"}
+    assert "summary" not in forms[1]
+    assert "1 failed" in str(stats)
+    assert capsys.readouterr().out == ""
+
+
+def test_failed_reduce_fails_only_its_form(recording_driver):
+    """Test that a form whose reduce call fails is left out, after its parts were mapped."""
+    marker = REDUCE_PROMPT.split(" about")[0]
+    forms = [form("a", "word " * 400), form("b")]
+    driver, queries = recording_driver()
+    stats = summarize_forms(driver, FailingChat(marker), FakeEmbeddings(8), forms, part_size=500)
+    assert summaries_written(queries) == ["b"]
+    assert list(stats.errors) == ["a"]
+    assert stats.parts > 2
+
+
+def test_form_that_cannot_be_split_is_counted(recording_driver):
+    """Test that a form without text fails on its own."""
+    forms = [{"formId": "a", "names": ["A Inc"]}, form("b")]
+    driver, queries = recording_driver()
+    stats = summarize_forms(driver, FakeChat(), FakeEmbeddings(8), forms)
+    assert summaries_written(queries) == ["b"]
+    assert stats.errors["a"].startswith("KeyError")
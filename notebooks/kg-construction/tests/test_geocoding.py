@@ -0,0 +1,104 @@
+from neo4j import Record
+
+from geocoding import (
+    FIND_MANAGERS_QUERY, SET_MANAGER_LOCATIONS_QUERY, Geocode, GeocodeCache, GeocodeStats, StubGeocoder,
+    address_parts, geocode_addresses, geocode_managers, normalize_address,
+)
+
+ADDRESS = "1 Main Street, Suite 200, New York, NY, 10019-1234"
+
+
+class FlakyGeocoder(StubGeocoder):
+    """StubGeocoder that raises for addresses containing `marker`"""
+
+    def __init__(self, marker):
+        super().__init__()
+        self.marker = marker
+
+    def geocode(self, address):
+        if self.marker in address:
+            self.calls += 1
+            raise TimeoutError("provider timed out")
+        return super().geocode(address)
+
+
+def test_normalize_address_shares_a_key_between_spellings():
+    """Test that case, punctuation, common abbreviations and ZIP+4 don't change the key."""
+    assert normalize_address(ADDRESS) == "1 MAIN ST, STE 200, NEW YORK, NY, 10019"
+    assert normalize_address("1 main st., ste 200,  New York , NY , 10019") == normalize_address(ADDRESS)
+    assert normalize_address("10 Downing Street, London, X0, SW1A 2AA") == "10 DOWNING ST, LONDON, X0, SW1A 2AA"
+
+
+def test_address_parts():
+    """Test that city, state and a US ZIP code are read from the end of an address."""
+    assert address_parts(ADDRESS) == ("NEW YORK", "NY", "10019")
+    assert address_parts("10 Downing Street, London, X0, SW1A 2AA") == ("LONDON", "X0", None)
+    assert address_parts("Somewhere, 10019") == (None, None, "10019")
+    assert address_parts("") == (None, None, None)
+
+
+def test_cache_hit_skips_the_lookup(tmp_path):
+    """Test that a cached address isn't looked up again, and a miss is."""
+    cache = GeocodeCache(str(tmp_path / "geocodes.sqlite"))
+    geocoder = StubGeocoder()
+    first = geocode_addresses([ADDRESS], geocoder, cache)
+    assert geocoder.calls == 1
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    stats = GeocodeStats()
+    second = geocode_addresses([ADDRESS.lower(), "2 Elm Street, Boston, MA, 02110"], geocoder, cache, stats=stats)
+    assert geocoder.calls == 2
+    assert (stats.cached, stats.lookups) == (1, 1)
+    assert second[normalize_address(ADDRESS)] == first[normalize_address(ADDRESS)]
+    assert isinstance(second[normalize_address(ADDRESS)], Geocode)
+    cache.close()
+
+
+def test_not_found_is_cached(tmp_path):
+    """Test that an address the provider can't place is cached as None and not asked again."""
+    cache = GeocodeCache(str(tmp_path / "geocodes.sqlite"))
+    geocoder = StubGeocoder()
+    stats = GeocodeStats()
+    assert geocode_addresses(["Nowhere"], geocoder, cache, stats=stats) == {"NOWHERE": None}
+    assert stats.not_found == 1
+    assert len(cache) == 1
+
+    stats = GeocodeStats()
+    assert geocode_addresses(["nowhere"], geocoder, cache, stats=stats) == {"NOWHERE": None}
+    assert geocoder.calls == 1
+    assert (stats.cached, stats.lookups) == (1, 0)
+    cache.close()
+
+
+def test_failed_lookup_is_not_cached(tmp_path):
+    """Test that a lookup that raises is counted as failed, left out of the cache and retried next run."""
+    cache = GeocodeCache(str(tmp_path / "geocodes.sqlite"))
+    geocoder = FlakyGeocoder("Boston")
+    stats = GeocodeStats()
+    results = geocode_addresses([ADDRESS, "2 Elm Street, Boston, MA, 02110"], geocoder, cache, stats=stats)
+    assert stats.failed == 1
+    assert list(results) == [normalize_address(ADDRESS)]
+    assert len(cache) == 1
+
+    geocoder.marker = "nowhere at all"
+    stats = GeocodeStats()
+    results = geocode_addresses([ADDRESS, "2 Elm Street, Boston, MA, 02110"], geocoder, cache, stats=stats)
+    assert (stats.cached, stats.lookups, stats.failed) == (1, 1, 0)
+    assert len(results) == 2
+    cache.close()
+
+
+def test_managers_sharing_an_address_share_one_lookup(recording_driver):
+    """Test that managers at one address, however it's spelled, cost one lookup and are all written."""
+    managers = [Record({"managerCik": "1", "address": ADDRESS}),
+                Record({"managerCik": "2", "address": ADDRESS.upper()}),
+                Record({"managerCik": "3", "address": "1 Main St, Ste 200, New York, NY, 10019"}),
+                Record({"managerCik": "4", "address": "2 Elm Street, Boston, MA, 02110"})]
+    driver, queries = recording_driver(lambda query, params: managers if query == FIND_MANAGERS_QUERY else None)
+
+    geocoder = StubGeocoder()
+    stats = geocode_managers(driver, geocoder)
+    written = [row for query, params in queries if query == SET_MANAGER_LOCATIONS_QUERY for row in params["rows"]]
+    assert geocoder.calls == 2
+    assert (stats.managers, stats.addresses, stats.lookups, stats.written) == (4, 2, 2, 4)
+    assert len({(row["latitude"], row["longitude"]) for row in written if row["managerCik"] != "4"}) == 1
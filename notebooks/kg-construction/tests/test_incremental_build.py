@@ -0,0 +1,150 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+# incremental_build chunks form 10-K files with langchain
+pytest.importorskip("langchain")
+
+from neo4j import Record  # noqa: E402
+from synthetic_graph import form13_rows  # noqa: E402
+
+from incremental_build import (  # noqa: E402
+    FORM_FINGERPRINTS_QUERY, HOLDING_FINGERPRINTS_QUERY, MERGE_FORMS_QUERY, UPSERT_HOLDINGS_QUERY, apply_form10k_delta,
+    file_fingerprint, form10k_delta, form13_delta, incremental_build, row_fingerprint,
+)
+
+SAMPLE_FORM10K = sorted((Path(__file__).resolve().parents[3] / "data" / "sample" / "form10k").glob("*.json"))[0]
+
+
+def write_form13(path, rows):
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def stored_holdings(stored):
+    """Answers holding fingerprint lookups from `stored`, keeping the fingerprints of upserted holdings in it"""
+    def responder(query, params):
+        if query == HOLDING_FINGERPRINTS_QUERY:
+            return [Record({"managerCik": cik, "cusip6": cusip6, "reportCalendarOrQuarter": quarter,
+                            "fingerprint": fp})
+                    for (cik, cusip6, quarter), fp in stored.items()
+                    if quarter in params["quarters"]]
+        if query == UPSERT_HOLDINGS_QUERY:
+            for row in params["rows"]:
+                stored[(row["managerCik"], row["cusip6"], row["reportCalendarOrQuarter"])] = row["fingerprint"]
+    return responder
+
+
+def answering(query, loaded):
+    """Answers `query` with `loaded`"""
+    def responder(q, params):
+        if q == query:
+            return [Record(row) for row in loaded]
+    return responder
+
+
+def params_sent(queries, query):
+    """The params of every run of `query`, in order"""
+    return [params for q, params in queries if q == query]
+
+
+def rows_sent(queries, query):
+    """The rows of every run of `query`, in order"""
+    return [row for params in params_sent(queries, query) for row in params["rows"]]
+
+
+def test_form10k_delta_finds_new_and_changed_files(recording_driver, tmp_path):
+    """Test that only files that are new, or differ from their loaded fingerprint, are changed."""
+    files = []
+    for name in ("new", "same", "edited"):
+        path = tmp_path / f"{name}.json"
+        path.write_text(f'{{"names": ["{name}"]}}')
+        files.append(str(path))
+    loaded = [{"formId": "same", "fingerprint": file_fingerprint(files[1])},
+              {"formId": "edited", "fingerprint": "0" * 64}]
+    driver, queries = recording_driver(answering(FORM_FINGERPRINTS_QUERY, loaded))
+
+    changed, fingerprints = form10k_delta(driver, files)
+    assert params_sent(queries, FORM_FINGERPRINTS_QUERY)[0]["formIds"] == ["new", "same", "edited"]
+    assert [(entry["formId"], entry["replaces"]) for entry in changed] == [("new", False), ("edited", True)]
+    assert fingerprints == {Path(file).stem: file_fingerprint(file) for file in files}
+
+
+def test_replaced_forms_are_reported_for_embedding(recording_driver):
+    """Test that reloaded forms lose their old summary and are listed as needing embeddings."""
+    file = str(SAMPLE_FORM10K)
+    form_id = Path(file).stem
+    driver, queries = recording_driver()
+    changed = [{"file": file, "formId": form_id, "fingerprint": file_fingerprint(file), "replaces": True}]
+    summary = apply_form10k_delta(driver, changed, processes=1)
+    assert summary["needsEmbedding"] == [form_id]
+    assert [row["formId"] for row in rows_sent(queries, MERGE_FORMS_QUERY)] == [form_id]
+    assert "f.summary = null" in MERGE_FORMS_QUERY and "f.summaryEmbedding = null" in MERGE_FORMS_QUERY
+
+
+def test_form13_delta_finds_new_and_changed_holdings(recording_driver):
+    """Test that holdings are compared by fingerprint, reading back only the quarters being loaded."""
+    rows = [{"managerCik": "1", "cusip6": "100000", "reportCalendarOrQuarter": "2023-06-30", "shares": 5},
+            {"managerCik": "2", "cusip6": "100000", "reportCalendarOrQuarter": "2023-06-30", "shares": 7},
+            {"managerCik": "1", "cusip6": "100001", "reportCalendarOrQuarter": "2023-09-30", "shares": 9}]
+    unchanged = {"shares": 5, "cusip6": "100000", "reportCalendarOrQuarter": "2023-06-30", "managerCik": "1"}
+    loaded = [{"managerCik": "1", "cusip6": "100000", "reportCalendarOrQuarter": "2023-06-30",
+               "fingerprint": row_fingerprint(unchanged)},
+              {"managerCik": "2", "cusip6": "100000", "reportCalendarOrQuarter": "2023-06-30",
+               "fingerprint": row_fingerprint({**rows[1], "shares": 6})}]
+    driver, queries = recording_driver(answering(HOLDING_FINGERPRINTS_QUERY, loaded))
+
+    changed, unchanged_count = form13_delta(driver, rows)
+    assert params_sent(queries, HOLDING_FINGERPRINTS_QUERY)[0]["quarters"] == ["2023-06-30", "2023-09-30"]
+    assert unchanged_count == 1
+    assert changed == [{**row, "fingerprint": row_fingerprint(row)} for row in rows[1:]]
+
+
+def test_duplicated_holding_key_is_aggregated_before_upsert(recording_driver, tmp_path):
+    """Test that rows sharing a holding key are summed into one holding, fingerprinted and upserted once."""
+    # a company per row, so the only shared holding key is the duplicate
+    rows = list(form13_rows(6, companies=6, managers=2))
+    duplicate = {**rows[0], "value": "100.0", "shares": "10",
+                 "source": rows[0]["source"].replace("000001", "000002")}
+    rows[0] = {**rows[0], "value": "50.0", "shares": "5"}
+    form13_file = write_form13(tmp_path / "form13.csv", rows + [duplicate])
+    stored = {}
+
+    driver, queries = recording_driver(stored_holdings(stored))
+    summary = incremental_build(driver, form13_file=form13_file)
+    upserts = rows_sent(queries, UPSERT_HOLDINGS_QUERY)
+    key = (rows[0]["managerCik"], rows[0]["cusip6"], rows[0]["reportCalendarOrQuarter"])
+    holding = [row for row in upserts if (row["managerCik"], row["cusip6"], row["reportCalendarOrQuarter"]) == key]
+    assert len(holding) == 1
+    assert holding[0]["shares"] == 15
+    assert holding[0]["value"] == 150.0
+    assert len(upserts) == len(stored) == summary["form13"]["holdings"]
+
+    # a rerun of the same file finds every holding unchanged, the duplicated one included
+    driver, queries = recording_driver(stored_holdings(stored))
+    summary = incremental_build(driver, form13_file=form13_file)
+    upserts = rows_sent(queries, UPSERT_HOLDINGS_QUERY)
+    assert upserts == []
+    assert summary["form13"]["unchanged"] == len(stored)
+
+
+def test_changed_row_of_duplicated_holding_is_upserted(recording_driver, tmp_path):
+    """Test that changing one of several rows of a holding upserts the new total."""
+    rows = list(form13_rows(4, companies=4, managers=2))
+    duplicate = {**rows[0], "shares": "10"}
+    rows[0] = {**rows[0], "shares": "5"}
+    stored = {}
+    driver, _ = recording_driver(stored_holdings(stored))
+    incremental_build(driver, form13_file=write_form13(tmp_path / "before.csv", rows + [duplicate]))
+
+    driver, queries = recording_driver(stored_holdings(stored))
+    summary = incremental_build(driver, form13_file=write_form13(tmp_path / "after.csv",
+                                                                 rows + [{**duplicate, "shares": "20"}]))
+    upserts = rows_sent(queries, UPSERT_HOLDINGS_QUERY)
+    assert [row["shares"] for row in upserts] == [25]
+    assert summary["form13"]["unchanged"] == len(stored) - 1
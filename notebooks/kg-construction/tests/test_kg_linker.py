@@ -0,0 +1,34 @@
+from neo4j import Record
+
+from kg_linker import CHUNK_FORM_IDS_QUERY, LINK_NEXT_QUERY, LINK_STEPS, run_link_step
+
+
+def chunk_form_ids(form_ids):
+    """Answers the chunk index lookup with `form_ids`"""
+    def responder(query, params):
+        if query == CHUNK_FORM_IDS_QUERY:
+            return [Record({"formId": form_id}) for form_id in form_ids]
+    return responder
+
+
+def test_next_links_the_given_forms(recording_driver):
+    """Test that NEXT unwinds the given formIds, without looking up any others."""
+    driver, queries = recording_driver(chunk_form_ids(["a", "b", "c"]))
+    run_link_step(driver, "NEXT", form_ids=["b"], batch_size=10)
+    assert queries == [(LINK_NEXT_QUERY, {"formIds": ["b"], "batchSize": 10})]
+
+
+def test_next_reads_every_form_id_once_without_form_ids(recording_driver):
+    """Test that NEXT for every form reads the formIds from the chunk index, then links them in one step."""
+    driver, queries = recording_driver(chunk_form_ids(["a", "b"]))
+    run_link_step(driver, "NEXT")
+    assert [query for query, _ in queries] == [CHUNK_FORM_IDS_QUERY, LINK_NEXT_QUERY]
+    assert queries[1][1]["formIds"] == ["a", "b"]
+
+
+def test_link_steps_drive_from_forms():
+    """Test that no step matches every Chunk to find its forms."""
+    for step, query in LINK_STEPS.items():
+        first = query.strip().splitlines()[0]
+        assert first.startswith(("UNWIND $formIds", "MATCH (f:Form)")), step
+
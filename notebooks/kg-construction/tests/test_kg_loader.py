@@ -0,0 +1,103 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from stub_driver import StubDriver
+from synthetic_graph import chunk_rows, form13_rows
+
+from kg_loader import (
+    GRAPHVIS_INVALIDATE_URL, MERGE_CHUNKS_QUERY, MERGE_COMPANIES_QUERY, MERGE_HOLDINGS_QUERY, MERGE_MANAGERS_QUERY,
+    batched, load_batches, load_chunks, load_form13, notify_graph_changed,
+)
+
+
+@pytest.fixture
+def graphvis(monkeypatch):
+    """A local endpoint standing in for graphvis, recording the paths POSTed to it."""
+    posts = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            posts.append(self.path)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv(GRAPHVIS_INVALIDATE_URL, f"http://127.0.0.1:{server.server_port}/cache/invalidate")
+    yield posts
+    server.shutdown()
+    server.server_close()
+
+
+def test_batched():
+    """Test that rows are split into lists of at most batch_size."""
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+
+def test_load_batches_sends_one_query_per_batch():
+    """Test that rows go out in batches of batch_size, with params alongside $rows."""
+    driver = StubDriver(0)
+    stats = load_batches(driver, "UNWIND $rows AS row RETURN row", [{"i": i} for i in range(25)],
+                         batch_size=10, params={"extra": 1})
+    assert (stats.rows, stats.batches, stats.retries) == (25, 3, 0)
+    assert driver.queries == 3
+
+
+def test_load_chunks_writes_batches_not_rows(recording_driver):
+    """Test that chunks are merged with one round trip per batch rather than one per chunk."""
+    driver, queries = recording_driver()
+    stats = load_chunks(driver, list(chunk_rows(250)), notify=False, batch_size=100)
+    assert [(query, len(params["rows"])) for query, params in queries] == [(MERGE_CHUNKS_QUERY, 100), (MERGE_CHUNKS_QUERY, 100), (MERGE_CHUNKS_QUERY, 50)]
+    assert stats.rows == 250
+
+
+def test_load_form13_merges_both_ends_before_the_holdings(recording_driver):
+    """Test that every company and manager batch is written before the first holding batch."""
+    driver, queries = recording_driver()
+    load_form13(driver, list(form13_rows(30)), notify=False, batch_size=10)
+    merges = [query for query, _ in queries if query in (MERGE_COMPANIES_QUERY, MERGE_MANAGERS_QUERY, MERGE_HOLDINGS_QUERY)]
+    assert merges == [MERGE_COMPANIES_QUERY] * 3 + [MERGE_MANAGERS_QUERY] * 3 + [MERGE_HOLDINGS_QUERY] * 3
+
+
+def test_notify_without_url_does_nothing(monkeypatch):
+    """Test that no request is made when no graphvis url is configured."""
+    monkeypatch.delenv(GRAPHVIS_INVALIDATE_URL, raising=False)
+    assert notify_graph_changed() is False
+
+
+def test_notify_posts_to_graphvis(graphvis):
+    """Test that the invalidate endpoint is POSTed to."""
+    assert notify_graph_changed() is True
+    assert graphvis == ["/cache/invalidate"]
+
+
+def test_notify_warns_when_graphvis_is_down():
+    """Test that an unreachable graphvis warns instead of failing the load."""
+    with pytest.warns(UserWarning, match="not invalidated"):
+        assert notify_graph_changed("http://127.0.0.1:9/cache/invalidate") is False
+
+
+def test_loaders_invalidate_graphvis(graphvis):
+    """Test that chunk and form 13 loads tell graphvis once each, unless asked not to."""
+    load_chunks(StubDriver(0), list(chunk_rows(30)))
+    load_form13(StubDriver(0), list(form13_rows(30)))
+    assert graphvis == ["/cache/invalidate", "/cache/invalidate"]
+
+    load_chunks(StubDriver(0), list(chunk_rows(30)), notify=False)
+    assert len(graphvis) == 2
+
+
+def test_load_form13_rolls_up_loaded_companies(recording_driver):
+    """Test that a form 13 load refreshes the holder rollups of exactly the companies it loaded."""
+    driver, queries = recording_driver()
+    rows = list(form13_rows(30))
+    stats = load_form13(driver, rows, notify=False)
+    rollups = [params["rows"] for query, params in queries if "com.topHolders" in query]
+    assert rollups == [sorted({row["cusip6"] for row in rows})]
+    assert stats["rollups"].companies == len(rollups[0])
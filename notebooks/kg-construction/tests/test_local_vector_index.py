@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from local_vector_index import (  # noqa: E402
+    CURRENT_FILE, INDEX_FILE, VECTORS_FILE, LocalVectorIndex, current_dir, partition_index, write_index,
+)
+
+
+def rows(count, dimensions=8, seed=0, prefix="chunk"):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        yield {"chunkId": f"{prefix}{i}", "formId": f"form{i % 4}", "cusip6": f"{i % 2:06d}",
+               "embedding": rng.normal(size=dimensions).tolist()}
+
+
+def test_open_index_keeps_its_version_when_a_new_one_is_written(tmp_path):
+    """Test that an index opened before a rewrite keeps searching the version it opened."""
+    index_dir = str(tmp_path / "index")
+    write_index(index_dir, rows(20))
+    before = LocalVectorIndex(index_dir)
+    query = np.asarray(before.vectors[3])
+
+    write_index(index_dir, rows(30, seed=1, prefix="new"))
+    assert before.search(query, k=1)[0][0].chunk_id == "chunk3"
+    after = LocalVectorIndex(index_dir)
+    assert len(after) == 30
+    assert after.version_dir != before.version_dir
+
+
+def test_failed_export_leaves_the_current_version(tmp_path):
+    """Test that an export that fails part way publishes nothing and cleans up after itself."""
+    index_dir = str(tmp_path / "index")
+    write_index(index_dir, rows(10))
+    current = current_dir(index_dir)
+
+    def failing():
+        yield from rows(5)
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        write_index(index_dir, failing())
+    assert current_dir(index_dir) == current
+    assert len(LocalVectorIndex(index_dir)) == 10
+    assert sorted(os.listdir(index_dir)) == sorted([CURRENT_FILE, os.path.basename(current)])
+
+
+def test_partition_publishes_a_new_version(tmp_path):
+    """Test that partitioning writes a new version, keeps the previous one and prunes older ones."""
+    index_dir = str(tmp_path / "index")
+    write_index(index_dir, rows(40))
+    first = current_dir(index_dir)
+    write_index(index_dir, rows(40))
+    exact = LocalVectorIndex(index_dir)
+
+    partition_index(index_dir, lists=4)
+    partitioned = LocalVectorIndex(index_dir)
+    assert partitioned.meta["lists"] == 4
+    assert exact.meta["lists"] == 0
+    assert not os.path.exists(first)
+    versions = [name for name in os.listdir(index_dir) if name != CURRENT_FILE]
+    assert sorted(versions) == sorted([os.path.basename(exact.version_dir), os.path.basename(partitioned.version_dir)])
+    hits = partitioned.search(np.asarray(exact.vectors[5]), k=1, nprobe=4)[0]
+    assert hits[0].chunk_id == "chunk5"
+
+
+def test_reads_an_index_written_before_versions(tmp_path):
+    """Test that an index with its files in the directory itself still opens, and is replaced by the next write."""
+    index_dir = str(tmp_path / "index")
+    write_index(index_dir, rows(6))
+    version_dir = current_dir(index_dir)
+    for name in (VECTORS_FILE, "chunks.json", INDEX_FILE):
+        os.replace(os.path.join(version_dir, name), os.path.join(index_dir, name))
+    os.rmdir(version_dir)
+    os.remove(os.path.join(index_dir, CURRENT_FILE))
+    assert len(LocalVectorIndex(index_dir)) == 6
+
+    write_index(index_dir, rows(7))
+    assert len(LocalVectorIndex(index_dir)) == 7
+    assert not os.path.exists(os.path.join(index_dir, INDEX_FILE))